@@ -1,370 +1,453 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, scrolledtext
 import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from functools import lru_cache
+
+try:
+    import resource  # No existe en Windows: ahí se omite la memoria del proceso
+except ImportError:
+    resource = None
+
+# El núcleo léxico vive en lexico.py (sin dependencia de tkinter). Token y
+# ErrorLexico no se usan aquí: se re-exportan porque antes estaban definidos en
+# este módulo, y así sigue funcionando `from Fase1 import Token, ErrorLexico`.
+from lexico import (TipoToken, Token, ErrorLexico, AnalizadorLexico, AnalizadorIncremental,
+                    AnalisisCancelado, EstadisticasLexicas, IndiceIdentificadores, Referencias, escribir_salida,
+                    iter_tokens, TIPOS_TOKEN,
+                    MOTOR_COMPILADO, PATRON_DESCONOCIDOS, parece_texto, archivo_parece_texto)
+from salida_binaria import EXTENSION_BINARIA, LectorBinario, escribir_binario
+
+INTERVALO_SONDEO_MS = 50  # Frecuencia con la que la interfaz revisa la cola del hilo de análisis
+MAX_ERRORES_CONSOLA = 1000  # Errores mostrados en la consola; del resto solo se informa la cantidad
+RETARDO_RESALTADO_MS = 80  # Espera tras la última edición o desplazamiento antes de colorear
+MARGEN_RESALTADO = 30      # Líneas coloreadas por encima y por debajo de las visibles
+MAX_LINEAS_RESALTADO = 8192  # Líneas distintas cuyos tramos de color se recuerdan
+TAM_ARCHIVO_GRANDE = 16 * 1024 * 1024  # Bytes; desde aquí el archivo no se carga en el editor
+TAM_PAGINA_PREVIA = 256 * 1024         # Bytes aproximados por página de la vista previa
 
 # ==========================================
-# 1. TIPOS DE TOKEN Y CLASES
-# ==========================================
-
-class TipoToken:
-    # Palabras Clave
-    IF = 'IF'
-    ELSE = 'ELSE'
-    WHILE = 'WHILE'
-    INT = 'INT'
-    FLOAT = 'FLOAT'
-    STRING = 'STRING'
-    BOOL = 'BOOL'
-    VOID = 'VOID'
-    RETURN = 'RETURN'
-    DEF = 'DEF'        # Agregado para funciones
-    READ = 'READ'
-    WRITE = 'WRITE'
-    
-    # Literales e Identificadores
-    ID = 'ID'
-    NUMERO_ENTERO = 'NUMERO_ENTERO'
-    NUMERO_FLOTANTE = 'NUMERO_FLOTANTE'
-    CADENA_LITERAL = 'CADENA_LITERAL'
-    BOOLEANO_LITERAL = 'BOOLEANO_LITERAL' # Para true/false
-    
-    # Operadores y Símbolos
-    SUMA = '+'
-    RESTA = '-'
-    MULTIPLICACION = '*'
-    DIVISION = '/'
-    MODULO = '%'
-    MAYOR_QUE = '>'
-    MENOR_QUE = '<'
-    MAYOR_IGUAL = '>='
-    MENOR_IGUAL = '<='
-    IGUAL_QUE = '=='
-    DIFERENTE_QUE = '!='
-    ASIGNACION = '='
-    PARENTESIS_IZQ = '('
-    PARENTESIS_DER = ')'
-    LLAVE_IZQ = '{'
-    LLAVE_DER = '}'
-    DOS_PUNTOS = ':'
-    COMA = ','
-    PUNTO_Y_COMA = ';'
-    
-    # Control
-    NUEVA_LINEA = 'NEWLINE'
-    INDENTAR = 'INDENT'
-    DESINDENTAR = 'DEDENT'
-    FIN_ARCHIVO = 'EOF'
-    DESCONOCIDO = 'UNKNOWN'
-
-class Token:
-    def __init__(self, tipo, valor, linea, col_inicio, col_fin):
-        self.tipo = tipo
-        self.valor = valor
-        self.linea = linea
-        self.col_inicio = col_inicio
-        self.col_fin = col_fin
-
-    def __str__(self):
-        # Formato para el archivo .out: <ID> line 1, col 1-5: 'variable'
-        if self.tipo in [TipoToken.NUEVA_LINEA, TipoToken.INDENTAR, TipoToken.DESINDENTAR, TipoToken.FIN_ARCHIVO]:
-             return f"<{self.tipo}> line {self.linea}, col {self.col_inicio}-{self.col_fin}"
-        return f"<{self.tipo}> line {self.linea}, col {self.col_inicio}-{self.col_fin}: '{self.valor}'"
-
-class ErrorLexico:
-    def __init__(self, linea, columna, mensaje):
-        self.linea = linea
-        self.columna = columna
-        self.mensaje = mensaje
-
-    def __str__(self):
-        # Formato: line , col : ERROR
-        return f"line {self.linea}, col {self.columna}: ERROR {self.mensaje}"
-
-# ==========================================
-# 2. ANALIZADOR LÉXICO
+# 3. INTERFAZ GRÁFICA 
 # ==========================================
 
-class AnalizadorLexico:
-    def __init__(self, codigo_fuente):
-        # Normalizar saltos de línea y asegurar terminación
-        self.fuente = codigo_fuente.replace('\r\n', '\n') + '\n'
-        self.longitud = len(self.fuente)
-        self.posicion = 0
-        self.linea = 1
-        self.columna = 1
-        
-        # Pila de indentación (Nivel 0 inicial)
-        self.pila_indentacion = [0] 
-        
-        self.tokens = []
-        self.errores = []
-        
-        # Mapa de palabras reservadas
-        self.palabras_clave = {
-            "if": TipoToken.IF, "else": TipoToken.ELSE, "while": TipoToken.WHILE,
-            "int": TipoToken.INT, "float": TipoToken.FLOAT, "string": TipoToken.STRING,
-            "bool": TipoToken.BOOL, "void": TipoToken.VOID, "return": TipoToken.RETURN,
-            "def": TipoToken.DEF, "Read": TipoToken.READ, "Write": TipoToken.WRITE,
-            "true": TipoToken.BOOLEANO_LITERAL, "false": TipoToken.BOOLEANO_LITERAL
-        }
-
-    def analizar(self):
-        inicio_de_linea = True # Chequeo para verificar indentación
-
-        while self.posicion < self.longitud:
-            caracter = self.fuente[self.posicion]
-
-            # ------------------------------------------------
-            # 1. MANEJO DE INDENTACIÓN (Solo tras NEWLINE o inicio)
-            # ------------------------------------------------
-            if inicio_de_linea:
-                # Si es línea vacía (solo enter), lo pasamos
-                if caracter == '\n':
-                    self.posicion += 1
-                    self.linea += 1
-                    self.columna = 1
-                    continue
-                
-                # Si es comentario al inicio de línea, se ignora toda la línea
-                if caracter == '#':
-                    self.saltar_comentario()
-                    continue
-                
-                # Calcular indentación (espacios y tabs)
-                if caracter.isspace():
-                    espacios = self.contar_indentacion()
-                    # Verificar si la línea tiene contenido real después de los espacios
-                    if self.posicion < self.longitud and self.fuente[self.posicion] not in ['\n', '#']:
-                        self.procesar_indentacion(espacios)
-                        inicio_de_linea = False
-                    continue
-                else:
-                    # Nivel 0 de indentación (sin espacios al inicio)
-                    self.procesar_indentacion(0)
-                    inicio_de_linea = False
-            
-            # ------------------------------------------------
-            # 2. ESPACIOS EN BLANCO (No al inicio)
-            # ------------------------------------------------
-            if caracter.isspace():
-                if caracter == '\n':
-                    # Emitir NEWLINE si la línea tuvo contenido previo válido
-                    self.tokens.append(Token(TipoToken.NUEVA_LINEA, "\\n", self.linea, self.columna, self.columna))
-                    self.posicion += 1
-                    self.linea += 1
-                    self.columna = 1
-                    inicio_de_linea = True
-                else:
-                    self.posicion += 1
-                    self.columna += 1
-                continue
+class TablaTokensVirtual:
+    # Tabla de tokens virtualizada: el Treeview solo tiene tantas filas como caben
+    # en pantalla y al desplazarse se reescriben sus valores con la ventana visible
+    # de la lista en memoria. Mostrar o limpiar resultados no depende del total.
+    ALTO_FILA = 25  # Debe coincidir con el rowheight del estilo "Treeview"
 
-            # ------------------------------------------------
-            # 3. COMENTARIOS (En medio de línea)
-            # ------------------------------------------------
-            if caracter == '#':
-                self.saltar_comentario()
-                continue 
-
-            # ------------------------------------------------
-            # 4. IDENTIFICADORES Y PALABRAS CLAVE
-            # ------------------------------------------------
-            if caracter.isalpha() or caracter == '_':
-                self.escanear_identificador()
-                continue
+    def __init__(self, padre):
+        self.elementos = []   # Secuencia indexable de tokens que se muestra
+        self.primera = 0      # Índice del primer token visible
+        self.filas = []       # Filas reutilizables del Treeview
+        self.seleccionado = None  # Índice del token marcado con ir_a
 
-            # ------------------------------------------------
-            # 5. NÚMEROS (Enteros y Flotantes)
-            # ------------------------------------------------
-            if caracter.isdigit():
-                self.escanear_numero()
-                continue
+        columnas = ("linea", "col", "tipo", "valor")
+        self.tabla = ttk.Treeview(padre, columns=columnas, show="headings", selectmode="browse", height=1)
 
-            # ------------------------------------------------
-            # 6. CADENAS (STRINGS)
-            # ------------------------------------------------
-            if caracter == '"':
-                self.escanear_cadena()
-                continue
+        self.tabla.heading("linea", text="Lín")
+        self.tabla.heading("col", text="Col")
+        self.tabla.heading("tipo", text="Tipo")
+        self.tabla.heading("valor", text="Valor")
 
-            # ------------------------------------------------
-            # 7. OPERADORES Y SÍMBOLOS
-            # ------------------------------------------------
-            if self.escanear_operador(caracter):
-                continue
+        self.tabla.column("linea", width=40, anchor=tk.CENTER)
+        self.tabla.column("col", width=60, anchor=tk.CENTER)
+        self.tabla.column("tipo", width=120)
+        self.tabla.column("valor", width=150)
 
-            # ------------------------------------------------
-            # 8. ERROR: CARÁCTER DESCONOCIDO
-            # ------------------------------------------------
-            self.errores.append(ErrorLexico(self.linea, self.columna, f"Carácter inesperado '{caracter}'"))
-            self.posicion += 1
-            self.columna += 1
-
-        # AL FINAL DEL ARCHIVO (EOF): Cerrar bloques pendientes
-        while len(self.pila_indentacion) > 1:
-            self.pila_indentacion.pop()
-            self.tokens.append(Token(TipoToken.DESINDENTAR, "", self.linea, self.columna, self.columna))
-        
-        # Opcional: token EOF
-        # self.tokens.append(Token(TipoToken.FIN_ARCHIVO, "", self.linea, self.columna, self.columna))
-        
-        return self.tokens, self.errores
+        # La barra no controla al Treeview: refleja la posición dentro de la lista
+        self.scroll_y = ttk.Scrollbar(padre, orient=tk.VERTICAL, command=self.desplazar)
 
-    def contar_indentacion(self):
-        contador = 0
-        pos_temporal = self.posicion
-        
-        # Calcular espacios (Tabs = 4 espacios estándar)
-        while pos_temporal < self.longitud and self.fuente[pos_temporal] in [' ', '\t']:
-            if self.fuente[pos_temporal] == '\t':
-                contador += 4
+        self.tabla.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tabla.bind("<Configure>", self.redimensionar)
+        self.tabla.bind("<MouseWheel>", self.rueda)   # Windows / macOS
+        self.tabla.bind("<Button-4>", self.rueda)     # Linux (arriba)
+        self.tabla.bind("<Button-5>", self.rueda)     # Linux (abajo)
+
+    def mostrar(self, elementos):
+        self.elementos = elementos
+        self.primera = 0
+        self.seleccionado = None
+        self.refrescar()
+
+    def limpiar(self):
+        self.mostrar([])
+
+    def ir_a(self, indice):
+        # Lleva el token `indice` a la primera fila visible y lo marca
+        self.primera = indice
+        self.seleccionado = indice
+        self.refrescar()
+
+    def redimensionar(self, evento):
+        # Una fila menos por el encabezado
+        cantidad = max(1, evento.height // self.ALTO_FILA - 1)
+        while len(self.filas) < cantidad:
+            self.filas.append(self.tabla.insert("", tk.END, values=()))
+        while len(self.filas) > cantidad:
+            self.tabla.delete(self.filas.pop())
+        self.refrescar()
+
+    def desplazar(self, *args):
+        # Protocolo de comandos de ttk.Scrollbar: ('moveto', fracción) o ('scroll', n, 'units'|'pages')
+        if args[0] == "moveto":
+            self.primera = int(float(args[1]) * len(self.elementos))
+        elif args[0] == "scroll":
+            paso = int(args[1])
+            if args[2] == "pages":
+                paso *= len(self.filas)
+            self.primera += paso
+        self.refrescar()
+
+    def rueda(self, evento):
+        if evento.num == 4 or getattr(evento, "delta", 0) > 0:
+            self.primera -= 3
+        else:
+            self.primera += 3
+        self.refrescar()
+        return "break"
+
+    def refrescar(self):
+        total = len(self.elementos)
+        self.primera = max(0, min(self.primera, total - len(self.filas)))
+        for desplazamiento, fila in enumerate(self.filas):
+            indice = self.primera + desplazamiento
+            if indice < total:
+                t = self.elementos[indice]
+                self.tabla.item(fila, values=(t.linea, f"{t.col_inicio}-{t.col_fin}", t.tipo, t.valor))
             else:
-                contador += 1
-            pos_temporal += 1
-        
-        # Ajustar posición real del puntero
-        chars_consumidos = pos_temporal - self.posicion
-        self.posicion = pos_temporal
-        self.columna += chars_consumidos
-        return contador
-
-    def procesar_indentacion(self, espacios):
-        nivel_actual = self.pila_indentacion[-1]
-        
-        if espacios > nivel_actual:
-            # Aumenta nivel -> INDENT
-            self.pila_indentacion.append(espacios)
-            self.tokens.append(Token(TipoToken.INDENTAR, "", self.linea, 1, espacios))
-        
-        elif espacios < nivel_actual:
-            # Disminuye nivel -> DEDENT(s)
-            while espacios < self.pila_indentacion[-1]:
-                self.pila_indentacion.pop()
-                self.tokens.append(Token(TipoToken.DESINDENTAR, "", self.linea, 1, espacios))
-                if len(self.pila_indentacion) == 0: 
-                    self.pila_indentacion.append(0)
-                    break
-            
-            # Error de Indentación: Si bajó pero no coincidió con ningún nivel previo
-            if self.pila_indentacion[-1] != espacios:
-                self.errores.append(ErrorLexico(self.linea, 1, "Indentación inválida (no coincide con niveles previos)"))
-                # Recuperación: forzar el nivel al más cercano (ya hecho por el while)
-
-    def saltar_comentario(self):
-        # Ignorar hasta el salto de línea, pero NO consumir el \n (para que el loop principal lo vea)
-        while self.posicion < self.longitud and self.fuente[self.posicion] != '\n':
-            self.posicion += 1
-
-    def escanear_identificador(self):
-        col_inicio = self.columna
-        pos_inicio = self.posicion
-        
-        while self.posicion < self.longitud and (self.fuente[self.posicion].isalnum() or self.fuente[self.posicion] == '_'):
-            self.posicion += 1
-            self.columna += 1
-        
-        lexema = self.fuente[pos_inicio:self.posicion]
-        
-        # Validación longitud máxima 31
-        if len(lexema) > 31:
-            self.errores.append(ErrorLexico(self.linea, col_inicio, "Identificador excede 31 caracteres (truncado)"))
-            lexema = lexema[:31] # Truncar identificador
-
-        tipo_token = self.palabras_clave.get(lexema, TipoToken.ID)
-        
-        # Caso especial: true/false son literales booleanos, no palabras clave de control
-        if lexema in ["true", "false"]:
-            tipo_token = TipoToken.BOOLEANO_LITERAL
+                self.tabla.item(fila, values=())
+        # Las filas se reutilizan: la selección sigue al token, no a la fila
+        fila = -1 if self.seleccionado is None else self.seleccionado - self.primera
+        self.tabla.selection_set(self.filas[fila] if 0 <= fila < len(self.filas) else ())
 
-        self.tokens.append(Token(tipo_token, lexema, self.linea, col_inicio, self.columna - 1))
-
-    def escanear_numero(self):
-        col_inicio = self.columna
-        pos_inicio = self.posicion
-        es_flotante = False
-        
-        # Parte entera
-        while self.posicion < self.longitud and self.fuente[self.posicion].isdigit():
-            self.posicion += 1
-            self.columna += 1
-            
-        # Parte decimal
-        if self.posicion < self.longitud and self.fuente[self.posicion] == '.':
-            es_flotante = True
-            self.posicion += 1
-            self.columna += 1
-            
-            # Verificar digitos tras el punto
-            if self.posicion >= self.longitud or not self.fuente[self.posicion].isdigit():
-                 self.errores.append(ErrorLexico(self.linea, self.columna, "Número flotante mal formado (se esperaba dígito tras punto)"))
-            
-            while self.posicion < self.longitud and self.fuente[self.posicion].isdigit():
-                self.posicion += 1
-                self.columna += 1
-        
-        lexema = self.fuente[pos_inicio:self.posicion]
-        tipo = TipoToken.NUMERO_FLOTANTE if es_flotante else TipoToken.NUMERO_ENTERO
-        self.tokens.append(Token(tipo, lexema, self.linea, col_inicio, self.columna - 1))
-
-    def escanear_cadena(self):
-        col_inicio = self.columna
-        self.posicion += 1; self.columna += 1 # Comilla inicial
-        pos_inicio_contenido = self.posicion
-        
-        while self.posicion < self.longitud and self.fuente[self.posicion] != '"' and self.fuente[self.posicion] != '\n':
-            self.posicion += 1
-            self.columna += 1
-            
-        if self.posicion >= self.longitud or self.fuente[self.posicion] == '\n':
-            # Error: String sin cerrar antes de fin de línea
-            self.errores.append(ErrorLexico(self.linea, col_inicio, "Cadena sin cerrar antes de fin de línea"))
-            lexema = self.fuente[pos_inicio_contenido:self.posicion]
-            # Recuperamos emitiendo el token hasta donde llegó
-            self.tokens.append(Token(TipoToken.CADENA_LITERAL, lexema + '"', self.linea, col_inicio, self.columna - 1))
+        if total:
+            self.scroll_y.set(self.primera / total, min(1.0, (self.primera + len(self.filas)) / total))
+        else:
+            self.scroll_y.set(0.0, 1.0)
+
+class VistaTokens:
+    # Subconjunto de una secuencia de tokens a través de sus índices (range o
+    # array), para filtrar resultados grandes sin copiar los tokens
+    __slots__ = ('tokens', 'indices')
+
+    def __init__(self, tokens, indices):
+        self.tokens = tokens
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, indice):
+        return self.tokens[self.indices[indice]]
+
+def primer_token_desde_linea(tokens, linea):
+    # Búsqueda binaria: los tokens están ordenados por línea
+    bajo, alto = 0, len(tokens)
+    while bajo < alto:
+        medio = (bajo + alto) // 2
+        if tokens[medio].linea < linea:
+            bajo = medio + 1
+        else:
+            alto = medio
+    return bajo
+
+def filtrar_tokens(tokens, tipo=None, linea_desde=None, linea_hasta=None):
+    # El filtro trabaja sobre la lista en memoria, nunca sobre el widget
+    inicio = primer_token_desde_linea(tokens, linea_desde) if linea_desde is not None else 0
+    fin = primer_token_desde_linea(tokens, linea_hasta + 1) if linea_hasta is not None else len(tokens)
+    if tipo is None:
+        if inicio == 0 and fin == len(tokens):
+            return tokens
+        if isinstance(tokens, LectorBinario):
+            return VistaTokens(tokens, range(inicio, fin))
+        return tokens[inicio:fin]
+    if isinstance(tokens, LectorBinario):
+        # Resultados en disco: se buscan los ids de tipo sin decodificar los registros
+        return VistaTokens(tokens, tokens.indices_de_tipo(tipo, inicio, fin))
+    return [tokens[i] for i in range(inicio, fin) if tokens[i].tipo == tipo]
+
+def memoria_proceso_bytes():
+    # Memoria residente actual si el sistema la expone (Linux); si no, el pico de
+    # RSS (macOS y otros Unix) o None en Windows
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == "darwin" else pico * 1024
+
+def texto_memoria():
+    memoria = memoria_proceso_bytes()
+    return "memoria no disponible" if memoria is None else f"memoria {memoria / 1e6:.1f} MB"
+
+class VistaPreviaPaginada:
+    # Vista previa de solo lectura de un archivo grande: se lee una página de
+    # unos TAM_PAGINA_PREVIA bytes por vez, cortada en un salto de línea. El
+    # inicio de cada página se ubica buscando el primer '\n' desde k * TAM_PAGINA_PREVIA,
+    # así que ir a cualquier página no exige recorrer las anteriores.
+    def __init__(self, ruta, tam_pagina=TAM_PAGINA_PREVIA):
+        self.ruta = ruta
+        self.tam_pagina = tam_pagina
+        self.tamano = os.path.getsize(ruta)
+        self.cantidad_paginas = max(1, -(-self.tamano // tam_pagina))
+        self.inicios = {0: 0}        # Página -> byte donde empieza
+        self.lineas_inicio = {0: 1}  # Página -> número de su primera línea
+
+    def inicio_pagina(self, pagina):
+        if pagina >= self.cantidad_paginas:
+            return self.tamano
+        if pagina not in self.inicios:
+            with open(self.ruta, "rb") as f:
+                f.seek(pagina * self.tam_pagina)
+                posicion = f.tell()
+                while True:
+                    bloque = f.read(1 << 16)
+                    if not bloque:
+                        self.inicios[pagina] = self.tamano
+                        break
+                    salto = bloque.find(b"\n")
+                    if salto != -1:
+                        self.inicios[pagina] = posicion + salto + 1
+                        break
+                    posicion += len(bloque)
+        return self.inicios[pagina]
+
+    def linea_inicial(self, pagina):
+        # Se cuentan los saltos desde la página conocida más cercana hacia atrás
+        if pagina not in self.lineas_inicio:
+            conocida = max(p for p in self.lineas_inicio if p < pagina)
+            posicion, fin = self.inicio_pagina(conocida), self.inicio_pagina(pagina)
+            linea = self.lineas_inicio[conocida]
+            with open(self.ruta, "rb") as f:
+                f.seek(posicion)
+                while posicion < fin:
+                    bloque = f.read(min(1 << 20, fin - posicion))
+                    if not bloque:
+                        break
+                    linea += bloque.count(b"\n")
+                    posicion += len(bloque)
+            self.lineas_inicio[pagina] = linea
+        return self.lineas_inicio[pagina]
+
+    def pagina_de_linea(self, linea):
+        # Búsqueda binaria de la última página que empieza en o antes de `linea`
+        # (entre páginas con la misma línea inicial, solo la última tiene contenido)
+        bajo, alto = 0, self.cantidad_paginas - 1
+        while bajo < alto:
+            medio = (bajo + alto + 1) // 2
+            if self.linea_inicial(medio) <= linea:
+                bajo = medio
+            else:
+                alto = medio - 1
+        return bajo
+
+    def pagina_vecina(self, pagina, paso):
+        # Página siguiente (paso 1) o anterior (-1) que tenga contenido: una línea
+        # larga puede abarcar varias páginas, que entonces quedan vacías
+        vecina = pagina + paso
+        while 0 < vecina < self.cantidad_paginas - 1 and self.inicio_pagina(vecina) == self.inicio_pagina(vecina + 1):
+            vecina += paso
+        return vecina
+
+    def leer_pagina(self, pagina):
+        # Una línea más larga que varias páginas se muestra recortada
+        inicio, fin = self.inicio_pagina(pagina), self.inicio_pagina(pagina + 1)
+        with open(self.ruta, "rb") as f:
+            f.seek(inicio)
+            datos = f.read(min(fin - inicio, 2 * self.tam_pagina))
+        texto = datos.decode("utf-8", errors="replace").replace("\r\n", "\n")
+        if fin - inicio > len(datos):
+            texto += "\n[... línea recortada en la vista previa ...]"
+        return texto
+
+class LecturaConProgreso:
+    # Envuelve el archivo que lee iter_tokens: informa la fracción leída y corta
+    # la lectura si se pidió cancelar
+    def __init__(self, archivo, tamano, progreso, cancelacion):
+        self.archivo = archivo
+        self.tamano = max(1, tamano)
+        self.progreso = progreso
+        self.cancelacion = cancelacion
+        self.leidos = 0
+
+    def read(self, cantidad):
+        if self.cancelacion.is_set():
+            raise AnalisisCancelado()
+        bloque = self.archivo.read(cantidad)
+        self.leidos += len(bloque)
+        self.progreso(min(1.0, self.leidos / self.tamano))
+        return bloque
+
+# Categoría de color de cada tipo de token (ID y los de control quedan sin color)
+ETIQUETA_POR_TIPO = {}
+for tipo in (TipoToken.IF, TipoToken.ELSE, TipoToken.WHILE, TipoToken.INT, TipoToken.FLOAT, TipoToken.STRING,
+             TipoToken.BOOL, TipoToken.VOID, TipoToken.RETURN, TipoToken.DEF, TipoToken.READ, TipoToken.WRITE):
+    ETIQUETA_POR_TIPO[tipo] = "palabra_clave"
+for tipo in (TipoToken.NUMERO_ENTERO, TipoToken.NUMERO_FLOTANTE, TipoToken.CADENA_LITERAL,
+             TipoToken.BOOLEANO_LITERAL):
+    ETIQUETA_POR_TIPO[tipo] = "literal"
+for tipo in TIPOS_TOKEN:
+    if tipo not in ETIQUETA_POR_TIPO and tipo not in (TipoToken.ID, TipoToken.NUEVA_LINEA, TipoToken.INDENTAR,
+                                                      TipoToken.DESINDENTAR, TipoToken.FIN_ARCHIVO):
+        ETIQUETA_POR_TIPO[tipo] = "error" if tipo == TipoToken.DESCONOCIDO else "operador"
+
+ESTILOS_RESALTADO = {
+    "palabra_clave": {"foreground": "#0000cc"},
+    "literal": {"foreground": "#a31515"},
+    "operador": {"foreground": "#7a3e00"},
+    "error": {"background": "#ffd0d0", "underline": True},
+}
+
+# Analizador reutilizado para cada línea a colorear (solo se usa desde el hilo principal)
+ANALIZADOR_RESALTADO = AnalizadorLexico("", MOTOR_COMPILADO)
+
+@lru_cache(maxsize=MAX_LINEAS_RESALTADO)
+def tramos_linea(linea):
+    # (etiqueta, inicio, fin) con columnas desde 0 para colorear una línea. Las
+    # cadenas y los comentarios terminan con la línea, así que cada línea se puede
+    # escanear sola; la cache por texto hace que desplazarse o editar otra línea
+    # no vuelva a escanearla.
+    ANALIZADOR_RESALTADO.reiniciar(linea)
+    tokens, errores = ANALIZADOR_RESALTADO.analizar()
+    tramos = []
+    for t in tokens:
+        etiqueta = ETIQUETA_POR_TIPO.get(t.tipo)
+        if etiqueta is None:
+            continue
+        inicio = t.col_inicio - 1
+        # El valor de una cadena no incluye la comilla inicial; en el resto el largo
+        # del valor es exacto (col_fin de los operadores apunta una columna más allá)
+        fin = t.col_fin if t.tipo == TipoToken.CADENA_LITERAL else inicio + len(t.valor)
+        tramos.append((etiqueta, inicio, fin))
+    for e in errores:
+        inicio = e.columna - 1
+        desconocidos = PATRON_DESCONOCIDOS.match(linea, inicio)
+        tramos.append(("error", inicio, desconocidos.end() if desconocidos else inicio + 1))
+    return tuple(tramos)
+
+def tramos_consecutivos(numeros):
+    # [(primero, último)] de cada racha de números consecutivos (ordenados)
+    rachas = []
+    for numero in numeros:
+        if rachas and rachas[-1][1] == numero - 1:
+            rachas[-1][1] = numero
+        else:
+            rachas.append([numero, numero])
+    return rachas
+
+class ResaltadorVisible:
+    # Coloreado de sintaxis solo de las líneas visibles del editor (más un margen).
+    # Cada desplazamiento o edición programa un único repintado con after; al
+    # repintar solo se re-etiquetan las líneas cuyo texto cambió desde la última vez.
+    def __init__(self, texto, barra):
+        self.texto = texto
+        self.barra = barra
+        self.pendiente = None      # Id del after programado
+        self.etiquetadas = {}      # Número de línea -> texto con el que se etiquetó
+        self.total_lineas = 1
+
+        for etiqueta, estilo in ESTILOS_RESALTADO.items():
+            texto.tag_configure(etiqueta, **estilo)
+        texto.tag_raise("error")
+        # El editor avisa cualquier cambio de la vista a la barra: se intercepta ese aviso
+        texto.config(yscrollcommand=self.al_desplazar)
+        texto.bind("<<Modified>>", self.al_modificar)
+        # Toda inserción o borrado (teclado, pegar, deshacer o código) pasa por el
+        # comando Tcl del widget: se intercepta para saber qué líneas perdieron sus
+        # etiquetas, aunque su texto termine siendo el mismo
+        self.comando_original = texto._w + "_sin_resaltado"
+        texto.tk.call("rename", texto._w, self.comando_original)
+        texto.tk.createcommand(texto._w, self.comando)
+
+    def comando(self, *args):
+        if len(args) > 1 and args[0] in ("insert", "delete", "replace"):
+            llamar = self.texto.tk.call
+            try:
+                desde = int(str(llamar(self.comando_original, "index", args[1])).split(".")[0])
+                hasta = desde
+                if args[0] != "insert" and len(args) > 2:
+                    hasta = int(str(llamar(self.comando_original, "index", args[2])).split(".")[0])
+            except tk.TclError:
+                pass  # Índice inválido: el comando original reporta el error
+            else:
+                # El texto insertado ocupa más líneas desde su inicio
+                insertado = args[2::2] if args[0] == "insert" else args[3::2]
+                self.invalidar(desde, hasta + sum(str(parte).count("\n") for parte in insertado))
+        return self.texto.tk.call((self.comando_original,) + args)
+
+    def invalidar(self, desde, hasta):
+        # Olvida las líneas desde..hasta para que el próximo repintado las re-etiquete
+        if hasta - desde >= len(self.etiquetadas):
+            self.etiquetadas = {numero: linea for numero, linea in self.etiquetadas.items()
+                                if not desde <= numero <= hasta}
+        else:
+            for numero in range(desde, hasta + 1):
+                self.etiquetadas.pop(numero, None)
+
+    def reiniciar(self):
+        # Se reemplazó todo el contenido del editor (cargar un archivo o una página)
+        self.etiquetadas.clear()
+        self.total_lineas = int(self.texto.index("end-1c").split(".")[0])
+        self.programar()
+
+    def al_desplazar(self, primera, ultima):
+        self.barra.set(primera, ultima)
+        self.programar()
+
+    def al_modificar(self, evento=None):
+        # <<Modified>> solo vuelve a dispararse después de limpiar la marca
+        if not self.texto.edit_modified():
             return
-
-        lexema = self.fuente[pos_inicio_contenido:self.posicion]
-        self.posicion += 1; self.columna += 1 # Comilla cierre
-        self.tokens.append(Token(TipoToken.CADENA_LITERAL, lexema + '"', self.linea, col_inicio, self.columna - 1))
-
-    def escanear_operador(self, caracter):
-        col_inicio = self.columna
-        siguiente_char = self.fuente[self.posicion + 1] if self.posicion + 1 < self.longitud else ''
-        
-        # Mapeo de operadores dobles
-        dobles = {
-            '>=': TipoToken.MAYOR_IGUAL, '<=': TipoToken.MENOR_IGUAL, 
-            '==': TipoToken.IGUAL_QUE, '!=': TipoToken.DIFERENTE_QUE
-        }
-        # Mapeo de operadores simples
-        simples = {
-            '+': TipoToken.SUMA, '-': TipoToken.RESTA, '*': TipoToken.MULTIPLICACION, '/': TipoToken.DIVISION,
-            '%': TipoToken.MODULO, '(': TipoToken.PARENTESIS_IZQ, ')': TipoToken.PARENTESIS_DER, 
-            '{': TipoToken.LLAVE_IZQ, '}': TipoToken.LLAVE_DER, ';': TipoToken.PUNTO_Y_COMA, 
-            ',': TipoToken.COMA, ':': TipoToken.DOS_PUNTOS,
-            '>': TipoToken.MAYOR_QUE, '<': TipoToken.MENOR_QUE, '=': TipoToken.ASIGNACION
-        }
-
-        # Intentar coincidencia doble primero (ej: ==)
-        combinacion = caracter + siguiente_char
-        if combinacion in dobles:
-            self.tokens.append(Token(dobles[combinacion], combinacion, self.linea, col_inicio, col_inicio + 2))
-            self.posicion += 2
-            self.columna += 2
-            return True
-        
-        # Intentar coincidencia simple (ej: =)
-        if caracter in simples:
-            self.tokens.append(Token(simples[caracter], caracter, self.linea, col_inicio, col_inicio + 1))
-            self.posicion += 1
-            self.columna += 1
-            return True
-            
-        return False
-
-# ==========================================
-# 3. INTERFAZ GRÁFICA 
-# ==========================================
+        self.texto.edit_modified(False)
+        total = int(self.texto.index("end-1c").split(".")[0])
+        if total != self.total_lineas:
+            # Se agregaron o quitaron líneas: las etiquetas se movieron con su texto,
+            # pero los números guardados ya no corresponden. Con la misma cantidad de
+            # líneas, comando ya olvidó las que se tocaron.
+            self.etiquetadas.clear()
+            self.total_lineas = total
+        self.programar()
+
+    def programar(self):
+        if self.pendiente is not None:
+            self.texto.after_cancel(self.pendiente)
+        self.pendiente = self.texto.after(RETARDO_RESALTADO_MS, self.resaltar)
+
+    def resaltar(self):
+        self.pendiente = None
+        primera = int(self.texto.index("@0,0").split(".")[0])
+        ultima = int(self.texto.index(f"@0,{self.texto.winfo_height()}").split(".")[0])
+        desde = max(1, primera - MARGEN_RESALTADO)
+        lineas = self.texto.get(f"{desde}.0", f"{ultima + MARGEN_RESALTADO}.end").split("\n")
+
+        cambiadas = []
+        rangos = {etiqueta: [] for etiqueta in ESTILOS_RESALTADO}
+        for numero, linea in enumerate(lineas, desde):
+            if self.etiquetadas.get(numero) == linea:
+                continue
+            self.etiquetadas[numero] = linea
+            cambiadas.append(numero)
+            for etiqueta, inicio, fin in tramos_linea(linea):
+                rangos[etiqueta] += (f"{numero}.{inicio}", f"{numero}.{fin}")
+
+        for primera_cambiada, ultima_cambiada in tramos_consecutivos(cambiadas):
+            for etiqueta in ESTILOS_RESALTADO:
+                self.texto.tag_remove(etiqueta, f"{primera_cambiada}.0", f"{ultima_cambiada}.end")
+        # Una sola llamada a Tk por etiqueta con todos sus rangos
+        for etiqueta, indices in rangos.items():
+            if indices:
+                self.texto.tag_add(etiqueta, *indices)
 
 class InterfazMiniLang:
     def __init__(self, raiz):
@@ -372,6 +455,24 @@ class InterfazMiniLang:
         self.raiz.title("Compilador MiniLang 2026 - Analizador Léxico")
         self.raiz.geometry("1000x700")
         self.archivo_actual = None
+        # Conserva el análisis anterior para re-escanear solo las líneas editadas
+        self.analizador = AnalizadorIncremental()
+        self.tokens = []   # Lista de tokens, o LectorBinario con los resultados de un archivo grande
+        self.indice = IndiceIdentificadores()  # Usos de cada identificador en self.tokens (None en modo grande)
+        self.ocurrencias = Referencias("")  # Referencias de la última búsqueda
+        self.paginas_ocurrencias = array('I')  # Página de la vista previa de cada ocurrencia (modo grande)
+        self.ocurrencia = 0
+        self.vista_previa = None  # VistaPreviaPaginada en modo archivo grande
+        self.pagina = 0
+
+        # Estado del análisis en segundo plano
+        self.hilo_analisis = None
+        self.cola_resultados = queue.Queue()
+        self.cancelacion = threading.Event()
+        self.progreso = 0.0  # Lo escribe el hilo de trabajo, lo lee el sondeo
+        # Búsquedas en el .outb de un archivo grande, también en segundo plano
+        self.cola_busqueda = queue.Queue()
+        self.busqueda = None  # (lector, nombre) de la búsqueda en curso
         
         # Configuración de estilos
         estilo = ttk.Style()
@@ -379,6 +480,11 @@ class InterfazMiniLang:
         estilo.configure("Treeview", font=('Consolas', 10), rowheight=25)
         estilo.configure("Treeview.Heading", font=('Segoe UI', 10, 'bold'))
 
+        # --- Barra de Estado (tiempos de carga y análisis, memoria del proceso) ---
+        self.var_estado = tk.StringVar(value="Listo")
+        tk.Label(raiz, textvariable=self.var_estado, anchor=tk.W, relief=tk.SUNKEN, bd=1,
+                 font=('Segoe UI', 9), bg="#e0e0e0").pack(side=tk.BOTTOM, fill=tk.X)
+
         # --- Frame Principal ---
         frame_principal = tk.Frame(raiz, bg="#f0f0f0")
         frame_principal.pack(fill=tk.BOTH, expand=True)
@@ -395,37 +501,79 @@ class InterfazMiniLang:
                                       bg="#dddddd", relief=tk.GROOVE, padx=10)
         self.btn_analizar.pack(side=tk.LEFT, padx=10)
 
+        self.btn_cancelar = tk.Button(frame_botones, text="Cancelar", command=self.cancelar_analisis,
+                                      bg="#dddddd", relief=tk.GROOVE, padx=10, state=tk.DISABLED)
+        self.btn_cancelar.pack(side=tk.LEFT, padx=10)
+
+        self.barra_progreso = ttk.Progressbar(frame_botones, orient=tk.HORIZONTAL, length=200, maximum=100)
+        self.barra_progreso.pack(side=tk.LEFT, padx=10)
+
+        self.var_estadisticas = tk.BooleanVar(value=False)
+        self.chk_estadisticas = tk.Checkbutton(frame_botones, text="Estadísticas", variable=self.var_estadisticas,
+                                               command=self.alternar_estadisticas, bg="#e0e0e0")
+        self.chk_estadisticas.pack(side=tk.LEFT, padx=10)
+
         # --- Paneles Divididos ---
         paneles = tk.PanedWindow(frame_principal, orient=tk.HORIZONTAL, bg="#f0f0f0", sashwidth=5)
         paneles.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         # 1. Panel Izquierdo: Editor
         frame_izq = tk.LabelFrame(paneles, text="Entrada (Código Fuente)", font=('Segoe UI', 10, 'bold'), bg="#f0f0f0")
+
+        # Navegación de la vista previa (solo en modo archivo grande)
+        self.frame_paginas = tk.Frame(frame_izq, bg="#f0f0f0")
+        tk.Button(self.frame_paginas, text="◀ Anterior", relief=tk.GROOVE,
+                  command=lambda: self.mostrar_pagina(self.vista_previa.pagina_vecina(self.pagina, -1))
+                  ).pack(side=tk.LEFT, padx=2)
+        tk.Button(self.frame_paginas, text="Siguiente ▶", relief=tk.GROOVE,
+                  command=lambda: self.mostrar_pagina(self.vista_previa.pagina_vecina(self.pagina, 1))
+                  ).pack(side=tk.LEFT, padx=2)
+        self.lbl_pagina = tk.Label(self.frame_paginas, bg="#f0f0f0")
+        self.lbl_pagina.pack(side=tk.LEFT, padx=5)
+
         self.txt_entrada = scrolledtext.ScrolledText(frame_izq, font=('Consolas', 11), undo=True, width=40)
         self.txt_entrada.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.resaltador = ResaltadorVisible(self.txt_entrada, self.txt_entrada.vbar)
+        self.txt_entrada.tag_configure("ocurrencia", background="#fff176")
         paneles.add(frame_izq)
 
         # 2. Panel Derecho: Tabla de Tokens
         frame_der = tk.LabelFrame(paneles, text="Salida (Lista de Tokens)", font=('Segoe UI', 10, 'bold'), bg="#f0f0f0")
-        
-        columnas = ("linea", "col", "tipo", "valor")
-        self.tabla = ttk.Treeview(frame_der, columns=columnas, show="headings", selectmode="browse")
-        
-        self.tabla.heading("linea", text="Lín")
-        self.tabla.heading("col", text="Col")
-        self.tabla.heading("tipo", text="Tipo")
-        self.tabla.heading("valor", text="Valor")
-        
-        self.tabla.column("linea", width=40, anchor=tk.CENTER)
-        self.tabla.column("col", width=60, anchor=tk.CENTER)
-        self.tabla.column("tipo", width=120)
-        self.tabla.column("valor", width=150)
-        
-        scroll_y = ttk.Scrollbar(frame_der, orient=tk.VERTICAL, command=self.tabla.yview)
-        self.tabla.configure(yscroll=scroll_y.set)
-        
-        self.tabla.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Filtros (por tipo y rango de líneas)
+        frame_filtro = tk.Frame(frame_der, bg="#f0f0f0")
+        frame_filtro.pack(fill=tk.X, padx=5, pady=(5, 0))
+        tk.Label(frame_filtro, text="Tipo:", bg="#f0f0f0").pack(side=tk.LEFT)
+        self.cmb_tipo = ttk.Combobox(frame_filtro, values=["Todos"] + TIPOS_TOKEN, state="readonly", width=16)
+        self.cmb_tipo.set("Todos")
+        self.cmb_tipo.pack(side=tk.LEFT, padx=(2, 8))
+        tk.Label(frame_filtro, text="Líneas:", bg="#f0f0f0").pack(side=tk.LEFT)
+        self.ent_linea_desde = tk.Entry(frame_filtro, width=7)
+        self.ent_linea_desde.pack(side=tk.LEFT, padx=2)
+        tk.Label(frame_filtro, text="a", bg="#f0f0f0").pack(side=tk.LEFT)
+        self.ent_linea_hasta = tk.Entry(frame_filtro, width=7)
+        self.ent_linea_hasta.pack(side=tk.LEFT, padx=2)
+        tk.Button(frame_filtro, text="Filtrar", command=self.aplicar_filtro, relief=tk.GROOVE).pack(side=tk.LEFT, padx=5)
+
+        # Búsqueda de usos de un identificador (con el índice del último análisis)
+        frame_busqueda = tk.Frame(frame_der, bg="#f0f0f0")
+        frame_busqueda.pack(fill=tk.X, padx=5, pady=(5, 0))
+        tk.Label(frame_busqueda, text="Identificador:", bg="#f0f0f0").pack(side=tk.LEFT)
+        self.ent_buscar = tk.Entry(frame_busqueda, width=18)
+        self.ent_buscar.pack(side=tk.LEFT, padx=2)
+        self.ent_buscar.bind("<Return>", self.buscar_identificador)
+        tk.Button(frame_busqueda, text="Buscar", command=self.buscar_identificador, relief=tk.GROOVE
+                  ).pack(side=tk.LEFT, padx=5)
+        tk.Button(frame_busqueda, text="◀", relief=tk.GROOVE,
+                  command=lambda: self.ir_a_ocurrencia(self.ocurrencia - 1)).pack(side=tk.LEFT)
+        tk.Button(frame_busqueda, text="▶", relief=tk.GROOVE,
+                  command=lambda: self.ir_a_ocurrencia(self.ocurrencia + 1)).pack(side=tk.LEFT, padx=2)
+        self.lbl_ocurrencias = tk.Label(frame_busqueda, bg="#f0f0f0")
+        self.lbl_ocurrencias.pack(side=tk.LEFT, padx=5)
+
+        frame_tabla = tk.Frame(frame_der)
+        frame_tabla.pack(fill=tk.BOTH, expand=True)
+        self.tabla = TablaTokensVirtual(frame_tabla)
         
         paneles.add(frame_der)
 
@@ -436,68 +584,401 @@ class InterfazMiniLang:
         self.txt_errores = tk.Text(frame_errores, height=6, font=('Consolas', 10), bg="#fff5f5")
         self.txt_errores.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
+        # --- Panel de Estadísticas (oculto hasta activarlo) ---
+        self.frame_estadisticas = tk.LabelFrame(frame_principal, text="Estadísticas del Análisis",
+                                                font=('Segoe UI', 10, 'bold'), bg="#f0f0f0")
+        self.txt_estadisticas = tk.Text(self.frame_estadisticas, height=9, font=('Consolas', 9), bg="#f5f8ff",
+                                        state=tk.DISABLED)
+        self.txt_estadisticas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
     def cargar_archivo(self):
         ruta = filedialog.askopenfilename(filetypes=[("Archivos MiniLang", "*.mlng *.ming *.txt"), ("Todos", "*.*")])
         if ruta:
+            try:
+                if not archivo_parece_texto(ruta):
+                    messagebox.showerror("Error", "El archivo no parece ser texto (binario o con otra codificación).")
+                    return
+                tamano = os.path.getsize(ruta)
+            except OSError as e:
+                messagebox.showerror("Error", f"No se pudo leer el archivo: {e}")
+                return
+            inicio = time.perf_counter()
             self.archivo_actual = ruta
+            self.analizador = AnalizadorIncremental(instrumentar=self.var_estadisticas.get())
+            self.liberar_resultados()
+            if tamano >= TAM_ARCHIVO_GRANDE:
+                self.cargar_archivo_grande(ruta, tamano, inicio)
+                return
+            self.salir_de_modo_grande()
             try:
                 with open(ruta, 'r', encoding='utf-8') as f:
                     contenido = f.read()
                     self.txt_entrada.delete(1.0, tk.END)
                     self.txt_entrada.insert(tk.END, contenido)
+                    self.resaltador.reiniciar()
                 self.raiz.title(f"Compilador MiniLang - {os.path.basename(ruta)}")
+                self.var_estado.set(f"{os.path.basename(ruta)}: {tamano / 1e6:.2f} MB | "
+                                    f"carga {time.perf_counter() - inicio:.2f} s | {texto_memoria()}")
             except Exception as e:
                 messagebox.showerror("Error", f"No se pudo leer el archivo: {e}")
 
+    def cargar_archivo_grande(self, ruta, tamano, inicio):
+        # El archivo no entra al editor: se muestra por páginas y se analiza desde el disco
+        self.vista_previa = VistaPreviaPaginada(ruta)
+        self.frame_paginas.pack(fill=tk.X, padx=5, pady=(5, 0), before=self.txt_entrada.frame)
+        self.mostrar_pagina(0)
+        self.raiz.title(f"Compilador MiniLang - {os.path.basename(ruta)} (archivo grande)")
+        self.var_estado.set(f"{os.path.basename(ruta)}: {tamano / 1e6:.1f} MB, modo archivo grande "
+                            f"(vista previa de solo lectura) | carga {time.perf_counter() - inicio:.2f} s | "
+                            f"{texto_memoria()}")
+
+    def salir_de_modo_grande(self):
+        if self.vista_previa is None:
+            return
+        self.vista_previa = None
+        self.frame_paginas.pack_forget()
+        self.txt_entrada.config(state=tk.NORMAL)
+
+    def mostrar_pagina(self, pagina):
+        vista = self.vista_previa
+        if vista is None or not 0 <= pagina < vista.cantidad_paginas:
+            return
+        self.pagina = pagina
+        texto = vista.leer_pagina(pagina)
+        self.txt_entrada.config(state=tk.NORMAL)
+        self.txt_entrada.delete(1.0, tk.END)
+        self.txt_entrada.insert(tk.END, texto)
+        self.resaltador.reiniciar()
+        self.txt_entrada.edit_reset()
+        self.txt_entrada.config(state=tk.DISABLED)
+        primera = vista.linea_inicial(pagina)
+        ultima = primera + texto.count("\n")
+        self.lbl_pagina.config(text=f"Página {pagina + 1} de {vista.cantidad_paginas} (líneas {primera}-{ultima})")
+
+    def liberar_resultados(self):
+        # Los resultados de un archivo grande viven en un .outb temporal mapeado en memoria
+        if isinstance(self.tokens, LectorBinario):
+            self.tabla.limpiar()
+            lector = self.tokens
+            self.tokens = []
+            self.olvidar_indice()
+            lector.cerrar()
+            try:
+                os.remove(lector.ruta)
+            except OSError:
+                pass
+
+    def olvidar_indice(self):
+        # Las posiciones del índice y de la última búsqueda son de self.tokens
+        self.indice = IndiceIdentificadores()
+        self.ocurrencias = Referencias("")
+        self.paginas_ocurrencias = array('I')
+        self.busqueda = None
+        self.ir_a_ocurrencia(None)
+
+    def cerrar(self):
+        self.cancelacion.set()
+        self.liberar_resultados()
+        self.raiz.destroy()
+
     def ejecutar_analisis(self):
+        if self.hilo_analisis is not None:
+            return
+
+        if self.vista_previa is not None:
+            # Archivo grande: se analiza desde el disco, nunca desde el editor
+            instrumentar = self.var_estadisticas.get()
+            objetivo, argumentos = self.analizar_archivo_grande, (self.archivo_actual, instrumentar)
+        else:
+            # El texto se lee aquí: los widgets solo se tocan desde el hilo principal
+            codigo = self.txt_entrada.get(1.0, tk.END)
+            if not parece_texto(codigo):
+                messagebox.showerror("Error", "El contenido no parece ser texto: se omitió el análisis.")
+                return
+            objetivo, argumentos = self.analizar_en_segundo_plano, (codigo,)
+
         # Limpiar resultados previos
-        for item in self.tabla.get_children():
-            self.tabla.delete(item)
+        self.liberar_resultados()
+        self.tabla.limpiar()
+        self.tokens = []
+        self.olvidar_indice()
         self.txt_errores.config(state=tk.NORMAL)
         self.txt_errores.delete(1.0, tk.END)
+        self.txt_errores.insert(tk.END, "Analizando...")
+        self.txt_errores.config(state=tk.DISABLED)
 
-        codigo = self.txt_entrada.get(1.0, tk.END)
-        
-        # Instanciar y ejecutar
-        escanner = AnalizadorLexico(codigo)
-        tokens, errores = escanner.analizar()
-
-        # Mostrar Tokens
-        contenido_salida = []
-        for t in tokens:
-            valores_fila = (t.linea, f"{t.col_inicio}-{t.col_fin}", t.tipo, t.valor)
-            self.tabla.insert("", tk.END, values=valores_fila)
-            contenido_salida.append(str(t))
-
-        # Mostrar Errores
+        self.cancelacion = threading.Event()
+        self.progreso = 0.0
+        self.barra_progreso['value'] = 0
+        self.btn_analizar.config(state=tk.DISABLED)
+        self.btn_cargar.config(state=tk.DISABLED)
+        self.btn_cancelar.config(state=tk.NORMAL)
+
+        self.hilo_analisis = threading.Thread(target=objetivo, args=argumentos, daemon=True)
+        self.hilo_analisis.start()
+        self.raiz.after(INTERVALO_SONDEO_MS, self.revisar_analisis)
+
+    def alternar_estadisticas(self):
+        # La instrumentación solo se activa con el panel visible (sin costo si está apagada)
+        activas = self.var_estadisticas.get()
+        self.analizador.instrumentar = activas
+        if activas:
+            self.frame_estadisticas.pack(fill=tk.X, padx=10, pady=(0, 10))
+        else:
+            self.frame_estadisticas.pack_forget()
+
+    def mostrar_estadisticas(self, estadisticas=None):
+        # Sin argumento se muestran las del analizador incremental
+        incremental = estadisticas is None
+        if incremental and self.var_estadisticas.get():
+            estadisticas = self.analizador.estadisticas
+        self.txt_estadisticas.config(state=tk.NORMAL)
+        self.txt_estadisticas.delete(1.0, tk.END)
+        if estadisticas is not None:
+            texto = str(estadisticas)
+            if incremental and self.analizador.lineas_reanalizadas:
+                texto += f"\nLíneas re-escaneadas: {self.analizador.lineas_reanalizadas}"
+            self.txt_estadisticas.insert(tk.END, texto)
+        self.txt_estadisticas.config(state=tk.DISABLED)
+
+    def cancelar_analisis(self):
+        # Cancelación cooperativa: el analizador la revisa cada LINEAS_POR_AVISO líneas
+        self.cancelacion.set()
+        self.btn_cancelar.config(state=tk.DISABLED)
+
+    def actualizar_progreso(self, fraccion):
+        self.progreso = fraccion
+
+    def analizar_en_segundo_plano(self, codigo):
+        # Corre en el hilo de trabajo: no toca widgets, solo publica en la cola
+        inicio = time.perf_counter()
+        try:
+            # Ejecutar (incremental: solo se re-escanean las líneas modificadas)
+            tokens, errores = self.analizador.analizar(codigo, self.actualizar_progreso, self.cancelacion)
+        except AnalisisCancelado:
+            self.cola_resultados.put(("cancelado",))
+            return
+        except Exception as e:
+            self.cola_resultados.put(("error", e))
+            return
+
+        # El analizador incremental actualiza su índice solo en el rango re-escaneado
+        indice = self.analizador.indice
+
+        # Generar archivo .out
+        try:
+            nombre_salida = self.guardar_salida(tokens)
+            error_guardado = None
+        except Exception as e:
+            nombre_salida, error_guardado = None, e
+        self.cola_resultados.put(("listo", tokens, errores, len(errores), nombre_salida, error_guardado, None,
+                                  time.perf_counter() - inicio, indice))
+
+    def analizar_archivo_grande(self, ruta, instrumentar):
+        # Corre en el hilo de trabajo. Los tokens van a un .outb temporal en vez de a
+        # una lista: la tabla los lee de ahí con mmap y en memoria solo queda lo visible.
+        # Tampoco se arma el índice de identificadores: cada búsqueda lee el .outb.
+        inicio = time.perf_counter()
+        estadisticas = EstadisticasLexicas(MOTOR_COMPILADO) if instrumentar else None
+        descriptor, ruta_resultados = tempfile.mkstemp(prefix="minilang_", suffix=EXTENSION_BINARIA)
+        os.close(descriptor)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                lectura = LecturaConProgreso(f, os.path.getsize(ruta), self.actualizar_progreso, self.cancelacion)
+                escribir_binario(iter_tokens(lectura, MOTOR_COMPILADO, estadisticas=estadisticas), ruta_resultados)
+            lector = LectorBinario(ruta_resultados)
+        except Exception as e:
+            try:
+                os.remove(ruta_resultados)
+            except OSError:
+                pass
+            self.cola_resultados.put(("cancelado",) if isinstance(e, AnalisisCancelado) else ("error", e))
+            return
+
+        # Solo se decodifican los errores que la consola va a mostrar
+        errores = lector.errores(MAX_ERRORES_CONSOLA)
+        try:
+            nombre_salida = self.guardar_salida(lector)
+            error_guardado = None
+        except Exception as e:
+            nombre_salida, error_guardado = None, e
+        self.cola_resultados.put(("listo", lector, errores, lector.cantidad_errores, nombre_salida, error_guardado,
+                                  estadisticas, time.perf_counter() - inicio, None))
+
+    def revisar_analisis(self):
+        try:
+            mensaje = self.cola_resultados.get_nowait()
+        except queue.Empty:
+            self.barra_progreso['value'] = self.progreso * 100
+            self.raiz.after(INTERVALO_SONDEO_MS, self.revisar_analisis)
+            return
+
+        self.hilo_analisis = None
+        self.btn_analizar.config(state=tk.NORMAL)
+        self.btn_cargar.config(state=tk.NORMAL)
+        self.btn_cancelar.config(state=tk.DISABLED)
+        self.barra_progreso['value'] = 0
+
+        self.txt_errores.config(state=tk.NORMAL)
+        self.txt_errores.delete(1.0, tk.END)
+        if mensaje[0] == "cancelado":
+            self.txt_errores.insert(tk.END, "Análisis cancelado.")
+            self.txt_errores.config(state=tk.DISABLED)
+            return
+        if mensaje[0] == "error":
+            self.txt_errores.config(state=tk.DISABLED)
+            messagebox.showerror("Error", f"No se pudo completar el análisis: {mensaje[1]}")
+            return
+
+        _, tokens, errores, total_errores, nombre_salida, error_guardado, estadisticas, duracion, indice = mensaje
+
+        # Mostrar Tokens (solo se dibuja la ventana visible)
+        self.tokens = tokens
+        self.indice = indice
+        self.aplicar_filtro()
+        identificadores = "" if indice is None else f"{len(indice)} identificadores "
+        self.var_estado.set(f"Análisis: {len(tokens)} tokens, {total_errores} errores, "
+                            f"{identificadores}en {duracion:.2f} s | {texto_memoria()}")
+
+        # Mostrar Errores (una sola inserción en el widget, con tope)
         if errores:
-            self.txt_errores.insert(tk.END, f"Se encontraron {len(errores)} errores:\n")
-            for err in errores:
-                self.txt_errores.insert(tk.END, str(err) + "\n")
+            lineas = [f"Se encontraron {total_errores} errores:"]
+            lineas.extend(str(err) for err in errores[:MAX_ERRORES_CONSOLA])
+            if total_errores > MAX_ERRORES_CONSOLA:
+                lineas.append(f"... y {total_errores - MAX_ERRORES_CONSOLA} errores más (ver el archivo completo con cli.py -v)")
+            self.txt_errores.insert(tk.END, "\n".join(lineas) + "\n")
         else:
             self.txt_errores.insert(tk.END, "Análisis completado sin errores léxicos.")
         
         self.txt_errores.config(state=tk.DISABLED)
+        self.mostrar_estadisticas(estadisticas)
 
-        # Generar archivo .out
-        self.guardar_salida(contenido_salida)
+        if error_guardado is None:
+            messagebox.showinfo("Proceso Terminado", f"Archivo generado exitosamente:\n{nombre_salida}")
+        else:
+            messagebox.showerror("Error de Guardado", f"No se pudo crear el archivo .out: {error_guardado}")
+
+    def aplicar_filtro(self):
+        tipo = self.cmb_tipo.get()
+        try:
+            desde = int(self.ent_linea_desde.get()) if self.ent_linea_desde.get().strip() else None
+            hasta = int(self.ent_linea_hasta.get()) if self.ent_linea_hasta.get().strip() else None
+        except ValueError:
+            messagebox.showerror("Filtro", "El rango de líneas debe ser numérico")
+            return
+        self.tabla.mostrar(filtrar_tokens(self.tokens, None if tipo == "Todos" else tipo, desde, hasta))
+
+    def buscar_identificador(self, evento=None):
+        nombre = self.ent_buscar.get().strip()
+        if self.indice is not None:
+            self.ocurrencias = self.indice.buscar(nombre)
+        elif nombre:
+            # Archivo grande: el .outb se recorre en el hilo de trabajo
+            self.buscar_en_segundo_plano(nombre)
+            return
+        else:
+            self.ocurrencias = Referencias(nombre)
+        self.mostrar_ocurrencias(nombre)
+
+    def buscar_en_segundo_plano(self, nombre):
+        sondeando = self.busqueda is not None
+        self.busqueda = (self.tokens, nombre)
+        self.lbl_ocurrencias.config(text=f"Buscando '{nombre}'...")
+        threading.Thread(target=self.buscar_en_disco, args=(self.tokens, self.vista_previa, nombre),
+                         daemon=True).start()
+        if not sondeando:
+            self.raiz.after(INTERVALO_SONDEO_MS, self.revisar_busqueda)
+
+    def buscar_en_disco(self, lector, vista, nombre):
+        # Corre en el hilo de trabajo: además de los usos calcula la página de cada
+        # uno, que exige contar los saltos de línea del archivo hasta esa página
+        try:
+            ocurrencias = lector.buscar(nombre)
+            paginas = array('I')
+            pagina = linea_siguiente = 0  # Primera línea de la página que sigue a `pagina`
+            for linea in ocurrencias.usos[2::3]:  # Los usos vienen en orden de línea
+                if linea >= linea_siguiente:
+                    pagina = vista.pagina_de_linea(linea)
+                    linea_siguiente = (vista.linea_inicial(pagina + 1) if pagina + 1 < vista.cantidad_paginas
+                                       else sys.maxsize)
+                paginas.append(pagina)
+        except Exception as e:
+            self.cola_busqueda.put((lector, nombre, e, None))
+            return
+        self.cola_busqueda.put((lector, nombre, ocurrencias, paginas))
+
+    def revisar_busqueda(self):
+        while True:
+            try:
+                lector, nombre, ocurrencias, paginas = self.cola_busqueda.get_nowait()
+            except queue.Empty:
+                if self.busqueda is not None:
+                    self.raiz.after(INTERVALO_SONDEO_MS, self.revisar_busqueda)
+                return
+            # Se descartan las búsquedas reemplazadas por otra o de resultados ya liberados
+            if self.busqueda == (lector, nombre):
+                break
+        self.busqueda = None
+        if paginas is None:
+            self.lbl_ocurrencias.config(text="")
+            messagebox.showerror("Búsqueda", f"No se pudo buscar '{nombre}': {ocurrencias}")
+            return
+        self.ocurrencias = ocurrencias
+        self.paginas_ocurrencias = paginas
+        self.mostrar_ocurrencias(nombre)
+
+    def mostrar_ocurrencias(self, nombre):
+        if not self.ocurrencias:
+            self.ir_a_ocurrencia(None)
+            if nombre:
+                self.lbl_ocurrencias.config(text=f"'{nombre}': sin usos")
+            return
+        # Las posiciones del índice son de la lista completa: se quita el filtro
+        self.cmb_tipo.set("Todos")
+        self.ent_linea_desde.delete(0, tk.END)
+        self.ent_linea_hasta.delete(0, tk.END)
+        self.tabla.mostrar(self.tokens)
+        self.ir_a_ocurrencia(0)
+
+    def ir_a_ocurrencia(self, numero):
+        # Muestra el uso número `numero` (circular) en la tabla y en el editor; con
+        # None solo limpia la marca. Cada salto es un acceso directo por posición.
+        self.txt_entrada.tag_remove("ocurrencia", 1.0, tk.END)
+        total = len(self.ocurrencias)
+        if numero is None or not total:
+            self.lbl_ocurrencias.config(text="")
+            return
+        self.ocurrencia = numero % total
+        _, posicion, linea = self.ocurrencias[self.ocurrencia]
+        self.lbl_ocurrencias.config(text=f"{self.ocurrencia + 1} de {total} usos")
+        self.tabla.ir_a(posicion)
+
+        token = self.tokens[posicion]
+        if self.vista_previa is not None:
+            # Archivo grande: se pasa a la página que contiene la línea (calculada
+            # en el hilo de búsqueda, así que su línea inicial ya está contada)
+            pagina = self.paginas_ocurrencias[self.ocurrencia]
+            if pagina != self.pagina:
+                self.mostrar_pagina(pagina)
+            linea -= self.vista_previa.linea_inicial(pagina) - 1
+        inicio = f"{linea}.{token.col_inicio - 1}"
+        self.txt_entrada.tag_add("ocurrencia", inicio, f"{inicio}+{len(token.valor)}c")
+        self.txt_entrada.see(inicio)
 
     def guardar_salida(self, lineas_tokens):
+        # Se llama desde el hilo de trabajo: solo escribe; revisar_analisis muestra el aviso
         nombre_salida = "salida.out"
         if self.archivo_actual:
             nombre_base = os.path.splitext(self.archivo_actual)[0]
             nombre_salida = nombre_base + ".out"
         
-        try:
-            with open(nombre_salida, "w", encoding='utf-8') as f:
-                f.write("\n".join(lineas_tokens))
-            messagebox.showinfo("Proceso Terminado", f"Archivo generado exitosamente:\n{nombre_salida}")
-        except Exception as e:
-            messagebox.showerror("Error de Guardado", f"No se pudo crear el archivo .out: {e}")
+        escribir_salida(lineas_tokens, nombre_salida, omitir_si_igual=True)
+        return nombre_salida
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = InterfazMiniLang(root)
+    root.protocol("WM_DELETE_WINDOW", app.cerrar)
 
     root.mainloop()
 
@@ -0,0 +1,334 @@
+import argparse
+import datetime
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource  # No existe en Windows: ahí no se reporta el pico de RSS
+except ImportError:
+    resource = None
+
+from lexico import AnalizadorLexico, MOTOR_CLASICO, MOTOR_COMPILADO, analizar_varios, iter_tokens
+from sintactico import AnalizadorSintactico
+from lexico_paralelo import analizar_paralelo
+from generador_corpus import FORMAS, generar_texto
+from tamanos import parsear_tamano
+
+# ==========================================
+# 6. BENCHMARKS DEL ANALIZADOR
+# ==========================================
+
+def pico_rss_bytes():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB; macOS reporta bytes
+    return pico if sys.platform == "darwin" else pico * 1024
+
+FASE_LEXICA = "lexico"
+FASE_SINTACTICA = "sintactico"
+
+def analizar_lexico(fuente, ruta, motor):
+    tokens, errores = AnalizadorLexico(fuente, motor).analizar()
+    return len(tokens), len(errores)
+
+def analizar_sintactico(fuente, ruta, motor):
+    # Léxico por bloques desde disco + sintáctico sentencia por sentencia, sin
+    # armar el árbol completo (así se usa con archivos grandes)
+    with open(ruta, 'r', encoding='utf-8') as f:
+        analizador = AnalizadorSintactico(iter_tokens(f, motor))
+        for _ in analizador.sentencias():
+            pass
+    return analizador.tokens_leidos, len(analizador.errores) + analizador.errores_lexicos
+
+FASES = {FASE_LEXICA: analizar_lexico, FASE_SINTACTICA: analizar_sintactico}
+FASES_DESDE_DISCO = {FASE_SINTACTICA}  # Leen la fuente de un archivo en vez del texto en memoria
+
+def medir_caso(forma, tam_bytes, motor, repeticiones, semilla, fase=FASE_LEXICA):
+    # Corre en un proceso propio para que el pico de RSS corresponda solo a este caso
+    fuente = generar_texto(forma, tam_bytes, semilla)
+    bytes_fuente = len(fuente.encode('utf-8'))
+    analizar = FASES[fase]
+    ruta = None
+    if fase in FASES_DESDE_DISCO:
+        with tempfile.NamedTemporaryFile("w", encoding='utf-8', suffix=".mlng", delete=False) as temporal:
+            temporal.write(fuente)
+        ruta = temporal.name
+        del fuente  # Se lee del archivo temporal: que no cuente en la memoria medida
+        fuente = None
+
+    try:
+        tiempos = []
+        tokens = errores = 0
+        for _ in range(repeticiones):
+            gc.collect()
+            inicio = time.perf_counter()
+            tokens, errores = analizar(fuente, ruta, motor)
+            tiempos.append(time.perf_counter() - inicio)
+
+        # Memoria de Python asignada durante el análisis (corrida aparte: tracemalloc lo hace más lento)
+        gc.collect()
+        tracemalloc.start()
+        analizar(fuente, ruta, motor)
+        pico_tracemalloc = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        if ruta is not None:
+            os.remove(ruta)
+
+    mejor = min(tiempos)
+    return {
+        "forma": forma,
+        "tam_bytes": bytes_fuente,
+        "motor": motor,
+        "fase": fase,
+        "segundos": mejor,
+        "segundos_todos": tiempos,
+        "tokens": tokens,
+        "errores": errores,
+        "tokens_s": tokens / mejor if mejor else 0.0,
+        "mb_s": bytes_fuente / mejor / 1e6 if mejor else 0.0,
+        "pico_tracemalloc_bytes": pico_tracemalloc,
+        "pico_rss_bytes": pico_rss_bytes(),
+    }
+
+def medir_en_subproceso(*args):
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(medir_caso, args)
+
+def clave_caso(resultado):
+    # Los JSON anteriores a la medición del sintáctico no tienen "fase"
+    return (resultado["forma"], resultado["tam_bytes"], resultado["motor"], resultado.get("fase", FASE_LEXICA))
+
+def comparar(actuales, anteriores, tolerancia):
+    # Devuelve los casos cuyo throughput (MB/s) empeoró más que la tolerancia
+    base = {clave_caso(r): r for r in anteriores}
+    regresiones = []
+    for resultado in actuales:
+        previo = base.get(clave_caso(resultado))
+        if previo is None or not previo["mb_s"]:
+            continue
+        cambio = resultado["mb_s"] / previo["mb_s"] - 1.0
+        print(f"  {resultado['forma']:<16} {resultado['tam_bytes']:>12} {resultado['motor']:<10} "
+              f"{previo['mb_s']:8.2f} -> {resultado['mb_s']:8.2f} MB/s ({cambio:+.1%})")
+        if cambio < -tolerancia:
+            regresiones.append(resultado)
+    return regresiones
+
+def medir_escalamiento(forma, tam_bytes, motor, maximo, semilla):
+    # Tiempo de analizar_paralelo con 1..maximo procesos frente al análisis secuencial
+    # (incluye crear el pool y enviar los fragmentos, como en un uso real)
+    fuente = generar_texto(forma, tam_bytes, semilla)
+    gc.collect()
+    inicio = time.perf_counter()
+    AnalizadorLexico(fuente, motor).analizar()
+    secuencial = time.perf_counter() - inicio
+    filas = [{"trabajadores": 0, "segundos": secuencial, "aceleracion": 1.0}]
+    print(f"  secuencial     {secuencial:8.3f} s")
+    for trabajadores in range(1, maximo + 1):
+        gc.collect()
+        inicio = time.perf_counter()
+        analizar_paralelo(fuente, motor, trabajadores)
+        segundos = time.perf_counter() - inicio
+        filas.append({"trabajadores": trabajadores, "segundos": segundos, "aceleracion": secuencial / segundos})
+        print(f"  {trabajadores:>2} procesos    {segundos:8.3f} s  x{secuencial / segundos:.2f}")
+    return {"forma": forma, "tam_bytes": len(fuente.encode('utf-8')), "motor": motor, "filas": filas}
+
+TAMANOS_FRAGMENTO = (32, 64, 256, 1024)  # Bytes máximos por fuente en --fragmentos
+MAX_FRAGMENTOS_DISTINTOS = 200           # El resto del lote repite estas fuentes
+
+def tiene_codigo(linea):
+    # Algo más que espacios o un comentario
+    return linea.strip() != "" and not linea.lstrip().startswith('#')
+
+def fragmentos_de(forma, tam_bytes, cantidad, semilla):
+    # Fuentes cortas: las primeras líneas de textos generados con distintas
+    # semillas, sin pasar de tam_bytes. Cada fuente lleva al menos una línea con
+    # código: una vacía o de solo comentarios mediría solo el costo del ciclo.
+    # Si ninguna entra completa (ej. cadenas largas), se corta la primera.
+    distintas = []
+    for k in range(min(cantidad, MAX_FRAGMENTOS_DISTINTOS)):
+        lineas = generar_texto(forma, max(tam_bytes, 1024), semilla + k).split('\n')
+        fragmento, con_codigo = "", False
+        for linea in lineas:
+            if len(fragmento) + len(linea) + 1 > tam_bytes:
+                break
+            fragmento += linea + '\n'
+            con_codigo = con_codigo or tiene_codigo(linea)
+        if not con_codigo:
+            primera = next(linea for linea in lineas if tiene_codigo(linea))
+            fragmento = primera[:tam_bytes - 1] + '\n'
+        distintas.append(fragmento)
+    return [distintas[k % len(distintas)] for k in range(cantidad)]
+
+def medir_fragmentos(forma, tam_bytes, motor, cantidad, repeticiones, semilla):
+    # Costo por fuente corta: un AnalizadorLexico nuevo para cada una frente a
+    # analizar_varios, que reutiliza uno solo. En ambos casos se conservan todos
+    # los resultados, como haría quien los usa después.
+    fuentes = fragmentos_de(forma, tam_bytes, cantidad, semilla)
+    individual, lote = [], []
+    for _ in range(repeticiones):
+        resultados = None
+        gc.collect()
+        inicio = time.perf_counter()
+        resultados = [AnalizadorLexico(fuente, motor).analizar() for fuente in fuentes]
+        individual.append(time.perf_counter() - inicio)
+        resultados = None
+        gc.collect()
+        inicio = time.perf_counter()
+        resultados = analizar_varios(fuentes, motor)
+        lote.append(time.perf_counter() - inicio)
+    return {
+        "forma": forma,
+        "tam_maximo": tam_bytes,
+        "bytes_promedio": sum(len(f.encode('utf-8')) for f in fuentes) / cantidad,
+        "tokens_promedio": len(resultados.tokens) / cantidad,
+        "motor": motor,
+        "fragmentos": cantidad,
+        "us_individual": min(individual) / cantidad * 1e6,
+        "us_lote": min(lote) / cantidad * 1e6,
+        "aceleracion": min(individual) / min(lote),
+    }
+
+def medir_memoria(forma, tam_bytes, motor, semilla):
+    # Memoria que sigue ocupada por token al terminar el análisis: la lista de
+    # objetos Token de analizar() frente al TokenBuffer de analizar_compacto().
+    # El TokenBuffer conserva la fuente (de ahí recorta los valores), así que
+    # esa copia cuenta en su total; bytes_por_token() mide solo sus arreglos.
+    fuente = generar_texto(forma, tam_bytes, semilla)
+    fila = {"forma": forma, "tam_bytes": len(fuente.encode('utf-8')), "motor": motor}
+    for nombre, analizar in (("lista", AnalizadorLexico.analizar), ("buffer", AnalizadorLexico.analizar_compacto)):
+        gc.collect()
+        tracemalloc.start()
+        tokens, errores = analizar(AnalizadorLexico(fuente, motor))
+        retenido, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        fila["tokens"] = len(tokens)
+        fila[f"bytes_token_{nombre}"] = retenido / len(tokens) if tokens else 0.0
+        fila[f"pico_{nombre}_bytes"] = pico
+        if nombre == "buffer":
+            fila["bytes_token_arreglos"] = tokens.bytes_por_token()
+        tokens = errores = None
+    return fila
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el rendimiento de los analizadores sobre corpus sintéticos.")
+    parser.add_argument("--formas", default=",".join(FORMAS),
+                        help=f"Formas separadas por coma ({', '.join(FORMAS)})")
+    parser.add_argument("--tamanos", default="1KB,1MB", help="Tamaños separados por coma (1KB a 500MB)")
+    parser.add_argument("--motores", default=f"{MOTOR_CLASICO},{MOTOR_COMPILADO}")
+    parser.add_argument("--fase", choices=tuple(FASES), default=FASE_LEXICA,
+                        help="lexico: AnalizadorLexico.analizar; sintactico: léxico por bloques + AnalizadorSintactico")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--json", dest="ruta_json", help="Guardar los resultados en este archivo JSON")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.10,
+                        help="Caída máxima de MB/s aceptada al comparar (0.10 = 10%%)")
+    parser.add_argument("--escalamiento", type=int, metavar="N",
+                        help="En vez del benchmark normal, medir analizar_paralelo con 1..N procesos")
+    parser.add_argument("--fragmentos", type=int, metavar="N",
+                        help="En vez del benchmark normal, medir el costo por fuente de N fuentes cortas "
+                             f"(hasta {max(TAMANOS_FRAGMENTO)} bytes) una por una y con analizar_varios")
+    parser.add_argument("--memoria", action="store_true",
+                        help="En vez del benchmark normal, medir los bytes por token de analizar() (lista de Token) "
+                             "y de analizar_compacto() (TokenBuffer)")
+    args = parser.parse_args(argv)
+
+    formas = [f.strip() for f in args.formas.split(",") if f.strip()]
+    tamanos = [parsear_tamano(t) for t in args.tamanos.split(",") if t.strip()]
+    motores = [m.strip() for m in args.motores.split(",") if m.strip()]
+    for forma in formas:
+        if forma not in FORMAS:
+            parser.error(f"forma desconocida: {forma}")
+
+    if args.escalamiento:
+        curvas = []
+        for forma in formas:
+            for tam in tamanos:
+                for motor in motores:
+                    print(f"{forma} {tam} bytes, motor {motor}:")
+                    curvas.append(medir_escalamiento(forma, tam, motor, args.escalamiento, args.semilla))
+        if args.ruta_json:
+            with open(args.ruta_json, "w", encoding='utf-8') as f:
+                json.dump({"fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+                           "cpus": os.cpu_count(), "escalamiento": curvas}, f, indent=2)
+        return 0
+
+    if args.fragmentos:
+        filas = []
+        print(f"{'forma':<16} {'bytes':>6} {'tokens':>7} {'motor':<10} {'us/fuente':>10} {'us/fuente lote':>15} {'x':>6}")
+        for forma in formas:
+            for tam in TAMANOS_FRAGMENTO:
+                for motor in motores:
+                    r = medir_fragmentos(forma, tam, motor, args.fragmentos, args.repeticiones, args.semilla)
+                    filas.append(r)
+                    print(f"{forma:<16} {r['bytes_promedio']:6.0f} {r['tokens_promedio']:7.1f} {motor:<10} "
+                          f"{r['us_individual']:10.1f} {r['us_lote']:15.1f} {r['aceleracion']:6.2f}")
+        if args.ruta_json:
+            with open(args.ruta_json, "w", encoding='utf-8') as f:
+                json.dump({"fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+                           "python": platform.python_version(), "fragmentos": filas}, f, indent=2)
+        return 0
+
+    if args.memoria:
+        filas = []
+        print(f"{'forma':<16} {'bytes':>12} {'motor':<10} {'tokens':>10} {'B/token lista':>14} "
+              f"{'B/token buffer':>15} {'B/token arreglos':>17}")
+        for forma in formas:
+            for tam in tamanos:
+                for motor in motores:
+                    r = medir_memoria(forma, tam, motor, args.semilla)
+                    filas.append(r)
+                    print(f"{forma:<16} {r['tam_bytes']:>12} {motor:<10} {r['tokens']:>10} "
+                          f"{r['bytes_token_lista']:14.1f} {r['bytes_token_buffer']:15.1f} "
+                          f"{r['bytes_token_arreglos']:17.1f}")
+        if args.ruta_json:
+            with open(args.ruta_json, "w", encoding='utf-8') as f:
+                json.dump({"fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+                           "python": platform.python_version(), "memoria": filas}, f, indent=2)
+        return 0
+
+    resultados = []
+    print(f"{'forma':<16} {'bytes':>12} {'motor':<10} {'seg':>8} {'tokens/s':>12} {'MB/s':>8} {'tracemalloc':>12} {'RSS':>12}")
+    for forma in formas:
+        for tam in tamanos:
+            for motor in motores:
+                r = medir_en_subproceso(forma, tam, motor, args.repeticiones, args.semilla, args.fase)
+                resultados.append(r)
+                rss = f"{r['pico_rss_bytes'] / 1e6:.1f} MB" if r["pico_rss_bytes"] is not None else "-"
+                print(f"{forma:<16} {r['tam_bytes']:>12} {motor:<10} {r['segundos']:8.3f} {r['tokens_s']:12.0f} "
+                      f"{r['mb_s']:8.2f} {r['pico_tracemalloc_bytes'] / 1e6:9.1f} MB {rss:>12}")
+
+    documento = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "semilla": args.semilla,
+        "fase": args.fase,
+        "repeticiones": args.repeticiones,
+        "resultados": resultados,
+    }
+    if args.ruta_json:
+        with open(args.ruta_json, "w", encoding='utf-8') as f:
+            json.dump(documento, f, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anteriores = json.load(f)["resultados"]
+        print(f"\nComparación con {args.comparar}:")
+        regresiones = comparar(resultados, anteriores, args.tolerancia)
+        if regresiones:
+            print(f"{len(regresiones)} casos con regresión mayor a {args.tolerancia:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
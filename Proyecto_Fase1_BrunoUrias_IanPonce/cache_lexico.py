@@ -0,0 +1,159 @@
+import gc
+import hashlib
+import json
+import os
+
+from lexico import AnalizadorLexico, ErrorLexico, Token, MOTOR_COMPILADO, VERSION_LEXICO
+
+# ==========================================
+# 2.4 CACHE DE TOKENS EN DISCO
+# ==========================================
+
+TAM_MAXIMO_CACHE = 256 * 1024 * 1024  # Bytes (256 MB)
+EXTENSION_CACHE = ".tok"
+
+def clave_fuente(codigo_fuente):
+    # Hash del código normalizado junto con la versión del analizador: si cambia
+    # cualquiera de los dos la entrada anterior deja de encontrarse
+    normalizado = codigo_fuente.replace('\r\n', '\n')
+    resumen = hashlib.sha256()
+    resumen.update(VERSION_LEXICO.encode('utf-8'))
+    resumen.update(b'\0')
+    resumen.update(normalizado.encode('utf-8', 'surrogatepass'))
+    return resumen.hexdigest()
+
+class CacheTokens:
+    # Cache persistente direccionada por contenido: cada fuente analizada se guarda
+    # en <directorio>/<hash>.tok con sus tokens y errores en JSON (el directorio
+    # puede ser compartido: leer una entrada nunca ejecuta código). La fecha de
+    # modificación del archivo marca el último uso, y cuando el tamaño total supera
+    # tam_maximo se borran primero las entradas usadas hace más tiempo (LRU).
+    # El tamaño total se mide recorriendo el directorio una sola vez y después se
+    # lleva la cuenta en cada escritura; solo se vuelve a recorrer al superar el
+    # límite. Lo que escriben otros procesos se ve en ese recorrido.
+    def __init__(self, directorio, tam_maximo=TAM_MAXIMO_CACHE):
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.tam_maximo = tam_maximo
+        self.total = None  # Bytes de las entradas (None: todavía no se midió)
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def ruta(self, clave):
+        return os.path.join(self.directorio, clave + EXTENSION_CACHE)
+
+    def obtener(self, clave):
+        # Devuelve (tokens, errores) o None si la entrada no existe o está dañada
+        ruta = self.ruta(clave)
+        # Los tokens no forman ciclos: pausar el recolector evita que recorra
+        # repetidamente los millones de objetos recién creados
+        recolector_activo = gc.isenabled()
+        gc.disable()
+        try:
+            try:
+                with open(ruta, "rb") as f:
+                    version, datos_tokens, datos_errores = json.load(f)
+                if version != VERSION_LEXICO:
+                    return None
+                tokens = [Token(*datos) for datos in datos_tokens]
+                errores = [ErrorLexico(*datos) for datos in datos_errores]
+            except (OSError, ValueError, TypeError, RecursionError):
+                return None  # Entrada dañada o de otro formato: cuenta como fallo
+        finally:
+            if recolector_activo:
+                gc.enable()
+        try:
+            os.utime(ruta)  # Marca de uso reciente para el LRU
+        except OSError:
+            pass
+        return tokens, errores
+
+    def guardar(self, clave, tokens, errores):
+        datos = (
+            VERSION_LEXICO,
+            [(t.tipo, t.valor, t.linea, t.col_inicio, t.col_fin) for t in tokens],
+            [(e.linea, e.columna, e.mensaje) for e in errores],
+        )
+        ruta = self.ruta(clave)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as f:
+            # En ASCII: los valores con surrogates sueltos quedan como escapes \u
+            f.write(json.dumps(datos, separators=(',', ':')).encode('ascii'))
+            tamano = f.tell()
+        try:
+            anterior = os.stat(ruta).st_size  # Otro proceso pudo guardar la misma entrada
+        except OSError:
+            anterior = 0
+        os.replace(temporal, ruta)  # Otros procesos nunca ven una entrada a medio escribir
+
+        if self.total is None:
+            self.medir()
+        else:
+            self.total += tamano - anterior
+        if self.total > self.tam_maximo:
+            self.desalojar()
+
+    def medir(self):
+        self.total = sum(tamano for _, tamano, _ in self.entradas())
+
+    def entradas(self):
+        # (fecha de último uso, tamaño, ruta) de cada entrada del directorio
+        for entrada in os.scandir(self.directorio):
+            if entrada.name.endswith(EXTENSION_CACHE):
+                try:
+                    info = entrada.stat()
+                except OSError:
+                    continue  # Otro proceso la borró mientras se recorría
+                yield info.st_mtime, info.st_size, entrada.path
+
+    def desalojar(self):
+        # Recorre el directorio completo y borra las entradas menos usadas hasta
+        # volver al límite
+        entradas = list(self.entradas())
+        total = sum(tamano for _, tamano, _ in entradas)
+        self.total = total
+        if total <= self.tam_maximo:
+            return
+
+        entradas.sort()  # Las menos usadas recientemente primero
+        for _, tamano, ruta in entradas:
+            if total <= self.tam_maximo:
+                break
+            try:
+                os.remove(ruta)
+            except OSError:
+                continue  # Otro proceso ya la borró
+            total -= tamano
+            self.desalojos += 1
+        self.total = total
+
+    def analizar(self, codigo_fuente, motor=MOTOR_COMPILADO):
+        # Igual que AnalizadorLexico(codigo_fuente, motor).analizar(), pero reutiliza
+        # el resultado guardado si ese mismo código ya se analizó antes
+        clave = clave_fuente(codigo_fuente)
+        resultado = self.obtener(clave)
+        if resultado is not None:
+            self.aciertos += 1
+            return resultado
+        self.fallos += 1
+        tokens, errores = AnalizadorLexico(codigo_fuente, motor).analizar()
+        self.guardar(clave, tokens, errores)
+        return tokens, errores
+
+    def reporte(self):
+        consultas = self.aciertos + self.fallos
+        tasa = self.aciertos / consultas if consultas else 0.0
+        return (f"Cache: {self.aciertos} aciertos, {self.fallos} fallos ({tasa:.0%} de aciertos), "
+                f"{self.desalojos} desalojos")
+
+# Una CacheTokens por directorio y tamaño en cada proceso, reutilizada entre
+# archivos (cli.py) o peticiones (servidor_lexico.py) para no volver a medir el
+# directorio en cada escritura
+CACHES = {}
+
+def cache_compartida(directorio, tam_maximo=TAM_MAXIMO_CACHE):
+    cache = CACHES.get((directorio, tam_maximo))
+    if cache is None:
+        cache = CACHES[(directorio, tam_maximo)] = CacheTokens(directorio, tam_maximo)
+    return cache
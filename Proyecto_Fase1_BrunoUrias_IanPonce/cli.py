@@ -0,0 +1,293 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Solo se importa el núcleo léxico: este modo nunca carga tkinter
+from lexico import (ErrorLexico, EstadisticasLexicas, IndiceIdentificadores, MOTOR_CLASICO, MOTOR_COMPILADO,
+                    LIMITE_ABORTAR, LIMITE_RESUMEN, iter_tokens, intercalar_resultados, escribir_salida,
+                    archivo_parece_texto)
+from cache_lexico import CacheTokens, TAM_MAXIMO_CACHE, cache_compartida
+from indice_identificadores import combinar_en_disco
+from tamanos import parsear_tamano
+from salida_binaria import EXTENSION_BINARIA, escribir_binario
+from lexico_paralelo import analizar_paralelo, escribir_salida_paralela
+
+# ==========================================
+# 4. MODO CONSOLA (PROCESAMIENTO POR LOTES)
+# ==========================================
+
+EXTENSIONES_FUENTE = (".mlng", ".ming", ".txt")
+FORMATO_TEXTO = "texto"
+FORMATO_BINARIO = "binario"
+
+class ResultadoArchivo:
+    __slots__ = ('ruta', 'salida', 'bytes', 'tokens', 'errores', 'fallo', 'estadisticas', 'desde_cache', 'indice')
+
+    def __init__(self, ruta, salida, bytes_leidos, tokens, errores, fallo=None, estadisticas=None,
+                 desde_cache=None, indice=None):
+        self.ruta = ruta
+        self.salida = salida
+        self.bytes = bytes_leidos
+        self.tokens = tokens
+        self.errores = errores      # Lista de mensajes (str) de ErrorLexico
+        self.fallo = fallo          # Mensaje si el archivo no se pudo procesar
+        self.estadisticas = estadisticas
+        self.desde_cache = desde_cache  # None sin cache; True/False si hubo acierto o fallo
+        self.indice = indice        # IndiceIdentificadores del archivo (con --indice)
+
+def expandir_rutas(entradas, extensiones=EXTENSIONES_FUENTE):
+    # Acepta archivos, directorios (recorridos recursivamente) y patrones glob
+    rutas = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            for carpeta, _, archivos in os.walk(entrada):
+                for nombre in sorted(archivos):
+                    if nombre.endswith(extensiones):
+                        rutas.append(os.path.join(carpeta, nombre))
+        elif glob.has_magic(entrada):
+            rutas.extend(sorted(ruta for ruta in glob.glob(entrada, recursive=True) if os.path.isfile(ruta)))
+        else:
+            rutas.append(entrada)
+
+    # Quitar duplicados conservando el orden
+    vistas = set()
+    return [ruta for ruta in rutas if not (ruta in vistas or vistas.add(ruta))]
+
+def ruta_salida(ruta, formato=FORMATO_TEXTO):
+    # Mismo nombre que usa InterfazMiniLang.guardar_salida (o .outb en binario)
+    return os.path.splitext(ruta)[0] + (EXTENSION_BINARIA if formato == FORMATO_BINARIO else ".out")
+
+def procesar_archivo_con_cache(ruta, motor, directorio_cache, tam_maximo_cache, formato, indexar=False):
+    # El archivo se lee completo para calcular su hash; si ya se analizó antes
+    # (en cualquier ruta) los tokens salen de la cache sin volver a escanear
+    salida = ruta_salida(ruta, formato)
+    cache = cache_compartida(directorio_cache, tam_maximo_cache)
+    aciertos_previos = cache.aciertos
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            codigo = f.read()
+        tokens, errores = cache.analizar(codigo, motor)
+        if formato == FORMATO_BINARIO:
+            escribir_binario(intercalar_resultados(tokens, errores), salida)
+        else:
+            # Con acierto en la cache y .out al día no se reescribe nada
+            escribir_salida(tokens, salida, omitir_si_igual=True)
+        bytes_leidos = os.path.getsize(ruta)
+    except (OSError, UnicodeDecodeError) as e:
+        return ResultadoArchivo(ruta, salida, 0, 0, [], str(e))
+    # Los tokens de la cache no pasaron por el escáner: se indexan aparte
+    indice = IndiceIdentificadores.desde_tokens(tokens, os.path.abspath(ruta)) if indexar else None
+    return ResultadoArchivo(ruta, salida, bytes_leidos, len(tokens), [str(e) for e in errores],
+                            desde_cache=cache.aciertos > aciertos_previos, indice=indice)
+
+def procesar_archivo(ruta, motor=MOTOR_COMPILADO, instrumentar=False, directorio_cache=None,
+                     tam_maximo_cache=TAM_MAXIMO_CACHE, formato=FORMATO_TEXTO, max_errores=None,
+                     modo_limite=LIMITE_ABORTAR, indexar=False):
+    salida = ruta_salida(ruta, formato)
+    try:
+        if not archivo_parece_texto(ruta):
+            return ResultadoArchivo(ruta, salida, 0, 0, [], "no parece un archivo de texto (binario o con otra codificación)")
+    except OSError as e:
+        return ResultadoArchivo(ruta, salida, 0, 0, [], str(e))
+
+    # La cache guarda análisis completos: con límite de errores se analiza directo
+    if directorio_cache is not None and not instrumentar and max_errores is None:
+        return procesar_archivo_con_cache(ruta, motor, directorio_cache, tam_maximo_cache, formato, indexar)
+    estadisticas = EstadisticasLexicas(motor) if instrumentar else None
+    indice = None
+    if indexar:
+        # Rutas absolutas: así se combinan índices generados desde otras carpetas
+        indice = IndiceIdentificadores()
+        indice.nuevo_archivo(os.path.abspath(ruta))
+    errores = []
+    contador = [0]
+
+    def solo_tokens(elementos, conservar_errores=False):
+        for elemento in elementos:
+            if isinstance(elemento, ErrorLexico):
+                errores.append(str(elemento))
+                if conservar_errores:
+                    yield elemento
+            else:
+                contador[0] += 1
+                yield elemento
+
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            elementos = iter_tokens(f, motor, estadisticas=estadisticas, max_errores=max_errores,
+                                    modo_limite=modo_limite, indice=indice)
+            if formato == FORMATO_BINARIO:
+                # El formato binario guarda también los errores en su propia sección
+                escribir_binario(solo_tokens(elementos, conservar_errores=True), salida)
+            else:
+                # Igual que con la cache: un .out que quedaría idéntico no se reescribe
+                escribir_salida(solo_tokens(elementos), salida, omitir_si_igual=True)
+        bytes_leidos = os.path.getsize(ruta)
+    except (OSError, UnicodeDecodeError) as e:
+        return ResultadoArchivo(ruta, salida, 0, 0, [], str(e))
+    return ResultadoArchivo(ruta, salida, bytes_leidos, contador[0], errores, estadisticas=estadisticas,
+                            indice=indice)
+
+def procesar_archivo_dividido(ruta, motor, formato, trabajadores, pool):
+    # Un solo archivo repartido en fragmentos entre los procesos del pool
+    salida = ruta_salida(ruta, formato)
+    try:
+        if not archivo_parece_texto(ruta):
+            return ResultadoArchivo(ruta, salida, 0, 0, [], "no parece un archivo de texto (binario o con otra codificación)")
+        with open(ruta, 'r', encoding='utf-8') as f:
+            codigo = f.read()
+        if formato == FORMATO_BINARIO:
+            tokens, errores = analizar_paralelo(codigo, motor, trabajadores, pool)
+            cantidad = len(tokens)
+            escribir_binario(intercalar_resultados(tokens, errores), salida)
+        else:
+            cantidad, errores = escribir_salida_paralela(codigo, salida, motor, trabajadores, pool, omitir_si_igual=True)
+        bytes_leidos = os.path.getsize(ruta)
+    except (OSError, UnicodeDecodeError) as e:
+        return ResultadoArchivo(ruta, salida, 0, 0, [], str(e))
+    return ResultadoArchivo(ruta, salida, bytes_leidos, cantidad, [str(e) for e in errores])
+
+def procesar_lote_dividido(rutas, trabajadores, motor=MOTOR_COMPILADO, formato=FORMATO_TEXTO):
+    # Los archivos van de a uno y cada uno se divide; el pool se comparte entre todos
+    if trabajadores == 1:
+        for ruta in rutas:
+            yield procesar_archivo_dividido(ruta, motor, formato, 1, None)
+        return
+    with ProcessPoolExecutor(max_workers=trabajadores) as pool:
+        for ruta in rutas:
+            yield procesar_archivo_dividido(ruta, motor, formato, trabajadores, pool)
+
+def procesar_lote(rutas, trabajadores=None, tam_lote=1, motor=MOTOR_COMPILADO, instrumentar=False,
+                  directorio_cache=None, tam_maximo_cache=TAM_MAXIMO_CACHE, formato=FORMATO_TEXTO,
+                  max_errores=None, modo_limite=LIMITE_ABORTAR, indexar=False):
+    # Genera un ResultadoArchivo por ruta (en el mismo orden). Con un solo
+    # trabajador se procesa en este proceso, sin crear el pool.
+    opciones = (motor, instrumentar, directorio_cache, tam_maximo_cache, formato, max_errores, modo_limite, indexar)
+    if trabajadores == 1 or len(rutas) <= 1:
+        for ruta in rutas:
+            yield procesar_archivo(ruta, *opciones)
+        return
+    with ProcessPoolExecutor(max_workers=trabajadores) as pool:
+        yield from pool.map(procesar_archivo, rutas, *(repeat(opcion) for opcion in opciones),
+                            chunksize=tam_lote)
+
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        description="Analizador léxico MiniLang sin interfaz gráfica: genera un .out por cada archivo fuente.")
+    parser.add_argument("entradas", nargs="+", help="Archivos, directorios o patrones glob (ej. 'entregas/**/*.mlng')")
+    parser.add_argument("-j", "--trabajadores", type=int, default=os.cpu_count() or 1,
+                        help="Procesos del pool (por defecto: número de CPUs)")
+    parser.add_argument("--tam-lote", type=int, default=4,
+                        help="Archivos enviados a cada proceso por tarea (chunksize del pool)")
+    parser.add_argument("--motor", choices=(MOTOR_CLASICO, MOTOR_COMPILADO), default=MOTOR_COMPILADO,
+                        help="Motor de escaneo del analizador")
+    parser.add_argument("-v", "--detalle", action="store_true", help="Mostrar cada error léxico encontrado")
+    parser.add_argument("--estadisticas", action="store_true",
+                        help="Instrumentar el analizador e imprimir las estadísticas combinadas en JSON")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="Directorio de cache de tokens por contenido (no se usa junto con --estadisticas)")
+    parser.add_argument("--cache-max", default="256MB",
+                        help="Tamaño máximo de la cache antes de borrar las entradas menos usadas")
+    parser.add_argument("--formato", choices=(FORMATO_TEXTO, FORMATO_BINARIO), default=FORMATO_TEXTO,
+                        help="Salida .out de texto o .outb binaria indexada (ver salida_binaria.py)")
+    parser.add_argument("--max-errores", type=int, metavar="N",
+                        help="Errores léxicos por archivo antes de aplicar --modo-limite (desactiva la cache)")
+    parser.add_argument("--modo-limite", choices=(LIMITE_ABORTAR, LIMITE_RESUMEN), default=LIMITE_ABORTAR,
+                        help="abortar: detener el archivo; resumen: seguir y solo contar los errores restantes")
+    parser.add_argument("--indice", metavar="RUTA",
+                        help="Guardar (o actualizar) un índice de identificadores; ver indice_identificadores.py")
+    parser.add_argument("--dividir", action="store_true",
+                        help="Repartir cada archivo entre los procesos (para pocos archivos muy grandes)")
+    return parser
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    if args.trabajadores < 1 or args.tam_lote < 1:
+        print("ERROR: --trabajadores y --tam-lote deben ser mayores que cero", file=sys.stderr)
+        return 2
+    if args.max_errores is not None and args.max_errores < 0:
+        print("ERROR: --max-errores no puede ser negativo", file=sys.stderr)
+        return 2
+
+    if args.dividir and (args.cache or args.max_errores is not None or args.estadisticas or args.indice):
+        print("ERROR: --dividir no se combina con --cache, --max-errores, --estadisticas ni --indice", file=sys.stderr)
+        return 2
+
+    rutas = expandir_rutas(args.entradas)
+    if not rutas:
+        print("ERROR: no se encontraron archivos fuente", file=sys.stderr)
+        return 2
+
+    try:
+        tam_maximo_cache = parsear_tamano(args.cache_max)
+    except ValueError:
+        print(f"ERROR: tamaño de cache inválido: {args.cache_max}", file=sys.stderr)
+        return 2
+
+    estadisticas = EstadisticasLexicas(args.motor) if args.estadisticas else None
+    inicio = time.perf_counter()
+    total_bytes = total_tokens = total_errores = archivos_con_errores = fallos = 0
+    aciertos_cache = fallos_cache = 0
+    if args.dividir:
+        resultados = procesar_lote_dividido(rutas, args.trabajadores, args.motor, args.formato)
+    else:
+        resultados = procesar_lote(rutas, args.trabajadores, args.tam_lote, args.motor, args.estadisticas,
+                                   args.cache, tam_maximo_cache, args.formato, args.max_errores,
+                                   args.modo_limite, args.indice is not None)
+    indice = IndiceIdentificadores() if args.indice else None
+    for resultado in resultados:
+        if resultado.fallo:
+            fallos += 1
+            print(f"{resultado.ruta}: no se pudo procesar ({resultado.fallo})", file=sys.stderr)
+            continue
+        if resultado.desde_cache is True:
+            aciertos_cache += 1
+        elif resultado.desde_cache is False:
+            fallos_cache += 1
+        if estadisticas is not None:
+            estadisticas.combinar(resultado.estadisticas)
+        if resultado.indice is not None:
+            indice.combinar(resultado.indice)
+        total_bytes += resultado.bytes
+        total_tokens += resultado.tokens
+        if resultado.errores:
+            archivos_con_errores += 1
+            total_errores += len(resultado.errores)
+            print(f"{resultado.ruta}: {len(resultado.errores)} errores léxicos", file=sys.stderr)
+            if args.detalle:
+                for error in resultado.errores:
+                    print(f"  {error}", file=sys.stderr)
+    if args.cache:
+        # Cada proceso del pool solo cuenta lo que escribió él: un recorrido final
+        # deja la cache dentro del límite aunque entre todos lo hayan superado
+        CacheTokens(args.cache, tam_maximo_cache).desalojar()
+    duracion = max(time.perf_counter() - inicio, 1e-9)
+
+    procesados = len(rutas) - fallos
+    print(f"Archivos: {procesados} ({fallos} fallidos), tokens: {total_tokens}, "
+          f"errores: {total_errores} en {archivos_con_errores} archivos")
+    print(f"Tiempo: {duracion:.3f} s | {procesados / duracion:.1f} archivos/s | "
+          f"{total_tokens / duracion:.0f} tokens/s | {total_bytes / duracion / 1e6:.2f} MB/s")
+    if aciertos_cache or fallos_cache:
+        print(f"Cache: {aciertos_cache} aciertos, {fallos_cache} fallos "
+              f"({aciertos_cache / (aciertos_cache + fallos_cache):.0%} de aciertos)")
+    if estadisticas is not None:
+        print(estadisticas.como_json())
+    if indice is not None:
+        try:
+            indice = combinar_en_disco(indice, args.indice)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: no se pudo guardar el índice: {e}", file=sys.stderr)
+            return 2
+        print(f"Índice: {len(indice)} identificadores en {len(indice.archivos)} archivos -> {args.indice}")
+
+    if fallos:
+        return 2
+    return 1 if total_errores else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
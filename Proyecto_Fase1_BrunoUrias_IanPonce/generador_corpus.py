@@ -0,0 +1,143 @@
+import argparse
+import random
+import sys
+
+from tamanos import parsear_tamano
+
+# ==========================================
+# 5. GENERADOR DE CORPUS SINTÉTICO (BENCHMARKS)
+# ==========================================
+
+# Cada forma produce programas MiniLang con un perfil distinto. El resultado es
+# determinista: la misma forma, tamaño y semilla generan siempre el mismo texto.
+FORMAS = ("mixto", "indentacion", "cadenas", "identificadores", "operadores", "comentarios", "basura")
+
+TIPOS = ("int", "float", "string", "bool")
+OPERADORES_ARITMETICOS = ("+", "-", "*", "/", "%")
+OPERADORES_RELACIONALES = (">", "<", "==", "!=", ">=", "<=")
+LETRAS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_"
+ALFANUMERICOS = LETRAS + "0123456789"
+BASURA = "@$?`~!.^&|\\[]'ñáéü€\t \"#0123456789abcXYZ=+<>(){}:;,"
+
+def identificador(rnd, minimo=1, maximo=12):
+    largo = rnd.randint(minimo, maximo)
+    return rnd.choice(LETRAS) + "".join(rnd.choice(ALFANUMERICOS) for _ in range(largo - 1))
+
+def expresion(rnd, terminos):
+    partes = [identificador(rnd) if rnd.random() < 0.6 else str(rnd.randint(0, 9999))]
+    for _ in range(terminos - 1):
+        partes.append(rnd.choice(OPERADORES_ARITMETICOS))
+        partes.append(identificador(rnd) if rnd.random() < 0.6 else f"{rnd.randint(0, 999)}.{rnd.randint(0, 99)}")
+    return " ".join(partes)
+
+def lineas_mixto(rnd):
+    # Perfil parecido a SetDePruebas.txt: declaraciones, control de flujo y E/S
+    nombre = identificador(rnd)
+    yield f"# Bloque {nombre}"
+    yield f"def {nombre}(int a, float b):"
+    yield f"    {rnd.choice(TIPOS)} {identificador(rnd)} = {expresion(rnd, 3)}"
+    yield f"    if a {rnd.choice(OPERADORES_RELACIONALES)} {rnd.randint(0, 100)}:"
+    yield f"        Write(\"valor {nombre}\")"
+    yield "    else:"
+    yield "        Read(a)"
+    yield "    while a > 0:"
+    yield "        a = a - 1"
+    yield "    return a"
+    yield ""
+    yield f"int {identificador(rnd)} = {rnd.randint(0, 1000)}"
+    yield f"bool {identificador(rnd)} = {rnd.choice(('true', 'false'))}"
+
+def lineas_indentacion(rnd):
+    # Bloques muy anidados que luego se cierran de golpe (muchos INDENT/DEDENT)
+    profundidad = rnd.randint(10, 40)
+    for nivel in range(profundidad):
+        yield "    " * nivel + f"if {identificador(rnd)} < {nivel}:"
+    yield "    " * profundidad + f"{identificador(rnd)} = {rnd.randint(0, 9)}"
+    for nivel in range(profundidad - 1, 0, -rnd.randint(1, 5)):
+        yield "    " * nivel + f"{identificador(rnd)} = {nivel}"
+
+def lineas_cadenas(rnd):
+    # Líneas con literales de cadena largos (ocasionalmente sin cerrar)
+    texto = "".join(rnd.choice(ALFANUMERICOS + "  ,.;:") for _ in range(rnd.randint(200, 2000)))
+    if rnd.random() < 0.05:
+        yield f"string {identificador(rnd)} = \"{texto}"
+    else:
+        yield f"Write(\"{texto}\")"
+
+def lineas_identificadores(rnd):
+    # Muchos identificadores largos (algunos superan los 31 caracteres)
+    nombres = [identificador(rnd, 8, 34) for _ in range(rnd.randint(4, 10))]
+    yield f"{nombres[0]} = " + " + ".join(nombres[1:])
+
+def lineas_operadores(rnd):
+    # Expresiones densas en operadores y paréntesis
+    partes = []
+    for _ in range(rnd.randint(8, 30)):
+        partes.append(f"({identificador(rnd, 1, 3)} {rnd.choice(OPERADORES_ARITMETICOS)} {rnd.randint(0, 99)})")
+        partes.append(rnd.choice(OPERADORES_ARITMETICOS + OPERADORES_RELACIONALES))
+    partes.append(identificador(rnd, 1, 3))
+    yield f"{identificador(rnd, 1, 3)} = " + " ".join(partes)
+
+def lineas_comentarios(rnd):
+    # Mayoría de líneas de comentario, comentarios finales y líneas vacías
+    for _ in range(rnd.randint(3, 8)):
+        yield "    " * rnd.randint(0, 2) + "# " + " ".join(identificador(rnd) for _ in range(rnd.randint(3, 12)))
+    yield ""
+    yield f"int {identificador(rnd)} = {rnd.randint(0, 99)}  # comentario final"
+
+def lineas_basura(rnd):
+    # Entrada inválida con alta densidad de errores léxicos
+    yield "".join(rnd.choice(BASURA) for _ in range(rnd.randint(20, 120)))
+
+GENERADORES = {
+    "mixto": lineas_mixto,
+    "indentacion": lineas_indentacion,
+    "cadenas": lineas_cadenas,
+    "identificadores": lineas_identificadores,
+    "operadores": lineas_operadores,
+    "comentarios": lineas_comentarios,
+    "basura": lineas_basura,
+}
+
+def generar_programa(forma, tam_bytes, semilla=0, tam_fragmento=1 << 16):
+    # Generador de fragmentos de texto (~tam_fragmento caracteres cada uno) que
+    # suman aproximadamente tam_bytes en UTF-8; nunca arma el programa completo.
+    if forma not in GENERADORES:
+        raise ValueError(f"Forma desconocida: {forma}")
+    rnd = random.Random(f"{forma}:{semilla}")
+    generador = GENERADORES[forma]
+    producidos = 0
+    fragmento = []
+    largo_fragmento = 0
+    while producidos < tam_bytes:
+        for linea in generador(rnd):
+            linea += "\n"
+            fragmento.append(linea)
+            largo = len(linea.encode('utf-8'))
+            largo_fragmento += largo
+            producidos += largo
+        if largo_fragmento >= tam_fragmento or producidos >= tam_bytes:
+            yield "".join(fragmento)
+            fragmento = []
+            largo_fragmento = 0
+
+def generar_texto(forma, tam_bytes, semilla=0):
+    return "".join(generar_programa(forma, tam_bytes, semilla))
+
+def escribir_corpus(ruta, forma, tam_bytes, semilla=0):
+    with open(ruta, "w", encoding='utf-8', newline='\n') as f:
+        for fragmento in generar_programa(forma, tam_bytes, semilla):
+            f.write(fragmento)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera programas MiniLang sintéticos para benchmarks.")
+    parser.add_argument("salida", help="Archivo .mlng a generar")
+    parser.add_argument("--forma", choices=FORMAS, default="mixto")
+    parser.add_argument("--tam", default="1MB", help="Tamaño aproximado (ej. 1KB, 10MB, 500MB)")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args(argv)
+    escribir_corpus(args.salida, args.forma, parsear_tamano(args.tam), args.semilla)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
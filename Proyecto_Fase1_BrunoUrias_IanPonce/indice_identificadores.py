@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import struct
+import sys
+from array import array
+
+from lexico import IndiceIdentificadores, VERSION_LEXICO
+
+# ==========================================
+# 2.8 ÍNDICE DE IDENTIFICADORES EN DISCO
+# ==========================================
+
+# Estructura del archivo (enteros en little-endian):
+#   ENCABEZADO_INDICE  mágico, versión y largo de la cabecera
+#   cabecera           JSON con la VERSION_LEXICO, la lista de archivos, los
+#                      nombres y la cantidad de enteros de usos de cada nombre
+#   usos               el arreglo de usos (archivo, token, línea) de cada nombre,
+#                      en el orden de la cabecera, tal como está en memoria
+# Solo hay texto y enteros: cargar un índice ajeno (ej. para combinarlo) nunca
+# ejecuta código. Como las posiciones de token dependen del analizador, un índice
+# de otra VERSION_LEXICO no se carga.
+# Dos índices se combinan con IndiceIdentificadores.combinar: así un directorio
+# puede indexarse por partes, o re-indexar solo los archivos que cambiaron.
+
+MAGICO_INDICE = b"MLIX"
+VERSION_INDICE = 2
+EXTENSION_INDICE = ".idx"
+ENCABEZADO_INDICE = struct.Struct("<4sHI")
+
+def guardar_indice(indice, ruta):
+    nombres = list(indice.referencias)
+    cabecera = json.dumps({
+        "version_lexico": VERSION_LEXICO,
+        "archivos": indice.archivos,
+        "nombres": nombres,
+        "largos": [len(indice.referencias[nombre]) for nombre in nombres],
+    }, separators=(',', ':')).encode('ascii')
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as f:
+        f.write(ENCABEZADO_INDICE.pack(MAGICO_INDICE, VERSION_INDICE, len(cabecera)))
+        f.write(cabecera)
+        for nombre in nombres:
+            usos = indice.referencias[nombre]
+            if sys.byteorder == "big":
+                usos = array('I', usos)
+                usos.byteswap()
+            usos.tofile(f)
+    os.replace(temporal, ruta)  # Un lector nunca ve un índice a medio escribir
+
+def cargar_indice(ruta):
+    with open(ruta, "rb") as f:
+        try:
+            magico, version, largo_cabecera = ENCABEZADO_INDICE.unpack(f.read(ENCABEZADO_INDICE.size))
+        except struct.error:
+            magico = version = None
+        if magico != MAGICO_INDICE:
+            raise ValueError(f"{ruta}: no es un índice de identificadores")
+        if version != VERSION_INDICE:
+            raise ValueError(f"{ruta}: versión de índice {version} no soportada")
+        try:
+            cabecera = json.loads(f.read(largo_cabecera))
+            version_lexico = cabecera["version_lexico"]
+            archivos, nombres, largos = cabecera["archivos"], cabecera["nombres"], cabecera["largos"]
+        except (ValueError, TypeError, KeyError):
+            raise ValueError(f"{ruta}: cabecera del índice dañada")
+        if version_lexico != VERSION_LEXICO:
+            raise ValueError(f"{ruta}: índice generado con otra versión del analizador, hay que regenerarlo")
+        if (not isinstance(archivos, list) or not isinstance(nombres, list) or not isinstance(largos, list)
+                or len(nombres) != len(largos) or not all(isinstance(archivo, str) for archivo in archivos)):
+            raise ValueError(f"{ruta}: cabecera del índice dañada")
+
+        referencias = {}
+        try:
+            for nombre, largo in zip(nombres, largos):
+                if not isinstance(nombre, str) or not isinstance(largo, int) or largo <= 0 or largo % 3:
+                    raise ValueError
+                usos = array('I')
+                usos.fromfile(f, largo)
+                if sys.byteorder == "big":
+                    usos.byteswap()
+                if max(usos[::3]) >= len(archivos):
+                    raise ValueError
+                referencias[sys.intern(nombre)] = usos
+            if f.read(1):
+                raise ValueError
+        except (ValueError, EOFError):
+            raise ValueError(f"{ruta}: usos del índice dañados o incompletos")
+
+    indice = IndiceIdentificadores()
+    indice.archivos = archivos
+    indice.posicion_archivo = {ruta: posicion for posicion, ruta in enumerate(archivos)}
+    indice.referencias = referencias
+    indice.actual = len(archivos) - 1
+    return indice
+
+def combinar_en_disco(indice, ruta):
+    # Agrega `indice` al que ya existe en `ruta` (si existe) y guarda el resultado
+    if os.path.exists(ruta):
+        indice = cargar_indice(ruta).combinar(indice)
+    guardar_indice(indice, ruta)
+    return indice
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Consulta y combina índices de identificadores generados con cli.py --indice.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    buscar = subcomandos.add_parser("buscar", help="Listar los usos de uno o más identificadores")
+    buscar.add_argument("indice")
+    buscar.add_argument("nombres", nargs="+")
+    resumen = subcomandos.add_parser("resumen", help="Estadísticas de símbolos en JSON")
+    resumen.add_argument("indice")
+    resumen.add_argument("--top", type=int, default=10, help="Cantidad de identificadores más usados")
+    combinar = subcomandos.add_parser("combinar", help="Unir varios índices en uno")
+    combinar.add_argument("salida")
+    combinar.add_argument("entradas", nargs="+")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.comando == "combinar":
+            resultado = IndiceIdentificadores()
+            for ruta in args.entradas:
+                resultado.combinar(cargar_indice(ruta))
+            guardar_indice(resultado, args.salida)
+            print(f"{len(resultado.archivos)} archivos, {len(resultado)} identificadores")
+            return 0
+        indice = cargar_indice(args.indice)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+
+    if args.comando == "resumen":
+        print(json.dumps(indice.como_dict(args.top), indent=2, ensure_ascii=False))
+        return 0
+    encontrados = 0
+    for nombre in args.nombres:
+        referencias = indice.buscar(nombre)
+        print(f"{nombre}: {len(referencias)} usos")
+        for archivo, token, linea in referencias:
+            print(f"  {indice.archivos[archivo]}:{linea} (token {token})")
+        encontrados += len(referencias) > 0
+    return 0 if encontrados == len(args.nombres) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1550 @@
+import gc
+import os
+import re
+import sys
+import heapq
+import json
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+# ==========================================
+# 1. TIPOS DE TOKEN Y CLASES
+# ==========================================
+
+class TipoToken:
+    # Palabras Clave
+    IF = 'IF'
+    ELSE = 'ELSE'
+    WHILE = 'WHILE'
+    INT = 'INT'
+    FLOAT = 'FLOAT'
+    STRING = 'STRING'
+    BOOL = 'BOOL'
+    VOID = 'VOID'
+    RETURN = 'RETURN'
+    DEF = 'DEF'        # Agregado para funciones
+    READ = 'READ'
+    WRITE = 'WRITE'
+    
+    # Literales e Identificadores
+    ID = 'ID'
+    NUMERO_ENTERO = 'NUMERO_ENTERO'
+    NUMERO_FLOTANTE = 'NUMERO_FLOTANTE'
+    CADENA_LITERAL = 'CADENA_LITERAL'
+    BOOLEANO_LITERAL = 'BOOLEANO_LITERAL' # Para true/false
+    
+    # Operadores y Símbolos
+    SUMA = '+'
+    RESTA = '-'
+    MULTIPLICACION = '*'
+    DIVISION = '/'
+    MODULO = '%'
+    MAYOR_QUE = '>'
+    MENOR_QUE = '<'
+    MAYOR_IGUAL = '>='
+    MENOR_IGUAL = '<='
+    IGUAL_QUE = '=='
+    DIFERENTE_QUE = '!='
+    ASIGNACION = '='
+    PARENTESIS_IZQ = '('
+    PARENTESIS_DER = ')'
+    LLAVE_IZQ = '{'
+    LLAVE_DER = '}'
+    DOS_PUNTOS = ':'
+    COMA = ','
+    PUNTO_Y_COMA = ';'
+    
+    # Control
+    NUEVA_LINEA = 'NEWLINE'
+    INDENTAR = 'INDENT'
+    DESINDENTAR = 'DEDENT'
+    FIN_ARCHIVO = 'EOF'
+    DESCONOCIDO = 'UNKNOWN'
+
+class Token:
+    # Token con la línea y las columnas ya resueltas. analizar() sigue creando
+    # uno por lexema aunque exista TokenBuffer: el analizador incremental corrige
+    # token.linea en su lugar, y el parser, la caché, el .out/.outb, el servidor
+    # y la tabla de la interfaz leen cada token al menos una vez. Con 1,16 M de
+    # tokens, armarlos desde un TokenBuffer cuesta ~1,2 s por recorrido (la lista
+    # se recorre en 0,02 s) y escribir el .out pasa de 1,2 s a 2,2-2,6 s. El
+    # buffer solo conviene cuando importa la memoria: ~14 B por token contra ~103.
+    __slots__ = ('tipo', 'valor', 'linea', 'col_inicio', 'col_fin')
+
+    def __init__(self, tipo, valor, linea, col_inicio, col_fin):
+        self.tipo = tipo
+        self.valor = valor
+        self.linea = linea
+        self.col_inicio = col_inicio
+        self.col_fin = col_fin
+
+    def __str__(self):
+        # Formato para el archivo .out: <ID> line 1, col 1-5: 'variable'
+        if self.tipo in [TipoToken.NUEVA_LINEA, TipoToken.INDENTAR, TipoToken.DESINDENTAR, TipoToken.FIN_ARCHIVO]:
+             return f"<{self.tipo}> line {self.linea}, col {self.col_inicio}-{self.col_fin}"
+        return f"<{self.tipo}> line {self.linea}, col {self.col_inicio}-{self.col_fin}: '{self.valor}'"
+
+class ErrorLexico:
+    __slots__ = ('linea', 'columna', 'mensaje')
+
+    def __init__(self, linea, columna, mensaje):
+        self.linea = linea
+        self.columna = columna
+        self.mensaje = mensaje
+
+    def __str__(self):
+        # Formato: line , col : ERROR
+        return f"line {self.linea}, col {self.columna}: ERROR {self.mensaje}"
+
+# Tabla de tipos internados: cada tipo se representa por su índice en esta lista
+TIPOS_TOKEN = [valor for nombre, valor in vars(TipoToken).items() if not nombre.startswith('_')]
+ID_TIPO_TOKEN = {tipo: indice for indice, tipo in enumerate(TIPOS_TOKEN)}
+
+# Tokens de control cuyo valor es fijo (no se toma de la fuente)
+VALORES_FIJOS = {
+    TipoToken.NUEVA_LINEA: "\\n", TipoToken.INDENTAR: "",
+    TipoToken.DESINDENTAR: "", TipoToken.FIN_ARCHIVO: ""
+}
+
+class TokenBuffer:
+    # Almacenamiento columnar (struct-of-arrays) de tokens: en vez de un objeto
+    # Token por elemento se guardan el tipo y dos desplazamientos en la fuente
+    # (9 bytes por token). La línea y las columnas no se guardan: al indexar se
+    # ubica la línea con una búsqueda binaria en la tabla de inicios de línea,
+    # y el lexema se recorta de la fuente en ese momento.
+    #
+    # inicio = inicio de su línea + col_inicio - 1 y fin = inicio de su línea + col_fin.
+    # Así se recuperan las columnas exactas de todo token, incluso las que no son
+    # una posición (col_fin de INDENT/DEDENT es el nivel de sangría).
+    COMILLA_AGREGADA = 0x80  # Bit en el tipo: cadena sin cerrar (se agrega '"' al valor)
+
+    def __init__(self, fuente, primera_linea=1):
+        # primera_linea: número de línea del comienzo de fuente (cuando es un
+        # fragmento de un archivo mayor)
+        self.fuente = fuente
+        self.primera_linea = primera_linea
+        self.tipos = array('B')
+        self.inicios = array('I')
+        self.fines = array('I')
+        self.valores_distintos = {}  # Índice -> valor que no sale de la fuente (identificador truncado)
+
+        # Desplazamiento de inicio de cada línea, armado una sola vez al crear el buffer
+        self.inicios_linea = array('I', [0])
+        self.inicios_linea.extend(m.end() for m in re.finditer('\n', fuente))
+        self.ultima_linea = 0  # Línea del último token resuelto (índice en inicios_linea)
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def tramo_valor(self, tipo, inicio, fin):
+        # Dónde está el valor del token en la fuente, según su tipo
+        if tipo == TipoToken.CADENA_LITERAL:
+            return inicio + 1, fin  # El valor no incluye la comilla de apertura
+        if tipo in TIPOS_OPERADOR:
+            return inicio, fin - 1  # col_fin de un operador apunta una columna más allá
+        return inicio, fin
+
+    def append(self, token):
+        tipo = token.tipo
+        id_tipo = ID_TIPO_TOKEN[tipo]
+        inicio_linea = self.inicios_linea[token.linea - self.primera_linea]
+        inicio = inicio_linea + token.col_inicio - 1
+        fin = inicio_linea + token.col_fin
+        if tipo not in VALORES_FIJOS:
+            valor = token.valor
+            desde, hasta = self.tramo_valor(tipo, inicio, fin)
+            if len(valor) != hasta - desde or not self.fuente.startswith(valor, desde):
+                if (tipo == TipoToken.CADENA_LITERAL and len(valor) == hasta - desde + 1
+                        and self.fuente.startswith(valor[:-1], desde)):
+                    # Cadena sin cerrar: la comilla final no existe en la fuente
+                    id_tipo |= self.COMILLA_AGREGADA
+                else:
+                    self.valores_distintos[len(self.tipos)] = valor
+
+        self.tipos.append(id_tipo)
+        self.inicios.append(inicio)
+        self.fines.append(fin)
+
+    def extender(self, tipos, inicios, fines, valores_distintos, desplazamiento=0):
+        # Agrega las columnas de otro buffer cuya fuente empieza en la posición
+        # desplazamiento de esta (ej. el resultado de un fragmento analizado aparte)
+        base = len(self.tipos)
+        self.tipos.extend(tipos)
+        if desplazamiento:
+            inicios = array('I', [inicio + desplazamiento for inicio in inicios])
+            fines = array('I', [fin + desplazamiento for fin in fines])
+        self.inicios.extend(inicios)
+        self.fines.extend(fines)
+        for indice, valor in valores_distintos.items():
+            self.valores_distintos[base + indice] = valor
+
+    def linea_de(self, desplazamiento):
+        # Índice en inicios_linea de la línea que contiene el desplazamiento. Antes
+        # de buscar se prueba la del último token resuelto: al recorrer los tokens en
+        # orden (tabla de la interfaz, escritura del .out) casi nunca hace falta buscar.
+        inicios_linea = self.inicios_linea
+        linea = self.ultima_linea
+        if not (inicios_linea[linea] <= desplazamiento
+                and (linea + 1 == len(inicios_linea) or desplazamiento < inicios_linea[linea + 1])):
+            linea = bisect_right(inicios_linea, desplazamiento) - 1
+            self.ultima_linea = linea
+        return linea
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+
+        id_tipo = self.tipos[indice]
+        tipo = TIPOS_TOKEN[id_tipo & ~self.COMILLA_AGREGADA]
+        inicio = self.inicios[indice]
+        fin = self.fines[indice]
+        linea = self.linea_de(inicio)
+        inicio_linea = self.inicios_linea[linea]
+        if tipo in VALORES_FIJOS:
+            valor = VALORES_FIJOS[tipo]
+        elif indice in self.valores_distintos:
+            valor = self.valores_distintos[indice]
+        else:
+            desde, hasta = self.tramo_valor(tipo, inicio, fin)
+            valor = self.fuente[desde:hasta]
+            if id_tipo & self.COMILLA_AGREGADA:
+                valor += '"'
+        return Token(tipo, valor, self.primera_linea + linea, inicio - inicio_linea + 1, fin - inicio_linea)
+
+    def __iter__(self):
+        # Recorrido en orden: la línea avanza junto con los tokens, sin búsquedas
+        fuente = self.fuente
+        inicios_linea = self.inicios_linea
+        ultima = len(inicios_linea) - 1
+        fuera = len(fuente) + 1  # Inicio de una línea inexistente tras la última
+        valores_distintos = self.valores_distintos
+        linea = 0
+        inicio_linea = 0
+        siguiente_linea = inicios_linea[1] if ultima else fuera
+        for indice, (id_tipo, inicio, fin) in enumerate(zip(self.tipos, self.inicios, self.fines)):
+            if not inicio_linea <= inicio < siguiente_linea:
+                linea = bisect_right(inicios_linea, inicio) - 1
+                inicio_linea = inicios_linea[linea]
+                siguiente_linea = inicios_linea[linea + 1] if linea < ultima else fuera
+            tipo = TIPOS_TOKEN[id_tipo & ~self.COMILLA_AGREGADA]
+            if tipo in VALORES_FIJOS:
+                valor = VALORES_FIJOS[tipo]
+            elif indice in valores_distintos:
+                valor = valores_distintos[indice]
+            elif tipo in TIPOS_OPERADOR:
+                valor = fuente[inicio:fin - 1]
+            elif tipo == TipoToken.CADENA_LITERAL:
+                valor = fuente[inicio + 1:fin]
+                if id_tipo & self.COMILLA_AGREGADA:
+                    valor += '"'
+            else:
+                valor = fuente[inicio:fin]
+            yield Token(tipo, valor, self.primera_linea + linea, inicio - inicio_linea + 1, fin - inicio_linea)
+
+    def bytes_por_token(self):
+        # Memoria de los arreglos, incluida la tabla de líneas (sin contar la
+        # fuente, que se comparte con el analizador)
+        total = sum(columna.itemsize * len(columna) for columna in
+                    (self.tipos, self.inicios, self.fines, self.inicios_linea))
+        return total / len(self) if len(self) else 0.0
+
+# Mapeo de operadores dobles
+OPERADORES_DOBLES = {
+    '>=': TipoToken.MAYOR_IGUAL, '<=': TipoToken.MENOR_IGUAL,
+    '==': TipoToken.IGUAL_QUE, '!=': TipoToken.DIFERENTE_QUE
+}
+# Mapeo de operadores simples
+OPERADORES_SIMPLES = {
+    '+': TipoToken.SUMA, '-': TipoToken.RESTA, '*': TipoToken.MULTIPLICACION, '/': TipoToken.DIVISION,
+    '%': TipoToken.MODULO, '(': TipoToken.PARENTESIS_IZQ, ')': TipoToken.PARENTESIS_DER,
+    '{': TipoToken.LLAVE_IZQ, '}': TipoToken.LLAVE_DER, ';': TipoToken.PUNTO_Y_COMA,
+    ',': TipoToken.COMA, ':': TipoToken.DOS_PUNTOS,
+    '>': TipoToken.MAYOR_QUE, '<': TipoToken.MENOR_QUE, '=': TipoToken.ASIGNACION
+}
+TIPOS_OPERADOR = frozenset(OPERADORES_DOBLES.values()) | frozenset(OPERADORES_SIMPLES.values())
+# Mapa de palabras reservadas (compartido por todos los analizadores, solo lectura)
+PALABRAS_CLAVE = {
+    "if": TipoToken.IF, "else": TipoToken.ELSE, "while": TipoToken.WHILE,
+    "int": TipoToken.INT, "float": TipoToken.FLOAT, "string": TipoToken.STRING,
+    "bool": TipoToken.BOOL, "void": TipoToken.VOID, "return": TipoToken.RETURN,
+    "def": TipoToken.DEF, "Read": TipoToken.READ, "Write": TipoToken.WRITE,
+    "true": TipoToken.BOOLEANO_LITERAL, "false": TipoToken.BOOLEANO_LITERAL
+}
+
+# ==========================================
+# 2. ANALIZADOR LÉXICO
+# ==========================================
+
+# Motores disponibles para AnalizadorLexico
+MOTOR_CLASICO = "clasico"       # Recorrido carácter por carácter (original)
+MOTOR_COMPILADO = "compilado"   # Expresión regular maestra precompilada
+
+# Versión de la salida del analizador: se debe incrementar cada vez que cambien los
+# tokens o errores producidos, porque invalida las entradas de cache_lexico.py
+VERSION_LEXICO = "2"
+
+# Límite de errores (max_errores): qué hacer cuando se alcanza
+LIMITE_ABORTAR = "abortar"   # Detener el análisis; se conservan los tokens hasta ese punto
+LIMITE_RESUMEN = "resumen"   # Seguir analizando, pero solo contar los errores restantes
+
+MAX_MUESTRA_ERROR = 20  # Caracteres mostrados de una racha de caracteres inesperados
+# Tramo de caracteres que seguro no inician ningún lexema (\w y \s de re equivalen a
+# isalnum()/'_' e isspace(); '!' y los numéricos que no son dígitos se revisan aparte)
+PATRON_DESCONOCIDOS = re.compile(r'[^\w\s"#+\-*/%(){};,:<>=!]+')
+
+# Revisión previa de entradas binarias o con codificación equivocada
+TAM_MUESTRA_TEXTO = 8192
+PROPORCION_CONTROL_MAXIMA = 0.10
+PATRON_CONTROL = re.compile('[\x00-\x08\x0b\x0e-\x1f\x7f\ufffd]')
+PATRON_CONTROL_BYTES = re.compile(b'[\x00-\x08\x0b\x0e-\x1f\x7f]')
+
+# Inicio de línea: primero se saltan de un golpe las líneas vacías o de solo comentario
+# y luego se captura la sangría de la primera línea con contenido real.
+PATRON_INICIO_LINEA = re.compile(r"((?:[ \t]*(?:\#[^\n]*)?\n)*)([ \t]*)")
+
+# Expresión maestra con las reglas léxicas de README_Fase1.md (sección 3).
+# Cada coincidencia consume los espacios previos y un lexema completo. El fin de
+# línea incluye el comentario final, las líneas vacías siguientes y la sangría de
+# la próxima línea con contenido. Una racha de caracteres que no inician ningún
+# lexema (DESC, la clase de PATRON_DESCONOCIDOS) es una sola coincidencia y un
+# solo error, igual que en el motor clásico. En re, \w es exactamente isalnum() o
+# '_', así que el resto de un identificador se reconoce aquí aunque tenga letras
+# no ASCII; IDU es un identificador que empieza con un carácter no ASCII y solo
+# vale si ese carácter cumple isalpha() (no '½'). Un número seguido de una letra
+# o dígito no ASCII, un IDU que no empieza con letra y un '!' suelto caen en OTRO
+# y se delegan al escáner clásico, que conserva la semántica de isalpha()/isdigit().
+PATRON_LEXEMA = re.compile(r"""
+    [^\S\n]*
+    (?:
+        (?P<ID>[A-Za-z_]\w*)
+      | (?P<OP>==|!=|<=|>=|[-+*/%(){};,:<>=])
+      | (?P<NUM>[0-9]+(?:\.[0-9]*(?![0-9]|[^\W\x00-\x7f])|(?![0-9.]|[^\W\x00-\x7f])))
+      | (?P<CAD>"[^"\n]*"?)
+      | (?P<NL>(?:\#[^\n]*)?\n)(?P<VACIAS>(?:[ \t]*(?:\#[^\n]*)?\n)*)(?P<SANGRIA>[ \t]*)
+      | (?P<DESC>[^\w\s"\#+\-*/%(){};,:<>=!]+)
+      | (?P<IDU>[^\W\d]\w*)
+      | (?P<OTRO>.)
+    )
+""", re.VERBOSE)
+
+def parece_texto(muestra):
+    # Revisión rápida sobre el comienzo de la entrada (str o bytes): un carácter
+    # NUL, bytes que no son UTF-8 válido o demasiados caracteres de control
+    # indican un archivo binario o con otra codificación, que solo produciría
+    # una avalancha de errores
+    muestra = muestra[:TAM_MUESTRA_TEXTO]
+    if isinstance(muestra, bytes):
+        try:
+            muestra.decode('utf-8')
+        except UnicodeDecodeError as e:
+            # Un carácter cortado al final de la muestra no cuenta como error
+            if e.start < len(muestra) - 3:
+                return False
+        patron = PATRON_CONTROL_BYTES
+        nulo = b'\0'
+    else:
+        patron = PATRON_CONTROL
+        nulo = '\0'
+    if nulo in muestra:
+        return False
+    return len(patron.findall(muestra)) <= len(muestra) * PROPORCION_CONTROL_MAXIMA
+
+def archivo_parece_texto(ruta):
+    with open(ruta, 'rb') as f:
+        return parece_texto(f.read(TAM_MUESTRA_TEXTO))
+
+class LimiteErroresAlcanzado(Exception):
+    pass
+
+class ListaErrores(list):
+    # Lista de errores con tope; solo se usa si el analizador recibe max_errores.
+    # Los contadores viven en el analizador para que el límite valga para todo el
+    # archivo aunque se analice por bloques.
+    def __init__(self, escanner):
+        super().__init__()
+        self.escanner = escanner
+
+    def append(self, error):
+        escanner = self.escanner
+        if escanner.errores_registrados < escanner.max_errores:
+            escanner.errores_registrados += 1
+            list.append(self, error)
+        elif escanner.modo_limite == LIMITE_ABORTAR:
+            raise LimiteErroresAlcanzado(error)
+        else:
+            escanner.errores_omitidos += 1
+
+    def agregar_aviso(self, error):
+        # Avisos del propio límite: no cuentan contra él
+        list.append(self, error)
+
+class AnalizadorLexico:
+    def __init__(self, codigo_fuente, motor=MOTOR_CLASICO, estadisticas=None, max_errores=None,
+                 modo_limite=LIMITE_ABORTAR, indice=None):
+        if motor not in (MOTOR_CLASICO, MOTOR_COMPILADO):
+            raise ValueError(f"Motor léxico desconocido: {motor}")
+        if modo_limite not in (LIMITE_ABORTAR, LIMITE_RESUMEN):
+            raise ValueError(f"Modo de límite de errores desconocido: {modo_limite}")
+        self.motor = motor
+        self.palabras_clave = PALABRAS_CLAVE
+
+        # Límite de errores opcional (ver ListaErrores)
+        self.max_errores = max_errores
+        self.modo_limite = modo_limite
+
+        # Índice de identificadores opcional (ver IndiceIdentificadores): cada ID se
+        # registra con su posición global, que sigue contando entre bloques
+        self.indice = indice
+        if indice is not None and indice.actual < 0:
+            indice.nuevo_archivo()
+
+        # Instrumentación opcional: sin un EstadisticasLexicas no se toca ningún método
+        self.estadisticas = estadisticas
+        if estadisticas is not None:
+            estadisticas.instrumentar(self)
+
+        self.reiniciar(codigo_fuente)
+
+    def reiniciar(self, codigo_fuente):
+        # Deja el analizador listo para otra fuente completa, conservando la
+        # configuración (motor, límite de errores, estadísticas, índice). Sirve
+        # para analizar muchas fuentes cortas sin crear un analizador por cada una;
+        # con un índice, llamar antes a indice.nuevo_archivo() si es otro archivo.
+        self.errores_registrados = 0
+        self.errores_omitidos = 0
+        self.abortado = False
+        self.tokens_previos = 0
+
+        # Normalizar saltos de línea y asegurar terminación
+        self.fuente = codigo_fuente.replace('\r\n', '\n') + '\n'
+        self.longitud = len(self.fuente)
+        self.posicion = 0
+        self.linea = 1
+        # Desplazamiento donde empieza la línea actual: la columna de cualquier
+        # posición es posicion - inicio_linea + 1 (no se cuenta carácter por carácter)
+        self.inicio_linea = 0
+        
+        # Pila de indentación (Nivel 0 inicial)
+        self.pila_indentacion = [0] 
+        
+        self.tokens = []
+        self.errores = self.nueva_lista_errores()
+
+    def analizar(self):
+        if self.estadisticas is not None:
+            return self.estadisticas.medir_analisis(self)
+        self.escanear()
+        return self.cerrar_bloques()
+
+    def analizar_compacto(self):
+        # Igual que analizar(), pero los tokens se guardan en un TokenBuffer columnar
+        self.tokens = TokenBuffer(self.fuente)
+        return self.analizar()
+
+    def nueva_lista_errores(self):
+        return [] if self.max_errores is None else ListaErrores(self)
+
+    def escanear(self):
+        # Recorre self.fuente desde self.posicion hasta el final sin cerrar los
+        # bloques pendientes, de modo que se pueda continuar con otro bloque de líneas
+        if self.abortado:
+            return
+        try:
+            if self.motor == MOTOR_COMPILADO:
+                self.escanear_compilado()
+            else:
+                self.escanear_clasico()
+        except LimiteErroresAlcanzado as limite:
+            # Los bloques pendientes se cierran en la línea del error que superó el
+            # límite (así ambos motores producen exactamente lo mismo)
+            error = limite.args[0]
+            self.abortado = True
+            self.errores.agregar_aviso(ErrorLexico(
+                error.linea, error.columna,
+                f"Análisis detenido: se alcanzó el límite de {self.max_errores} errores léxicos"))
+            self.posicion = self.longitud
+            self.linea = error.linea
+            self.inicio_linea = self.longitud
+
+    def cargar_bloque(self, texto):
+        # Reutiliza el escáner (pila de indentación y número de línea) sobre un nuevo
+        # bloque de líneas completas (ya normalizado). Los tokens y errores previos se descartan.
+        self.fuente = texto
+        self.longitud = len(self.fuente)
+        self.posicion = 0
+        self.inicio_linea = 0
+        self.tokens_previos += len(self.tokens)
+        self.tokens = []
+        self.errores = self.nueva_lista_errores()
+
+    def escanear_clasico(self):
+        inicio_de_linea = True # Chequeo para verificar indentación
+
+        while self.posicion < self.longitud:
+            caracter = self.fuente[self.posicion]
+
+            # ------------------------------------------------
+            # 1. MANEJO DE INDENTACIÓN (Solo tras NEWLINE o inicio)
+            # ------------------------------------------------
+            if inicio_de_linea:
+                # Si es línea vacía (solo enter), lo pasamos
+                if caracter == '\n':
+                    self.posicion += 1
+                    self.linea += 1
+                    self.inicio_linea = self.posicion
+                    continue
+                
+                # Si es comentario al inicio de línea, se ignora toda la línea
+                if caracter == '#':
+                    self.saltar_comentario()
+                    continue
+                
+                # Calcular indentación (espacios y tabs)
+                if caracter.isspace():
+                    espacios = self.contar_indentacion()
+                    # Verificar si la línea tiene contenido real después de los espacios
+                    if self.posicion < self.longitud and self.fuente[self.posicion] not in ['\n', '#']:
+                        self.procesar_indentacion(espacios)
+                        inicio_de_linea = False
+                    continue
+                else:
+                    # Nivel 0 de indentación (sin espacios al inicio)
+                    self.procesar_indentacion(0)
+                    inicio_de_linea = False
+            
+            # ------------------------------------------------
+            # 2. ESPACIOS EN BLANCO (No al inicio)
+            # ------------------------------------------------
+            if caracter.isspace():
+                if caracter == '\n':
+                    # Emitir NEWLINE si la línea tuvo contenido previo válido
+                    columna = self.posicion - self.inicio_linea + 1
+                    self.tokens.append(Token(TipoToken.NUEVA_LINEA, "\\n", self.linea, columna, columna))
+                    self.posicion += 1
+                    self.linea += 1
+                    self.inicio_linea = self.posicion
+                    inicio_de_linea = True
+                else:
+                    self.posicion += 1
+                continue
+
+            # ------------------------------------------------
+            # 3. COMENTARIOS (En medio de línea)
+            # ------------------------------------------------
+            if caracter == '#':
+                self.saltar_comentario()
+                continue 
+
+            # ------------------------------------------------
+            # 4-8. IDENTIFICADORES, NÚMEROS, CADENAS, OPERADORES Y ERRORES
+            # ------------------------------------------------
+            self.escanear_caracter(caracter)
+
+    def escanear_caracter(self, caracter):
+        # ------------------------------------------------
+        # 4. IDENTIFICADORES Y PALABRAS CLAVE
+        # ------------------------------------------------
+        if caracter.isalpha() or caracter == '_':
+            self.escanear_identificador()
+            return
+
+        # ------------------------------------------------
+        # 5. NÚMEROS (Enteros y Flotantes)
+        # ------------------------------------------------
+        if caracter.isdigit():
+            self.escanear_numero()
+            return
+
+        # ------------------------------------------------
+        # 6. CADENAS (STRINGS)
+        # ------------------------------------------------
+        if caracter == '"':
+            self.escanear_cadena()
+            return
+
+        # ------------------------------------------------
+        # 7. OPERADORES Y SÍMBOLOS
+        # ------------------------------------------------
+        if self.escanear_operador(caracter):
+            return
+
+        # ------------------------------------------------
+        # 8. ERROR: CARÁCTER DESCONOCIDO
+        # ------------------------------------------------
+        # Una racha de caracteres desconocidos seguidos produce un solo error
+        fin = self.fin_caracteres_desconocidos(self.posicion + 1)
+        columna = self.posicion - self.inicio_linea + 1
+        self.errores.append(ErrorLexico(self.linea, columna, self.mensaje_desconocidos(self.posicion, fin, columna)))
+        self.posicion = fin
+
+    def mensaje_desconocidos(self, inicio, fin, columna):
+        # Error de la racha de caracteres desconocidos fuente[inicio:fin]
+        cantidad = fin - inicio
+        if cantidad == 1:
+            return f"Carácter inesperado '{self.fuente[inicio]}'"
+        muestra = self.fuente[inicio:min(fin, inicio + MAX_MUESTRA_ERROR)]
+        if cantidad > MAX_MUESTRA_ERROR:
+            muestra += "..."
+        return f"{cantidad} caracteres inesperados '{muestra}' (col {columna}-{columna + cantidad - 1})"
+
+    def fin_caracteres_desconocidos(self, posicion):
+        # Avanza mientras el carácter no pueda iniciar ningún lexema (mismas reglas
+        # que escanear_caracter) ni sea espacio o comentario
+        fuente = self.fuente
+        while posicion < self.longitud:
+            tramo = PATRON_DESCONOCIDOS.match(fuente, posicion)
+            if tramo is not None:
+                posicion = tramo.end()
+                if posicion >= self.longitud:
+                    break
+            caracter = fuente[posicion]
+            if (caracter.isalpha() or caracter.isdigit() or caracter in '_"#' or caracter.isspace()
+                    or caracter in OPERADORES_SIMPLES
+                    or (caracter == '!' and fuente.startswith('=', posicion + 1))):
+                break
+            posicion += 1
+        return posicion
+
+    def cerrar_bloques(self):
+        # AL FINAL DEL ARCHIVO (EOF): Cerrar bloques pendientes
+        columna = self.posicion - self.inicio_linea + 1
+        while len(self.pila_indentacion) > 1:
+            self.pila_indentacion.pop()
+            self.tokens.append(Token(TipoToken.DESINDENTAR, "", self.linea, columna, columna))
+
+        if self.errores_omitidos:
+            self.errores.agregar_aviso(ErrorLexico(
+                self.linea, 1, f"Se omitieron {self.errores_omitidos} errores léxicos más "
+                               f"(límite de {self.max_errores})"))
+            self.errores_omitidos = 0
+        
+        # Opcional: token EOF
+        # self.tokens.append(Token(TipoToken.FIN_ARCHIVO, "", self.linea, columna, columna))
+        
+        return self.tokens, self.errores
+
+    def escanear_compilado(self):
+        # Mismo resultado que el motor clásico, pero recorriendo la fuente con
+        # PATRON_LEXEMA: cada coincidencia salta un lexema completo junto con sus
+        # espacios, y la columna se deriva del desplazamiento al inicio de línea.
+        fuente = self.fuente
+        longitud = self.longitud
+        tokens = self.tokens
+        errores = self.errores
+        palabras_clave = self.palabras_clave
+        pila = self.pila_indentacion
+        indice = self.indice
+        dobles = OPERADORES_DOBLES
+        simples = OPERADORES_SIMPLES
+        # Con instrumentación, cada coincidencia se mide y se atribuye al escáner
+        # de su clase; sin ella se itera directamente sobre la expresión maestra
+        coincidencias = PATRON_LEXEMA.finditer
+        if self.estadisticas is not None:
+            coincidencias = self.estadisticas.medir_coincidencias
+
+        # Primera línea: saltar vacías/comentarios y medir su sangría
+        m = PATRON_INICIO_LINEA.match(fuente, self.posicion)
+        linea = self.linea + m.group(1).count('\n')
+        pos = m.end()
+        inicio_linea = m.start(2)
+        if self.estadisticas is not None:
+            self.estadisticas.registrar_comentarios(m.group(1))
+        if pos < longitud:
+            sangria = m.group(2)
+            self.linea = linea
+            self.procesar_indentacion(len(sangria) + 3 * sangria.count('\t'))
+
+        while pos < longitud:
+            for m in coincidencias(fuente, pos):
+                clase = m.lastgroup
+
+                if clase == 'ID' or (clase == 'IDU' and fuente[m.start(clase)].isalpha()):
+                    inicio = m.start(clase)
+                    lexema = m.group(clase)
+                    col_fin = m.end() - inicio_linea
+                    if len(lexema) > 31:
+                        errores.append(ErrorLexico(linea, inicio - inicio_linea + 1, "Identificador excede 31 caracteres (truncado)"))
+                        lexema = lexema[:31]
+                    if indice is None:
+                        tokens.append(Token(palabras_clave.get(lexema, TipoToken.ID), lexema, linea, inicio - inicio_linea + 1, col_fin))
+                    else:
+                        tipo = palabras_clave.get(lexema, TipoToken.ID)
+                        if tipo == TipoToken.ID:
+                            lexema = indice.registrar(lexema, self.tokens_previos + len(tokens), linea)
+                        tokens.append(Token(tipo, lexema, linea, inicio - inicio_linea + 1, col_fin))
+
+                elif clase == 'OP':
+                    col_inicio = m.start(clase) - inicio_linea + 1
+                    lexema = m.group(clase)
+                    if len(lexema) == 2:
+                        tokens.append(Token(dobles[lexema], lexema, linea, col_inicio, col_inicio + 2))
+                    else:
+                        tokens.append(Token(simples[lexema], lexema, linea, col_inicio, col_inicio + 1))
+
+                elif clase == 'SANGRIA':
+                    # NEWLINE (en la columna del '#' si hubo comentario, igual que el motor clásico)
+                    col = m.start('NL') - inicio_linea + 1
+                    tokens.append(Token(TipoToken.NUEVA_LINEA, "\\n", linea, col, col))
+                    linea += 1
+                    vacias = m.group('VACIAS')
+                    if vacias:
+                        linea += vacias.count('\n')
+                    inicio_linea = m.start(clase)
+                    if m.end() < longitud:
+                        sangria = m.group(clase)
+                        espacios = len(sangria) + 3 * sangria.count('\t')
+                        if espacios != pila[-1]:
+                            self.linea = linea
+                            self.procesar_indentacion(espacios)
+
+                elif clase == 'NUM':
+                    inicio = m.start(clase)
+                    lexema = m.group(clase)
+                    col_fin = m.end() - inicio_linea
+                    tipo = TipoToken.NUMERO_ENTERO
+                    if '.' in lexema:
+                        tipo = TipoToken.NUMERO_FLOTANTE
+                        if lexema[-1] == '.':
+                            errores.append(ErrorLexico(linea, col_fin + 1, "Número flotante mal formado (se esperaba dígito tras punto)"))
+                    tokens.append(Token(tipo, lexema, linea, inicio - inicio_linea + 1, col_fin))
+
+                elif clase == 'CAD':
+                    col_inicio = m.start(clase) - inicio_linea + 1
+                    lexema = m.group(clase)
+                    if len(lexema) == 1 or lexema[-1] != '"':
+                        errores.append(ErrorLexico(linea, col_inicio, "Cadena sin cerrar antes de fin de línea"))
+                        lexema += '"'
+                    tokens.append(Token(TipoToken.CADENA_LITERAL, lexema[1:], linea, col_inicio, m.end() - inicio_linea))
+
+                elif clase == 'DESC':
+                    # La racha solo sigue más allá de la coincidencia con un '!' suelto o
+                    # un carácter numérico no ASCII (ej. '½'): eso lo resuelve el escáner
+                    inicio = m.start(clase)
+                    fin = m.end()
+                    extendida = fin < longitud and (fuente[fin] == '!' or (fuente[fin] > '\x7f' and not fuente[fin].isalpha()))
+                    if extendida:
+                        fin = self.fin_caracteres_desconocidos(fin)
+                    columna = inicio - inicio_linea + 1
+                    errores.append(ErrorLexico(linea, columna, self.mensaje_desconocidos(inicio, fin, columna)))
+                    if extendida and fin != m.end():
+                        pos = fin
+                        break
+
+                else:
+                    # Número o IDU que sigue con un carácter no ASCII, o '!' suelto:
+                    # un paso del escáner clásico
+                    # y se reanuda la expresión maestra donde este terminó
+                    inicio = m.start(clase)
+                    self.posicion = inicio
+                    self.linea = linea
+                    self.inicio_linea = inicio_linea
+                    self.escanear_caracter(fuente[inicio])
+                    pos = self.posicion
+                    break
+            else:
+                pos = longitud
+
+        self.posicion = pos
+        self.linea = linea
+        self.inicio_linea = pos
+
+    def contar_indentacion(self):
+        contador = 0
+        pos_temporal = self.posicion
+        
+        # Calcular espacios (Tabs = 4 espacios estándar)
+        while pos_temporal < self.longitud and self.fuente[pos_temporal] in [' ', '\t']:
+            if self.fuente[pos_temporal] == '\t':
+                contador += 4
+            else:
+                contador += 1
+            pos_temporal += 1
+        
+        # Ajustar posición real del puntero
+        self.posicion = pos_temporal
+        return contador
+
+    def procesar_indentacion(self, espacios):
+        nivel_actual = self.pila_indentacion[-1]
+        
+        if espacios > nivel_actual:
+            # Aumenta nivel -> INDENT
+            self.pila_indentacion.append(espacios)
+            self.tokens.append(Token(TipoToken.INDENTAR, "", self.linea, 1, espacios))
+        
+        elif espacios < nivel_actual:
+            # Disminuye nivel -> DEDENT(s)
+            while espacios < self.pila_indentacion[-1]:
+                self.pila_indentacion.pop()
+                self.tokens.append(Token(TipoToken.DESINDENTAR, "", self.linea, 1, espacios))
+                if len(self.pila_indentacion) == 0: 
+                    self.pila_indentacion.append(0)
+                    break
+            
+            # Error de Indentación: Si bajó pero no coincidió con ningún nivel previo
+            if self.pila_indentacion[-1] != espacios:
+                self.errores.append(ErrorLexico(self.linea, 1, "Indentación inválida (no coincide con niveles previos)"))
+                # Recuperación: forzar el nivel al más cercano (ya hecho por el while)
+
+    def saltar_comentario(self):
+        # Ignorar hasta el salto de línea, pero NO consumir el \n (para que el loop principal lo vea).
+        # El comentario no ocupa columnas: el NEWLINE que sigue queda en la columna del '#'
+        fin = self.fuente.find('\n', self.posicion)
+        if fin == -1:
+            fin = self.longitud
+        self.inicio_linea += fin - self.posicion
+        self.posicion = fin
+
+    def escanear_identificador(self):
+        pos_inicio = self.posicion
+        col_inicio = pos_inicio - self.inicio_linea + 1
+        
+        while self.posicion < self.longitud and (self.fuente[self.posicion].isalnum() or self.fuente[self.posicion] == '_'):
+            self.posicion += 1
+        
+        lexema = self.fuente[pos_inicio:self.posicion]
+        
+        # Validación longitud máxima 31
+        if len(lexema) > 31:
+            self.errores.append(ErrorLexico(self.linea, col_inicio, "Identificador excede 31 caracteres (truncado)"))
+            lexema = lexema[:31] # Truncar identificador
+
+        tipo_token = self.palabras_clave.get(lexema, TipoToken.ID)
+        
+        # Caso especial: true/false son literales booleanos, no palabras clave de control
+        if lexema in ["true", "false"]:
+            tipo_token = TipoToken.BOOLEANO_LITERAL
+        elif tipo_token == TipoToken.ID and self.indice is not None:
+            lexema = self.indice.registrar(lexema, self.tokens_previos + len(self.tokens), self.linea)
+
+        self.tokens.append(Token(tipo_token, lexema, self.linea, col_inicio, self.posicion - self.inicio_linea))
+
+    def escanear_numero(self):
+        pos_inicio = self.posicion
+        col_inicio = pos_inicio - self.inicio_linea + 1
+        es_flotante = False
+        
+        # Parte entera
+        while self.posicion < self.longitud and self.fuente[self.posicion].isdigit():
+            self.posicion += 1
+            
+        # Parte decimal
+        if self.posicion < self.longitud and self.fuente[self.posicion] == '.':
+            es_flotante = True
+            self.posicion += 1
+            
+            # Verificar digitos tras el punto
+            if self.posicion >= self.longitud or not self.fuente[self.posicion].isdigit():
+                 self.errores.append(ErrorLexico(self.linea, self.posicion - self.inicio_linea + 1, "Número flotante mal formado (se esperaba dígito tras punto)"))
+            
+            while self.posicion < self.longitud and self.fuente[self.posicion].isdigit():
+                self.posicion += 1
+        
+        lexema = self.fuente[pos_inicio:self.posicion]
+        tipo = TipoToken.NUMERO_FLOTANTE if es_flotante else TipoToken.NUMERO_ENTERO
+        self.tokens.append(Token(tipo, lexema, self.linea, col_inicio, self.posicion - self.inicio_linea))
+
+    def escanear_cadena(self):
+        col_inicio = self.posicion - self.inicio_linea + 1
+        self.posicion += 1 # Comilla inicial
+        pos_inicio_contenido = self.posicion
+        
+        while self.posicion < self.longitud and self.fuente[self.posicion] != '"' and self.fuente[self.posicion] != '\n':
+            self.posicion += 1
+            
+        if self.posicion >= self.longitud or self.fuente[self.posicion] == '\n':
+            # Error: String sin cerrar antes de fin de línea
+            self.errores.append(ErrorLexico(self.linea, col_inicio, "Cadena sin cerrar antes de fin de línea"))
+            lexema = self.fuente[pos_inicio_contenido:self.posicion]
+            # Recuperamos emitiendo el token hasta donde llegó
+            self.tokens.append(Token(TipoToken.CADENA_LITERAL, lexema + '"', self.linea, col_inicio, self.posicion - self.inicio_linea))
+            return
+
+        lexema = self.fuente[pos_inicio_contenido:self.posicion]
+        self.posicion += 1 # Comilla cierre
+        self.tokens.append(Token(TipoToken.CADENA_LITERAL, lexema + '"', self.linea, col_inicio, self.posicion - self.inicio_linea))
+
+    def escanear_operador(self, caracter):
+        col_inicio = self.posicion - self.inicio_linea + 1
+        siguiente_char = self.fuente[self.posicion + 1] if self.posicion + 1 < self.longitud else ''
+        dobles = OPERADORES_DOBLES
+        simples = OPERADORES_SIMPLES
+
+        # Intentar coincidencia doble primero (ej: ==)
+        combinacion = caracter + siguiente_char
+        if combinacion in dobles:
+            self.tokens.append(Token(dobles[combinacion], combinacion, self.linea, col_inicio, col_inicio + 2))
+            self.posicion += 2
+            return True
+        
+        # Intentar coincidencia simple (ej: =)
+        if caracter in simples:
+            self.tokens.append(Token(simples[caracter], caracter, self.linea, col_inicio, col_inicio + 1))
+            self.posicion += 1
+            return True
+            
+        return False
+
+# ==========================================
+# 2.1 LECTURA POR BLOQUES (STREAMING)
+# ==========================================
+
+TAM_BLOQUE_LECTURA = 1 << 16  # Caracteres leídos por cada llamada a read()
+
+def intercalar_resultados(tokens, errores):
+    # Mezcla tokens y errores en orden de línea (los errores primero en caso de empate)
+    if not errores:
+        return tokens
+    return heapq.merge(errores, tokens, key=lambda elemento: elemento.linea)
+
+def iter_tokens(archivo, motor=MOTOR_CLASICO, tam_bloque=TAM_BLOQUE_LECTURA, estadisticas=None,
+                max_errores=None, modo_limite=LIMITE_ABORTAR, indice=None):
+    # Generador: lee el archivo por bloques y produce Token y ErrorLexico a medida
+    # que avanza. Solo se mantiene en memoria el bloque actual; la pila de
+    # indentación y el número de línea pasan de un bloque al siguiente.
+    escanner = AnalizadorLexico("", motor, estadisticas, max_errores, modo_limite, indice)
+    pendiente = []  # Fragmentos de la última línea incompleta
+
+    while not escanner.abortado:
+        bloque = archivo.read(tam_bloque)
+        if not bloque:
+            break
+        corte = bloque.rfind('\n') + 1
+        if corte == 0:
+            pendiente.append(bloque)
+            continue
+        pendiente.append(bloque[:corte])
+        escanner.cargar_bloque(''.join(pendiente).replace('\r\n', '\n'))
+        pendiente = [bloque[corte:]]
+        if estadisticas is None:
+            escanner.escanear()
+        else:
+            estadisticas.medir_bloque(escanner)
+        yield from intercalar_resultados(escanner.tokens, escanner.errores)
+
+    # Última línea (con el salto final que también agrega el constructor) y EOF;
+    # si se abortó por el límite de errores solo falta cerrar los bloques
+    escanner.cargar_bloque('' if escanner.abortado else ''.join(pendiente).replace('\r\n', '\n') + '\n')
+    if estadisticas is None:
+        escanner.escanear()
+        tokens, errores = escanner.cerrar_bloques()
+    else:
+        tokens, errores = estadisticas.medir_bloque(escanner, final=True)
+    yield from intercalar_resultados(tokens, errores)
+
+def piezas_salida(lineas_tokens):
+    # Texto del .out en piezas (una por token); los ErrorLexico se ignoran
+    primera = True
+    for linea in lineas_tokens:
+        if isinstance(linea, ErrorLexico):
+            continue
+        if primera:
+            primera = False
+            yield str(linea)
+        else:
+            yield "\n" + str(linea)
+
+def escribir_salida(lineas_tokens, nombre_salida, omitir_si_igual=False):
+    # Escribe el archivo .out línea por línea; acepta cualquier iterable de cadenas
+    # o de tokens, así puede alimentarse directamente desde iter_tokens().
+    # Con omitir_si_igual se compara contra el archivo existente mientras se genera
+    # y, si el contenido sería idéntico, no se reescribe (devuelve False).
+    piezas = piezas_salida(lineas_tokens)
+    if not (omitir_si_igual and os.path.exists(nombre_salida)):
+        with open(nombre_salida, "w", encoding='utf-8') as f:
+            for pieza in piezas:
+                f.write(pieza)
+        return True
+
+    coincidentes = 0
+    pieza = ""
+    with open(nombre_salida, "r", encoding='utf-8', errors='surrogateescape') as existente:
+        for pieza in piezas:
+            if existente.read(len(pieza)) != pieza:
+                break
+            coincidentes += len(pieza)
+        else:
+            if not existente.read(1):
+                return False
+            pieza = ""
+
+    # Hay diferencias: se copia el prefijo ya verificado y se sigue con el resto
+    temporal = nombre_salida + ".tmp"
+    with open(nombre_salida, "r", encoding='utf-8', errors='surrogateescape') as existente, \
+            open(temporal, "w", encoding='utf-8') as f:
+        while coincidentes:
+            bloque = existente.read(min(coincidentes, TAM_BLOQUE_LECTURA))
+            f.write(bloque)
+            coincidentes -= len(bloque)
+        f.write(pieza)
+        for pieza in piezas:
+            f.write(pieza)
+    os.replace(temporal, nombre_salida)
+    return True
+
+# ==========================================
+# 2.2 ANÁLISIS INCREMENTAL
+# ==========================================
+
+class AnalisisCancelado(Exception):
+    # Se lanza cuando se pide cancelar un análisis en curso
+    pass
+
+LINEAS_POR_AVISO = 2048  # Cada cuántas líneas se informa progreso y se revisa la cancelación
+
+class AnalizadorIncremental:
+    # Mantiene el resultado del último análisis junto con un punto de control por
+    # línea (pila de indentación e índices de token/error al inicio de la línea).
+    # Tras una edición solo se vuelven a escanear las líneas dañadas: el escaneo
+    # se detiene en cuanto la pila coincide con la del punto de control anterior,
+    # y los tokens nuevos se insertan en la lista existente. El índice de
+    # identificadores se actualiza con el mismo empalme.
+    def __init__(self, motor=MOTOR_COMPILADO, instrumentar=False):
+        self.motor = motor
+        self.instrumentar = instrumentar
+        self.estadisticas = None  # EstadisticasLexicas del último análisis (si se instrumenta)
+        self.lineas = []
+        self.tokens = []
+        self.errores = []
+        self.indice = IndiceIdentificadores()  # Usos de cada identificador en self.tokens
+        self.indice.nuevo_archivo()
+        # Puntos de control: uno por línea más uno final (estado antes de EOF)
+        self.pilas = [(0,)]
+        self.indices_tokens = [0]
+        self.indices_errores = [0]
+        self.lineas_reanalizadas = 0  # Estadística del último análisis
+
+    def analizar(self, codigo_fuente, progreso=None, cancelacion=None):
+        # progreso: función opcional que recibe la fracción completada (0 a 1).
+        # cancelacion: threading.Event opcional; si se activa se lanza AnalisisCancelado
+        # y el estado anterior queda intacto (el empalme se hace al final).
+        nuevas = codigo_fuente.replace('\r\n', '\n').split('\n')
+        viejas = self.lineas
+
+        # Líneas iguales al principio y al final (la zona dañada queda en medio)
+        limite = min(len(viejas), len(nuevas))
+        inicio = 0
+        while inicio < limite and viejas[inicio] == nuevas[inicio]:
+            inicio += 1
+        if inicio == len(viejas) == len(nuevas):
+            self.lineas_reanalizadas = 0
+            return self.tokens, self.errores
+        estadisticas = EstadisticasLexicas(self.motor) if self.instrumentar else None
+        inicio_reloj = time.perf_counter()
+        sufijo = 0
+        while sufijo < limite - inicio and viejas[-1 - sufijo] == nuevas[-1 - sufijo]:
+            sufijo += 1
+        desfase = len(nuevas) - len(viejas)
+
+        escanner = AnalizadorLexico("", self.motor, estadisticas)
+        escanner.pila_indentacion = list(self.pilas[inicio])
+        escanner.linea = inicio + 1
+
+        nuevos_tokens = []
+        nuevos_errores = []
+        nuevas_pilas = []
+        nuevos_indices_tokens = []
+        nuevos_indices_errores = []
+        base_tokens = self.indices_tokens[inicio]
+        base_errores = self.indices_errores[inicio]
+
+        i = inicio
+        fin_viejo = len(viejas) + 1  # Sin convergencia se reemplaza todo hasta EOF
+        avisar = progreso is not None or cancelacion is not None
+        while i < len(nuevas):
+            if avisar and (i - inicio) % LINEAS_POR_AVISO == 0:
+                if cancelacion is not None and cancelacion.is_set():
+                    raise AnalisisCancelado()
+                if progreso is not None:
+                    progreso((i - inicio) / (len(nuevas) - inicio))
+            pila = tuple(escanner.pila_indentacion)
+            if i >= len(nuevas) - sufijo and pila == self.pilas[i - desfase]:
+                # El estado converge con el análisis anterior: el resto se reutiliza
+                fin_viejo = i - desfase
+                break
+            nuevas_pilas.append(pila)
+            nuevos_indices_tokens.append(base_tokens + len(nuevos_tokens))
+            nuevos_indices_errores.append(base_errores + len(nuevos_errores))
+
+            escanner.cargar_bloque(nuevas[i] + '\n')
+            escanner.escanear()
+            nuevos_tokens.extend(escanner.tokens)
+            nuevos_errores.extend(escanner.errores)
+            i += 1
+        else:
+            # Se llegó al final: punto de control de EOF y cierre de bloques
+            nuevas_pilas.append(tuple(escanner.pila_indentacion))
+            nuevos_indices_tokens.append(base_tokens + len(nuevos_tokens))
+            nuevos_indices_errores.append(base_errores + len(nuevos_errores))
+            escanner.tokens = []
+            escanner.errores = []
+            escanner.cerrar_bloques()
+            nuevos_tokens.extend(escanner.tokens)
+            nuevos_errores.extend(escanner.errores)
+        self.lineas_reanalizadas = i - inicio
+
+        # Empalmar tokens y errores
+        if fin_viejo <= len(viejas):
+            fin_tokens = self.indices_tokens[fin_viejo]
+            fin_errores = self.indices_errores[fin_viejo]
+        else:
+            fin_tokens = len(self.tokens)
+            fin_errores = len(self.errores)
+        self.tokens[base_tokens:fin_tokens] = nuevos_tokens
+        self.errores[base_errores:fin_errores] = nuevos_errores
+        self.indice.reemplazar_tokens(base_tokens, fin_tokens, nuevos_tokens, desfase)
+
+        # Lo reutilizado después de la zona dañada se desplaza en índices y líneas
+        if fin_viejo <= len(viejas):
+            ajuste_tokens = len(nuevos_tokens) - (fin_tokens - base_tokens)
+            ajuste_errores = len(nuevos_errores) - (fin_errores - base_errores)
+            cola_tokens = self.indices_tokens[fin_viejo:]
+            cola_errores = self.indices_errores[fin_viejo:]
+            if ajuste_tokens:
+                cola_tokens = [indice + ajuste_tokens for indice in cola_tokens]
+            if ajuste_errores:
+                cola_errores = [indice + ajuste_errores for indice in cola_errores]
+            if desfase:
+                for token in self.tokens[base_tokens + len(nuevos_tokens):]:
+                    token.linea += desfase
+                for error in self.errores[base_errores + len(nuevos_errores):]:
+                    error.linea += desfase
+            nuevas_pilas.extend(self.pilas[fin_viejo:])
+            nuevos_indices_tokens.extend(cola_tokens)
+            nuevos_indices_errores.extend(cola_errores)
+
+        self.pilas[inicio:] = nuevas_pilas
+        self.indices_tokens[inicio:] = nuevos_indices_tokens
+        self.indices_errores[inicio:] = nuevos_indices_errores
+        self.lineas = nuevas
+        if estadisticas is not None:
+            # Los tiempos por escáner cubren solo lo re-escaneado; los conteos, el resultado completo
+            estadisticas.tiempo_total = time.perf_counter() - inicio_reloj
+            estadisticas.registrar_tokens(self.tokens)
+            estadisticas.total_errores = len(self.errores)
+            self.estadisticas = estadisticas
+        if progreso is not None:
+            progreso(1.0)
+        return self.tokens, self.errores
+
+# ==========================================
+# 2.3 INSTRUMENTACIÓN
+# ==========================================
+
+# Métodos del analizador cuyo número de llamadas y tiempo acumulado se mide.
+# El motor compilado resuelve identificadores, números, cadenas, operadores y
+# comentarios dentro de PATRON_LEXEMA sin llamar a esos métodos: en ese caso
+# cada coincidencia cuenta como una llamada al escáner equivalente, y su tiempo
+# (buscarla y procesarla) se suma a ese escáner. procesar_indentacion sí se
+# llama, pero solo en las líneas donde cambia la sangría.
+METODOS_INSTRUMENTADOS = (
+    'escanear_identificador', 'escanear_numero', 'escanear_cadena',
+    'escanear_operador', 'procesar_indentacion', 'saltar_comentario'
+)
+
+# Clase de PATRON_LEXEMA -> escáner del motor clásico que hace el mismo trabajo
+ESCANER_DE_CLASE = {
+    'ID': 'escanear_identificador', 'IDU': 'escanear_identificador', 'NUM': 'escanear_numero',
+    'CAD': 'escanear_cadena', 'OP': 'escanear_operador',
+}
+
+class EstadisticasLexicas:
+    # Estadísticas opcionales de un análisis. Para activarlas se pasa una instancia
+    # a AnalizadorLexico; sin ella el analizador no ejecuta ningún código extra.
+    def __init__(self, motor=None):
+        self.motor = motor
+        self.llamadas = {nombre: 0 for nombre in METODOS_INSTRUMENTADOS}
+        self.tiempos = {nombre: 0.0 for nombre in METODOS_INSTRUMENTADOS}
+        self.tokens_por_tipo = {}
+        self.total_tokens = 0
+        self.total_errores = 0
+        self.profundidad_maxima = 0
+        self.profundidad_actual = 0
+        self.tiempo_total = 0.0
+        self.tiempo_envolturas = 0.0  # Tiempo ya medido por las envolturas (para no contarlo dos veces)
+
+    def instrumentar(self, escanner):
+        # Reemplaza los métodos en la instancia (no en la clase) por envolturas que miden
+        reloj = time.perf_counter
+        for nombre in METODOS_INSTRUMENTADOS:
+            original = getattr(escanner, nombre)
+
+            def envoltura(*args, _original=original, _nombre=nombre):
+                inicio = reloj()
+                try:
+                    return _original(*args)
+                finally:
+                    transcurrido = reloj() - inicio
+                    self.tiempos[_nombre] += transcurrido
+                    self.tiempo_envolturas += transcurrido
+                    self.llamadas[_nombre] += 1
+
+            setattr(escanner, nombre, envoltura)
+
+    def medir_coincidencias(self, fuente, pos):
+        # Reemplaza a PATRON_LEXEMA.finditer en el motor compilado. El tiempo desde
+        # la coincidencia anterior hasta terminar de procesar esta se suma al escáner
+        # de su clase, menos lo que ya midieron las envolturas (procesar_indentacion
+        # o el respaldo clásico). Los saltos de línea sin comentario no son de ningún
+        # escáner, igual que en el motor clásico.
+        reloj = time.perf_counter
+        llamadas = self.llamadas
+        tiempos = self.tiempos
+        anterior = reloj()
+        envolturas = self.tiempo_envolturas
+        for m in PATRON_LEXEMA.finditer(fuente, pos):
+            yield m
+            ahora = reloj()
+            clase = m.lastgroup
+            nombre = ESCANER_DE_CLASE.get(clase)
+            if clase == 'IDU' and not fuente[m.start(clase)].isalpha():
+                nombre = None  # Ej. '½': lo mide la envoltura del respaldo clásico
+            if nombre is not None:
+                llamadas[nombre] += 1
+            elif clase == 'SANGRIA' and self.registrar_comentarios(fuente[m.start('NL'):m.start(clase)]):
+                nombre = 'saltar_comentario'  # Comentario al final de la línea o líneas de solo comentario
+            if nombre is not None:
+                tiempos[nombre] += ahora - anterior - (self.tiempo_envolturas - envolturas)
+            anterior = ahora
+            envolturas = self.tiempo_envolturas
+
+    def registrar_comentarios(self, lineas):
+        # Cuenta una llamada a saltar_comentario por cada comentario en estas líneas
+        # (solo espacios y comentarios) y devuelve cuántos hubo
+        cantidad = sum('#' in linea for linea in lineas.split('\n'))
+        self.llamadas['saltar_comentario'] += cantidad
+        return cantidad
+
+    def medir_analisis(self, escanner):
+        inicio = time.perf_counter()
+        escanner.escanear()
+        tokens, errores = escanner.cerrar_bloques()
+        self.tiempo_total += time.perf_counter() - inicio
+        self.registrar_tokens(tokens)
+        self.total_errores += len(errores)
+        return tokens, errores
+
+    def medir_bloque(self, escanner, final=False):
+        inicio = time.perf_counter()
+        escanner.escanear()
+        if final:
+            escanner.cerrar_bloques()
+        self.tiempo_total += time.perf_counter() - inicio
+        self.registrar_tokens(escanner.tokens)
+        self.total_errores += len(escanner.errores)
+        return escanner.tokens, escanner.errores
+
+    def registrar_tokens(self, tokens):
+        conteo = self.tokens_por_tipo
+        profundidad = self.profundidad_actual
+        maxima = self.profundidad_maxima
+        for token in tokens:
+            tipo = token.tipo
+            conteo[tipo] = conteo.get(tipo, 0) + 1
+            if tipo == TipoToken.INDENTAR:
+                profundidad += 1
+                if profundidad > maxima:
+                    maxima = profundidad
+            elif tipo == TipoToken.DESINDENTAR:
+                profundidad -= 1
+        self.profundidad_actual = profundidad
+        self.profundidad_maxima = maxima
+        self.total_tokens += len(tokens)
+
+    def combinar(self, otra):
+        # Suma las estadísticas de otro análisis (ej. de otro archivo en modo lote)
+        for nombre in METODOS_INSTRUMENTADOS:
+            self.llamadas[nombre] += otra.llamadas[nombre]
+            self.tiempos[nombre] += otra.tiempos[nombre]
+        for tipo, cantidad in otra.tokens_por_tipo.items():
+            self.tokens_por_tipo[tipo] = self.tokens_por_tipo.get(tipo, 0) + cantidad
+        self.total_tokens += otra.total_tokens
+        self.total_errores += otra.total_errores
+        self.profundidad_maxima = max(self.profundidad_maxima, otra.profundidad_maxima)
+        self.tiempo_total += otra.tiempo_total
+
+    def como_dict(self):
+        return {
+            "motor": self.motor,
+            "tiempo_total_s": self.tiempo_total,
+            "total_tokens": self.total_tokens,
+            "total_errores": self.total_errores,
+            "profundidad_maxima_indentacion": self.profundidad_maxima,
+            "escaneres": {
+                nombre: {"llamadas": self.llamadas[nombre], "tiempo_s": self.tiempos[nombre]}
+                for nombre in METODOS_INSTRUMENTADOS
+            },
+            "tokens_por_tipo": dict(sorted(self.tokens_por_tipo.items(), key=lambda par: -par[1])),
+        }
+
+    def como_json(self):
+        return json.dumps(self.como_dict(), indent=2, ensure_ascii=False)
+
+    def __str__(self):
+        # Resumen legible (panel de estadísticas de la interfaz)
+        lineas = [f"Tiempo total: {self.tiempo_total * 1000:.1f} ms | Tokens: {self.total_tokens} | "
+                  f"Errores: {self.total_errores} | Profundidad máx.: {self.profundidad_maxima}"]
+        for nombre in METODOS_INSTRUMENTADOS:
+            lineas.append(f"{nombre:<24} {self.llamadas[nombre]:>9} llamadas {self.tiempos[nombre] * 1000:>10.1f} ms")
+        lineas.append("Tokens por tipo: " + ", ".join(
+            f"{tipo}={cantidad}" for tipo, cantidad in sorted(self.tokens_por_tipo.items(), key=lambda par: -par[1])))
+        return "\n".join(lineas)
+
+# ==========================================
+# 2.7 ÍNDICE DE IDENTIFICADORES (REFERENCIAS CRUZADAS)
+# ==========================================
+
+ORIGEN_SIN_ARCHIVO = "<fuente>"  # Nombre del "archivo" cuando se indexa un texto suelto
+
+class Referencias:
+    # Usos de un identificador en un solo arreglo compacto, tres enteros por uso:
+    # archivo (índice en IndiceIdentificadores.archivos), posición del token en
+    # ese archivo (la misma que su línea en el .out menos 1) y línea en la fuente.
+    __slots__ = ('nombre', 'usos')
+
+    def __init__(self, nombre, usos=None):
+        self.nombre = nombre
+        self.usos = array('I') if usos is None else usos
+
+    def __len__(self):
+        return len(self.usos) // 3
+
+    def __getitem__(self, indice):
+        # El uso número `indice` como (archivo, token, línea), sin recorrer nada
+        base = 3 * indice
+        usos = self.usos
+        return usos[base], usos[base + 1], usos[base + 2]
+
+class IndiceIdentificadores:
+    # Nombre de identificador -> arreglo de usos (el de Referencias). Se llena
+    # como subproducto del escaneo (AnalizadorLexico/iter_tokens con indice=...)
+    # y cada nombre se interna: los tokens ID de ese nombre comparten la misma
+    # cadena. Guardar el arreglo directamente (y no un objeto por nombre) deja
+    # fuera del recolector de basura a los miles de nombres de un proyecto.
+    # Puede abarcar varios archivos y combinarse con otros índices.
+    def __init__(self):
+        self.archivos = []
+        self.posicion_archivo = {}  # Ruta -> índice en archivos
+        self.referencias = {}  # Nombre -> array('I') de usos
+        self.actual = -1  # Archivo al que se asignan los usos que se registran
+
+    def nuevo_archivo(self, ruta=ORIGEN_SIN_ARCHIVO):
+        self.actual = len(self.archivos)
+        self.archivos.append(ruta)
+        self.posicion_archivo[ruta] = self.actual
+        return self.actual
+
+    def registrar(self, nombre, indice_token, linea):
+        # Devuelve la cadena internada del nombre para usarla como valor del token
+        nombre = sys.intern(nombre)
+        usos = self.referencias.get(nombre)
+        if usos is None:
+            usos = self.referencias[nombre] = array('I')
+        usos.extend((self.actual, indice_token, linea))
+        return nombre
+
+    def agregar_tokens(self, tokens, ruta=ORIGEN_SIN_ARCHIVO):
+        # Indexa una secuencia de tokens ya analizada (lista, TokenBuffer, LectorBinario...)
+        self.nuevo_archivo(ruta)
+        identificador = TipoToken.ID
+        for posicion, token in enumerate(tokens):
+            if token.tipo == identificador:
+                self.registrar(token.valor, posicion, token.linea)
+        return self
+
+    @classmethod
+    def desde_tokens(cls, tokens, ruta=ORIGEN_SIN_ARCHIVO):
+        return cls().agregar_tokens(tokens, ruta)
+
+    def reemplazar_tokens(self, primero, fin, tokens_nuevos, desfase=0):
+        # Índice de un solo archivo cuyos tokens [primero, fin) se reemplazaron por
+        # tokens_nuevos (el empalme de AnalizadorIncremental). Solo se recorren los
+        # tokens nuevos; de los usos ya indexados se tocan los de los nombres que
+        # aparecen desde `primero`: los del rango se quitan y los posteriores se
+        # corren de posición y `desfase` líneas, igual que sus tokens.
+        ajuste = len(tokens_nuevos) - (fin - primero)
+        agregados = {}
+        identificador = TipoToken.ID
+        for posicion, token in enumerate(tokens_nuevos, primero):
+            if token.tipo == identificador:
+                nombre = sys.intern(token.valor)
+                usos = agregados.get(nombre)
+                if usos is None:
+                    usos = agregados[nombre] = array('I')
+                usos.extend((self.actual, posicion, token.linea))
+        tocados = []
+        corre = ajuste or desfase
+        for nombre, usos in self.referencias.items():
+            if nombre in agregados or primero <= usos[-2] and usos[1] < fin:
+                tocados.append(nombre)
+            elif corre and usos[1] >= fin:
+                # Todos sus usos están después del rango: solo se corren
+                for k in range(1, len(usos), 3):
+                    usos[k] += ajuste
+                    usos[k + 1] += desfase
+        for nombre in tocados:
+            usos = self.referencias[nombre]
+            # Los usos están ordenados por posición
+            posiciones = usos[1::3]
+            desde = bisect_left(posiciones, primero)
+            cola = usos[3 * bisect_left(posiciones, fin, desde):]
+            if cola and ajuste:
+                cola[1::3] = array('I', [posicion + ajuste for posicion in cola[1::3]])
+            if cola and desfase:
+                cola[2::3] = array('I', [linea + desfase for linea in cola[2::3]])
+            del usos[3 * desde:]
+            usos.extend(agregados.pop(nombre, ()))
+            usos.extend(cola)
+            if not usos:
+                del self.referencias[nombre]
+        self.referencias.update(agregados)
+        return self
+
+    def __len__(self):
+        return len(self.referencias)
+
+    def __contains__(self, nombre):
+        return nombre in self.referencias
+
+    def buscar(self, nombre):
+        # Referencias del nombre (vacías si no aparece): una consulta al diccionario
+        return Referencias(nombre, self.referencias.get(nombre))
+
+    def total_usos(self):
+        return sum(map(len, self.referencias.values())) // 3
+
+    def mas_frecuentes(self, cantidad=10):
+        return [(nombre, len(usos) // 3) for nombre, usos in
+                heapq.nlargest(cantidad, self.referencias.items(), key=lambda par: len(par[1]))]
+
+    def como_dict(self, cantidad=10):
+        # Resumen de símbolos; un identificador usado una sola vez suele ser un error de tipeo
+        return {
+            "archivos": len(self.archivos),
+            "identificadores": len(self.referencias),
+            "usos": self.total_usos(),
+            "usados_una_vez": sum(1 for usos in self.referencias.values() if len(usos) == 3),
+            "mas_frecuentes": self.mas_frecuentes(cantidad),
+        }
+
+    def quitar_archivos(self, quitar):
+        # Elimina los usos de los archivos indicados (por índice) y renumera el resto
+        nuevos = {}
+        archivos = []
+        for posicion, ruta in enumerate(self.archivos):
+            if posicion not in quitar:
+                nuevos[posicion] = len(archivos)
+                archivos.append(ruta)
+        for nombre, viejos in list(self.referencias.items()):
+            usos = array('I')
+            for k in range(0, len(viejos), 3):
+                archivo = nuevos.get(viejos[k])
+                if archivo is not None:
+                    usos.extend((archivo, viejos[k + 1], viejos[k + 2]))
+            if usos:
+                self.referencias[nombre] = usos
+            else:
+                del self.referencias[nombre]
+        self.archivos = archivos
+        self.posicion_archivo = {ruta: posicion for posicion, ruta in enumerate(archivos)}
+        self.actual = len(archivos) - 1
+
+    def combinar(self, otro):
+        # Agrega los usos de otro índice. Si un archivo está en ambos se conservan
+        # los de `otro`, que se asume más reciente (re-indexar un archivo lo reemplaza).
+        repetidos = {self.posicion_archivo[ruta] for ruta in otro.archivos if ruta in self.posicion_archivo}
+        if repetidos:
+            self.quitar_archivos(repetidos)
+        desplazamiento = len(self.archivos)
+        for posicion, ruta in enumerate(otro.archivos, desplazamiento):
+            self.archivos.append(ruta)
+            self.posicion_archivo[ruta] = posicion
+        for nombre, usos in otro.referencias.items():
+            if desplazamiento:
+                usos = array('I', usos)
+                usos[::3] = array('I', [archivo + desplazamiento for archivo in usos[::3]])
+            propios = self.referencias.get(nombre)
+            if propios is None:
+                # Copia propia: extender este índice no debe modificar a `otro`
+                self.referencias[sys.intern(nombre)] = usos if desplazamiento else array('I', usos)
+            else:
+                propios.extend(usos)
+        self.actual = len(self.archivos) - 1
+        return self
+
+# ==========================================
+# 2.9 ANÁLISIS DE MUCHAS FUENTES CORTAS
+# ==========================================
+
+# Con miles de fragmentos pequeños (ej. un servidor de evaluación) pesa más el
+# costo fijo por fuente que el escaneo: crear el analizador y sus listas, y las
+# pasadas del recolector de basura que disparan los objetos recién creados.
+# analizar_varios reutiliza un solo analizador (AnalizadorLexico.reiniciar),
+# deja el recolector apagado durante el lote y guarda todos los resultados juntos.
+
+class ResultadosLote:
+    # Resultados de muchas fuentes en una lista plana de tokens y otra de errores,
+    # con el límite de cada fuente en arreglos compactos: no se crea una lista ni
+    # una tupla por fuente, y agregar una fuente son dos extend hechos en C.
+    # limites_tokens[i] y limites_errores[i] marcan dónde empieza la fuente i.
+    __slots__ = ('tokens', 'errores', 'limites_tokens', 'limites_errores')
+
+    def __init__(self):
+        self.tokens = []
+        self.errores = []
+        self.limites_tokens = array('I', [0])
+        self.limites_errores = array('I', [0])
+
+    def agregar(self, tokens, errores):
+        self.tokens.extend(tokens)
+        self.limites_tokens.append(len(self.tokens))
+        self.errores.extend(errores)
+        self.limites_errores.append(len(self.errores))
+
+    def __len__(self):
+        return len(self.limites_tokens) - 1
+
+    def rango(self, limites, indice):
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("fuente fuera de rango")
+        return limites[indice], limites[indice + 1]
+
+    def tokens_de(self, indice):
+        inicio, fin = self.rango(self.limites_tokens, indice)
+        return self.tokens[inicio:fin]
+
+    def errores_de(self, indice):
+        inicio, fin = self.rango(self.limites_errores, indice)
+        return self.errores[inicio:fin]
+
+    def tuplas(self, indice):
+        # (tipo, valor, línea, col inicio, col fin) de cada token, como en servidor_lexico.py
+        return [(t.tipo, t.valor, t.linea, t.col_inicio, t.col_fin) for t in self.tokens_de(indice)]
+
+    def __getitem__(self, indice):
+        # Mismo par que AnalizadorLexico(fuentes[indice]).analizar()
+        return self.tokens_de(indice), self.errores_de(indice)
+
+def analizar_varios(fuentes, motor=MOTOR_COMPILADO, escanner=None):
+    # ResultadosLote con el análisis de cada fuente, en orden. Con `escanner` se
+    # reutiliza un analizador ya creado (su motor manda sobre `motor`).
+    if escanner is None:
+        escanner = AnalizadorLexico("", motor)
+    resultados = ResultadosLote()
+    # Los tokens no forman ciclos: sin el recolector no se recorren una y otra vez
+    recolector_activo = gc.isenabled()
+    gc.disable()
+    try:
+        for fuente in fuentes:
+            escanner.reiniciar(fuente)
+            resultados.agregar(*escanner.analizar())
+        escanner.reiniciar("")  # No retener los tokens de la última fuente
+    finally:
+        if recolector_activo:
+            gc.enable()
+    return resultados
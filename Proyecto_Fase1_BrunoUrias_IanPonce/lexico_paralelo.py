@@ -0,0 +1,145 @@
+import gc
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from lexico import (TipoToken, Token, ErrorLexico, AnalizadorLexico, TokenBuffer, MOTOR_COMPILADO,
+                    escribir_salida)
+
+# ==========================================
+# 2.6 ANÁLISIS PARALELO DE UN SOLO ARCHIVO
+# ==========================================
+
+# Un archivo grande se corta en fragmentos que se analizan en procesos distintos.
+# Solo se corta antes de una línea con contenido en nivel 0 de indentación: ahí
+# ninguna cadena ni comentario sigue abierto (ambos terminan con la línea) y el
+# analizador secuencial vacía la pila de indentación con DEDENTs en (línea, 1-0).
+# Cada fragmento se analiza con la pila en [0], así que al unir los resultados
+# solo faltan esos DEDENTs, uno por nivel que dejó abierto el fragmento anterior.
+
+PATRON_CORTE = re.compile(r"\n(?=[^\s#])")  # Fin de línea seguido de contenido sin sangría
+TAM_MINIMO_FRAGMENTO = 1 << 18             # Caracteres (256K); menos no compensa el envío al proceso
+FRAGMENTOS_POR_TRABAJADOR = 4               # Más fragmentos que procesos para repartir mejor la carga
+
+def puntos_de_corte(fuente, cantidad):
+    # Posiciones (inicio de línea) donde empieza cada fragmento, la primera es 0
+    cortes = [0]
+    for k in range(1, cantidad):
+        objetivo = max(len(fuente) * k // cantidad, cortes[-1] + 1)
+        m = PATRON_CORTE.search(fuente, objetivo - 1)
+        if m is None:
+            break
+        corte = m.end()
+        if corte > cortes[-1]:
+            cortes.append(corte)
+    return cortes
+
+def dividir_fuente(fuente, trabajadores, tam_minimo=None):
+    # Lista de (texto, línea inicial) que cubre toda la fuente en orden
+    tam_minimo = tam_minimo or TAM_MINIMO_FRAGMENTO
+    cantidad = max(1, min(trabajadores * FRAGMENTOS_POR_TRABAJADOR, len(fuente) // tam_minimo))
+    cortes = puntos_de_corte(fuente, cantidad) + [len(fuente)]
+    fragmentos = []
+    linea = 1
+    for inicio, fin in zip(cortes, cortes[1:]):
+        fragmentos.append((fuente[inicio:fin], linea))
+        linea += fuente.count('\n', inicio, fin)
+    return fragmentos
+
+def analizar_fragmento(texto, linea_inicio, ultimo, motor, como_texto):
+    # Corre en un proceso del pool. Devuelve los tokens (como texto del .out o
+    # como columnas de un TokenBuffer), los errores como tuplas y cuántos niveles
+    # de indentación quedaron abiertos al final del fragmento.
+    escanner = AnalizadorLexico("", motor)
+    escanner.linea = linea_inicio
+    escanner.cargar_bloque(texto)
+    if not como_texto:
+        escanner.tokens = TokenBuffer(texto, linea_inicio)
+
+    # Los tokens no forman ciclos: sin el recolector no se recorren una y otra vez
+    recolector_activo = gc.isenabled()
+    gc.disable()
+    try:
+        escanner.escanear()
+        abiertos = len(escanner.pila_indentacion) - 1
+        if ultimo:
+            escanner.cerrar_bloques()
+        if como_texto:
+            datos = "\n".join(map(str, escanner.tokens))
+        else:
+            buffer = escanner.tokens
+            datos = (buffer.tipos, buffer.inicios, buffer.fines, buffer.valores_distintos)
+        errores = [(error.linea, error.columna, error.mensaje) for error in escanner.errores]
+    finally:
+        if recolector_activo:
+            gc.enable()
+    return datos, errores, abiertos
+
+def resultados_fragmentos(fuente, motor, trabajadores, como_texto, pool=None):
+    # Genera (inicio, línea inicial, resultado) de cada fragmento en orden
+    fragmentos = dividir_fuente(fuente, trabajadores)
+    inicios = [0]
+    for texto, _ in fragmentos[:-1]:
+        inicios.append(inicios[-1] + len(texto))
+    ultimos = [False] * (len(fragmentos) - 1) + [True]
+    argumentos = ([texto for texto, _ in fragmentos], [linea for _, linea in fragmentos], ultimos,
+                  [motor] * len(fragmentos), [como_texto] * len(fragmentos))
+
+    if trabajadores == 1 or len(fragmentos) == 1:
+        resultados = map(analizar_fragmento, *argumentos)
+        yield from zip(inicios, argumentos[1], resultados)
+        return
+    if pool is not None:
+        yield from zip(inicios, argumentos[1], pool.map(analizar_fragmento, *argumentos))
+        return
+    with ProcessPoolExecutor(max_workers=trabajadores) as propio:
+        yield from zip(inicios, argumentos[1], propio.map(analizar_fragmento, *argumentos))
+
+def normalizar(codigo_fuente):
+    # Igual que el constructor de AnalizadorLexico
+    return codigo_fuente.replace('\r\n', '\n') + '\n'
+
+def analizar_paralelo(codigo_fuente, motor=MOTOR_COMPILADO, trabajadores=None, pool=None):
+    # Mismo resultado que AnalizadorLexico(codigo_fuente, motor).analizar(), pero
+    # los tokens vuelven en un TokenBuffer (las columnas viajan entre procesos
+    # mucho más rápido que millones de objetos Token)
+    trabajadores = trabajadores or os.cpu_count() or 1
+    fuente = normalizar(codigo_fuente)
+    tokens = TokenBuffer(fuente)
+    errores = []
+    abiertos = 0
+    for inicio, linea, (columnas, errores_fragmento, abiertos_fragmento) in resultados_fragmentos(
+            fuente, motor, trabajadores, False, pool):
+        for _ in range(abiertos):
+            tokens.append(Token(TipoToken.DESINDENTAR, "", linea, 1, 0))
+        tokens.extender(*columnas, desplazamiento=inicio)
+        errores.extend(ErrorLexico(*datos) for datos in errores_fragmento)
+        abiertos = abiertos_fragmento
+    return tokens, errores
+
+def escribir_salida_paralela(codigo_fuente, nombre_salida, motor=MOTOR_COMPILADO, trabajadores=None, pool=None,
+                             omitir_si_igual=False):
+    # Escribe el mismo .out que escribir_salida(tokens) del análisis secuencial;
+    # cada proceso ya devuelve el texto de sus tokens. Devuelve (tokens, errores).
+    # omitir_si_igual: como en escribir_salida, un .out idéntico no se reescribe.
+    trabajadores = trabajadores or os.cpu_count() or 1
+    cantidad = 0
+    errores = []
+
+    def bloques():
+        # Texto de cada fragmento, con los DEDENT pendientes del anterior al frente
+        nonlocal cantidad
+        abiertos = 0
+        for _, linea, (texto, errores_fragmento, abiertos_fragmento) in resultados_fragmentos(
+                normalizar(codigo_fuente), motor, trabajadores, True, pool):
+            piezas = [str(Token(TipoToken.DESINDENTAR, "", linea, 1, 0))] * abiertos
+            if texto:
+                piezas.append(texto)
+            if piezas:
+                yield "\n".join(piezas)
+            cantidad += abiertos + (texto.count("\n") + 1 if texto else 0)
+            errores.extend(ErrorLexico(*datos) for datos in errores_fragmento)
+            abiertos = abiertos_fragmento
+
+    escribir_salida(bloques(), nombre_salida, omitir_si_igual)
+    return cantidad, errores
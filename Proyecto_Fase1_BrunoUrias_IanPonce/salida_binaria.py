@@ -0,0 +1,336 @@
+import argparse
+import mmap
+import re
+import struct
+import sys
+from array import array
+
+from lexico import TipoToken, Token, ErrorLexico, Referencias, TIPOS_TOKEN, ID_TIPO_TOKEN, VALORES_FIJOS, escribir_salida
+
+# ==========================================
+# 2.5 SALIDA BINARIA INDEXADA (.outb)
+# ==========================================
+
+# Estructura del archivo (todos los enteros en little-endian):
+#   cabecera        ENCABEZADO
+#   tabla de tipos  por cada tipo: largo (1 byte) + nombre en UTF-8
+#   registros       un REGISTRO_TOKEN de ancho fijo por token, en orden
+#   errores         un REGISTRO_ERROR por error léxico
+#   pool            lexemas y mensajes en UTF-8, cada texto distinto una sola vez
+#   índice          por cada línea N, el primer registro con linea >= N (más un centinela)
+# La cabecera guarda el desplazamiento de cada sección, así el lector puede ir
+# directo a los tokens de una línea sin recorrer el resto del archivo.
+
+MAGICO = b"MLTK"
+VERSION_FORMATO = 1
+EXTENSION_BINARIA = ".outb"
+
+ENCABEZADO = struct.Struct("<4sHHIIIIIIII")
+# magico, versión, cantidad de tipos, tokens, errores, líneas indexadas,
+# y desplazamientos de tipos, registros, errores, pool e índice
+REGISTRO_TOKEN = struct.Struct("<B3xIIIII")   # tipo, línea, col inicio, col fin, offset y largo en el pool
+REGISTRO_ERROR = struct.Struct("<IIII")       # línea, columna, offset y largo del mensaje en el pool
+ENTRADA_INDICE = struct.Struct("<I")
+
+REGISTROS_POR_BLOQUE = 4096  # Registros escritos (o leídos al iterar) de una vez
+
+class PoolCadenas:
+    # Textos internados: cada lexema distinto se guarda una sola vez
+    def __init__(self):
+        self.posiciones = {}
+        self.partes = []
+        self.tamano = 0
+
+    def agregar(self, texto):
+        posicion = self.posiciones.get(texto)
+        if posicion is None:
+            datos = texto.encode('utf-8', 'surrogatepass')
+            posicion = (self.tamano, len(datos))
+            self.posiciones[texto] = posicion
+            self.partes.append(datos)
+            self.tamano += len(datos)
+        return posicion
+
+def escribir_binario(elementos, nombre_salida):
+    # Acepta el mismo iterable que escribir_salida (tokens, y opcionalmente
+    # ErrorLexico mezclados, como los produce iter_tokens). Los registros se
+    # escriben a medida que llegan; el pool, los errores y el índice al final.
+    pool = PoolCadenas()
+    errores = []
+    indice = array('I')
+    cantidad_tokens = 0
+    ultima_linea = 0
+
+    with open(nombre_salida, "wb") as f:
+        f.write(bytes(ENCABEZADO.size))
+        inicio_tipos = f.tell()
+        for tipo in TIPOS_TOKEN:
+            datos = tipo.encode('utf-8')
+            f.write(bytes((len(datos),)) + datos)
+
+        inicio_registros = f.tell()
+        pendientes = []
+        empaquetar = REGISTRO_TOKEN.pack
+        for elemento in elementos:
+            if isinstance(elemento, ErrorLexico):
+                errores.append(elemento)
+                continue
+            while ultima_linea < elemento.linea:
+                indice.append(cantidad_tokens)
+                ultima_linea += 1
+            offset, largo = pool.agregar(elemento.valor)
+            pendientes.append(empaquetar(ID_TIPO_TOKEN[elemento.tipo], elemento.linea,
+                                         elemento.col_inicio, elemento.col_fin, offset, largo))
+            cantidad_tokens += 1
+            if len(pendientes) >= REGISTROS_POR_BLOQUE:
+                f.write(b"".join(pendientes))
+                pendientes = []
+        f.write(b"".join(pendientes))
+        indice.append(cantidad_tokens)  # Centinela: fin de la última línea
+
+        inicio_errores = f.tell()
+        for error in errores:
+            offset, largo = pool.agregar(error.mensaje)
+            f.write(REGISTRO_ERROR.pack(error.linea, error.columna, offset, largo))
+
+        inicio_pool = f.tell()
+        f.write(b"".join(pool.partes))
+
+        inicio_indice = f.tell()
+        if sys.byteorder != "little":
+            indice.byteswap()
+        f.write(indice.tobytes())
+
+        f.seek(0)
+        f.write(ENCABEZADO.pack(MAGICO, VERSION_FORMATO, len(TIPOS_TOKEN), cantidad_tokens, len(errores),
+                                ultima_linea, inicio_tipos, inicio_registros, inicio_errores,
+                                inicio_pool, inicio_indice))
+    return cantidad_tokens
+
+class LectorBinario:
+    # Acceso aleatorio a un .outb mediante mmap: nada se decodifica hasta que se
+    # pide. lector[i] devuelve el token i y tokens_en_linea(n) usa el índice.
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.archivo = open(ruta, "rb")
+        try:
+            self.datos = mmap.mmap(self.archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.archivo.close()
+            raise ValueError(f"{ruta}: archivo vacío, no es una salida binaria")
+        if len(self.datos) < ENCABEZADO.size:
+            self.cerrar()
+            raise ValueError(f"{ruta}: no es una salida binaria del analizador")
+
+        (magico, version, cantidad_tipos, self.cantidad_tokens, self.cantidad_errores, self.cantidad_lineas,
+         inicio_tipos, self.inicio_registros, self.inicio_errores, self.inicio_pool,
+         self.inicio_indice) = ENCABEZADO.unpack_from(self.datos, 0)
+        if magico != MAGICO:
+            self.cerrar()
+            raise ValueError(f"{ruta}: no es una salida binaria del analizador")
+        if version != VERSION_FORMATO:
+            self.cerrar()
+            raise ValueError(f"{ruta}: versión de formato {version} no soportada")
+
+        # La tabla de tipos del archivo manda: así se leen archivos escritos con otro orden de tipos
+        self.tipos = []
+        posicion = inicio_tipos
+        for _ in range(cantidad_tipos):
+            largo = self.datos[posicion]
+            self.tipos.append(self.datos[posicion + 1:posicion + 1 + largo].decode('utf-8'))
+            posicion += 1 + largo
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def cerrar(self):
+        self.datos.close()
+        self.archivo.close()
+
+    def __len__(self):
+        return self.cantidad_tokens
+
+    def texto(self, offset, largo):
+        inicio = self.inicio_pool + offset
+        return self.datos[inicio:inicio + largo].decode('utf-8', 'surrogatepass')
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += self.cantidad_tokens
+        if not 0 <= indice < self.cantidad_tokens:
+            raise IndexError("índice de token fuera de rango")
+        id_tipo, linea, col_inicio, col_fin, offset, largo = REGISTRO_TOKEN.unpack_from(
+            self.datos, self.inicio_registros + indice * REGISTRO_TOKEN.size)
+        return Token(self.tipos[id_tipo], self.texto(offset, largo), linea, col_inicio, col_fin)
+
+    def __iter__(self):
+        # Se desempaqueta por bloques para no copiar toda la sección de registros
+        tipos = self.tipos
+        texto = self.texto
+        fin = self.inicio_registros + self.cantidad_tokens * REGISTRO_TOKEN.size
+        paso = REGISTROS_POR_BLOQUE * REGISTRO_TOKEN.size
+        for inicio in range(self.inicio_registros, fin, paso):
+            bloque = self.datos[inicio:min(inicio + paso, fin)]
+            for id_tipo, linea, col_inicio, col_fin, offset, largo in REGISTRO_TOKEN.iter_unpack(bloque):
+                yield Token(tipos[id_tipo], texto(offset, largo), linea, col_inicio, col_fin)
+
+    def rango_linea(self, linea):
+        # (primer, último + 1) registro de la línea, leídos del índice
+        if not 1 <= linea <= self.cantidad_lineas:
+            return 0, 0
+        return struct.unpack_from("<II", self.datos, self.inicio_indice + (linea - 1) * ENTRADA_INDICE.size)
+
+    def tokens_en_linea(self, linea):
+        primero, fin = self.rango_linea(linea)
+        return [self[i] for i in range(primero, fin)]
+
+    def indices_de_tipo(self, tipo, primero=0, fin=None):
+        # Posiciones de los tokens de un tipo dentro de [primero, fin). Solo se mira
+        # el primer byte de cada registro (el id del tipo), sin armar ningún Token.
+        fin = self.cantidad_tokens if fin is None else min(fin, self.cantidad_tokens)
+        resultado = array('I')
+        if tipo not in self.tipos:
+            return resultado
+        objetivo = bytes((self.tipos.index(tipo),))
+        paso = REGISTRO_TOKEN.size
+        for inicio_bloque in range(primero, fin, REGISTROS_POR_BLOQUE * 16):
+            fin_bloque = min(inicio_bloque + REGISTROS_POR_BLOQUE * 16, fin)
+            ids = self.datos[self.inicio_registros + inicio_bloque * paso:
+                             self.inicio_registros + fin_bloque * paso:paso]
+            posicion = ids.find(objetivo)
+            while posicion != -1:
+                resultado.append(inicio_bloque + posicion)
+                posicion = ids.find(objetivo, posicion + 1)
+        return resultado
+
+    def buscar(self, nombre, tipo=TipoToken.ID):
+        # Usos de `nombre` como Referencias (archivo 0), leídos del archivo sin
+        # armar un índice en memoria ni ningún Token. El pool guarda cada texto una
+        # sola vez, así que todos sus tokens comparten offset y largo: una expresión
+        # regular ubica el primer registro del tipo con ese texto y el resto son
+        # búsquedas en C de esos 8 bytes dentro de la sección de registros.
+        referencias = Referencias(nombre)
+        if not nombre or tipo not in self.tipos:
+            return referencias
+        datos = self.datos
+        paso = REGISTRO_TOKEN.size
+        inicio = self.inicio_registros
+        fin = inicio + self.cantidad_tokens * paso
+        id_tipo = self.tipos.index(tipo)
+        buscado = nombre.encode('utf-8', 'surrogatepass')
+        largo = struct.pack("<I", len(buscado))
+        # Registro del tipo con un texto de ese largo: tipo, relleno, línea y columnas, offset, largo
+        candidato = re.compile(re.escape(bytes((id_tipo, 0, 0, 0))) + rb".{12}(.{4})" + re.escape(largo), re.DOTALL)
+        descartados = set()
+        posicion = inicio
+        while True:
+            encontrado = candidato.search(datos, posicion, fin)
+            if encontrado is None:
+                return referencias
+            if (encontrado.start() - inicio) % paso:
+                posicion = encontrado.start() + 1  # Coincidencia que cruza dos registros
+                continue
+            offset = encontrado.group(1)
+            if offset not in descartados:
+                comienzo = self.inicio_pool + struct.unpack("<I", offset)[0]
+                if datos[comienzo:comienzo + len(buscado)] == buscado:
+                    break
+                descartados.add(offset)
+            posicion = encontrado.end()
+
+        clave = offset + largo
+        usos = referencias.usos
+        posicion = encontrado.start() + 16
+        while posicion != -1:
+            registro = posicion - 16
+            # El mismo texto puede ser de otro tipo, o los 8 bytes caer entre dos campos
+            if not (registro - inicio) % paso and datos[registro] == id_tipo:
+                usos.extend((0, (registro - inicio) // paso, struct.unpack_from("<I", datos, registro + 4)[0]))
+            posicion = datos.find(clave, posicion + 1, fin)
+        return referencias
+
+    def errores(self, maximo=None):
+        # Los primeros `maximo` errores (todos si es None)
+        resultado = []
+        cantidad = self.cantidad_errores if maximo is None else min(maximo, self.cantidad_errores)
+        for i in range(cantidad):
+            linea, columna, offset, largo = REGISTRO_ERROR.unpack_from(
+                self.datos, self.inicio_errores + i * REGISTRO_ERROR.size)
+            resultado.append(ErrorLexico(linea, columna, self.texto(offset, largo)))
+        return resultado
+
+# ==========================================
+# CONVERSIÓN ENTRE FORMATOS
+# ==========================================
+
+def parsear_linea_salida(linea):
+    # Inverso de Token.__str__: "<TIPO> line L, col A-B" con ": 'valor'" opcional
+    if not linea.startswith("<"):
+        raise ValueError(f"línea de salida inválida: {linea!r}")
+    fin_tipo = linea.index("> line ")
+    tipo = linea[1:fin_tipo]
+    if tipo not in ID_TIPO_TOKEN:
+        raise ValueError(f"tipo de token desconocido: {tipo!r}")
+    separador = linea.find(": '", fin_tipo)
+    if separador == -1:
+        posicion, valor = linea[fin_tipo + 7:], None
+    else:
+        if not linea.endswith("'"):
+            raise ValueError(f"línea de salida inválida: {linea!r}")
+        posicion, valor = linea[fin_tipo + 7:separador], linea[separador + 3:-1]
+    texto_linea, columnas = posicion.split(", col ")
+    col_inicio, col_fin = columnas.split("-")
+    if valor is None:
+        # NEWLINE/INDENT/DEDENT/EOF no imprimen su valor; es el fijo del analizador
+        valor = VALORES_FIJOS.get(tipo, "")
+    return Token(tipo, valor, int(texto_linea), int(col_inicio), int(col_fin))
+
+def leer_salida_texto(archivo):
+    # Tokens de un .out de texto. Solo se corta en '\n' (un valor puede contener
+    # otros separadores como '\r' o '\x85'), y se quita el '\r' de un .out con CRLF.
+    for linea in archivo:
+        if linea.endswith("\n"):
+            linea = linea[:-1]
+            if linea.endswith("\r"):
+                linea = linea[:-1]
+        if linea:
+            yield parsear_linea_salida(linea)
+
+def texto_a_binario(ruta_texto, ruta_binaria):
+    # El .out de texto no incluye errores, así que la sección de errores queda vacía
+    with open(ruta_texto, "r", encoding='utf-8', newline='\n') as f:
+        return escribir_binario(leer_salida_texto(f), ruta_binaria)
+
+def binario_a_texto(ruta_binaria, ruta_texto):
+    with LectorBinario(ruta_binaria) as lector:
+        escribir_salida(lector, ruta_texto)
+        return len(lector)
+
+def es_salida_binaria(ruta):
+    with open(ruta, "rb") as f:
+        return f.read(len(MAGICO)) == MAGICO
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convierte una salida del analizador entre el formato de texto (.out) y el binario (.outb).")
+    parser.add_argument("entrada", help="Archivo .out o .outb (el formato se detecta por el contenido)")
+    parser.add_argument("salida")
+    args = parser.parse_args(argv)
+    try:
+        if es_salida_binaria(args.entrada):
+            cantidad = binario_a_texto(args.entrada, args.salida)
+        else:
+            cantidad = texto_a_binario(args.entrada, args.salida)
+    except (OSError, ValueError, UnicodeDecodeError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    print(f"{cantidad} tokens convertidos")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
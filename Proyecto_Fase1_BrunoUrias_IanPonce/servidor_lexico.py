@@ -0,0 +1,351 @@
+import argparse
+import asyncio
+import gc
+import json
+import os
+import socket
+import stat
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Igual que cli.py: solo el núcleo léxico, sin tkinter, para que el arranque sea rápido
+from lexico import AnalizadorLexico, MOTOR_CLASICO, MOTOR_COMPILADO, archivo_parece_texto
+from cache_lexico import TAM_MAXIMO_CACHE, cache_compartida, clave_fuente
+from tamanos import parsear_tamano
+
+# ==========================================
+# 4.1 MODO SERVIDOR (JSON LINES)
+# ==========================================
+
+# Protocolo: una petición JSON por línea y una respuesta JSON por línea.
+#   {"id": 1, "fuente": "int x = 1\n"}         analiza el texto
+#   {"id": 2, "ruta": "programa.mlng"}          lee y analiza el archivo
+#   {"id": 3, "operacion": "estado"}            contadores del servidor
+#   {"id": 4, "operacion": "salir"}             cierra el servidor
+# "motor" es opcional en las peticiones de análisis. La respuesta repite el id:
+#   {"id": 1, "ok": true, "cache": false, "tokens": [[tipo, valor, línea, col inicio, col fin], ...],
+#    "errores": [[línea, columna, mensaje], ...]}
+#   {"id": 9, "ok": false, "error": "..."}
+# Las peticiones se atienden en paralelo, así que las respuestas pueden llegar en otro orden.
+
+OPERACION_ANALIZAR = "analizar"
+OPERACION_ESTADO = "estado"
+OPERACION_SALIR = "salir"
+
+TAM_MAXIMO_PETICION = 64 * 1024 * 1024    # Bytes por línea de petición
+TAM_MAXIMO_MEMORIA = 128 * 1024 * 1024    # Bytes de respuestas guardadas en memoria
+MAX_PETICIONES_EN_CURSO = 64              # Por conexión; después se deja de leer hasta que terminen
+
+# Un analizador por motor en cada proceso (o en el hilo) del pool, reutilizado
+# entre peticiones con reiniciar en vez de crear uno por petición
+ANALIZADORES = {}
+
+def analizar_a_json(codigo_fuente, motor, directorio_cache=None, tam_maximo_cache=TAM_MAXIMO_CACHE):
+    # Corre en el pool. Devuelve los tokens y los errores ya codificados en JSON:
+    # un str viaja entre procesos mucho más rápido que millones de objetos Token.
+    # Se escapa lo que no es ASCII: una fuente enviada en JSON puede traer surrogates sueltos.
+    recolector_activo = gc.isenabled()
+    gc.disable()
+    try:
+        if directorio_cache is not None:
+            tokens, errores = cache_compartida(directorio_cache, tam_maximo_cache).analizar(codigo_fuente, motor)
+        else:
+            escanner = ANALIZADORES.get(motor)
+            if escanner is None:
+                escanner = ANALIZADORES[motor] = AnalizadorLexico("", motor)
+            escanner.reiniciar(codigo_fuente)
+            tokens, errores = escanner.analizar()
+        datos_tokens = json.dumps([(t.tipo, t.valor, t.linea, t.col_inicio, t.col_fin) for t in tokens],
+                                  separators=(',', ':'))
+        datos_errores = json.dumps([(e.linea, e.columna, e.mensaje) for e in errores], separators=(',', ':'))
+        if directorio_cache is None:
+            escanner.reiniciar("")  # No retener los tokens de esta petición hasta la próxima
+    finally:
+        if recolector_activo:
+            gc.enable()
+    return datos_tokens, datos_errores
+
+def leer_fuente(ruta):
+    # Misma lectura que el modo consola con cache (saltos de línea universales)
+    if not archivo_parece_texto(ruta):
+        raise ValueError("no parece un archivo de texto (binario o con otra codificación)")
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return f.read()
+
+async def leer_linea_de(reader):
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError):
+        return b""  # Petición más larga que TAM_MAXIMO_PETICION: se deja de leer
+
+class CacheRespuestas:
+    # LRU en memoria de respuestas ya codificadas, por hash del contenido. Vive
+    # mientras viva el servidor: un archivo que no cambió responde sin volver al pool.
+    def __init__(self, tam_maximo=TAM_MAXIMO_MEMORIA):
+        self.tam_maximo = tam_maximo
+        self.entradas = OrderedDict()
+        self.tamano = 0
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        datos = self.entradas.get(clave)
+        if datos is None:
+            self.fallos += 1
+            return None
+        self.entradas.move_to_end(clave)
+        self.aciertos += 1
+        return datos
+
+    def guardar(self, clave, datos):
+        tamano = len(datos[0]) + len(datos[1])
+        if tamano > self.tam_maximo:
+            return
+        self.entradas[clave] = datos
+        self.tamano += tamano
+        while self.tamano > self.tam_maximo:
+            _, (tokens, errores) = self.entradas.popitem(last=False)
+            self.tamano -= len(tokens) + len(errores)
+
+class ServidorLexico:
+    def __init__(self, motor=MOTOR_COMPILADO, trabajadores=1, directorio_cache=None,
+                 tam_maximo_cache=TAM_MAXIMO_CACHE, tam_maximo_memoria=TAM_MAXIMO_MEMORIA):
+        self.motor = motor
+        self.directorio_cache = directorio_cache
+        self.tam_maximo_cache = tam_maximo_cache
+        self.memoria = CacheRespuestas(tam_maximo_memoria)
+        # Con un solo trabajador basta un hilo: el análisis no bloquea el bucle de eventos
+        if trabajadores == 1:
+            self.pool = ThreadPoolExecutor(max_workers=1)
+        else:
+            self.pool = ProcessPoolExecutor(max_workers=trabajadores)
+        self.en_curso = {}   # clave -> Future de un análisis que ya se está haciendo
+        self.atendidas = 0
+        self.cerrar = asyncio.Event()
+
+    async def analizar(self, codigo_fuente, motor):
+        # (tokens, errores, desde_cache) en JSON. Dos peticiones iguales a la vez comparten el análisis.
+        clave = clave_fuente(codigo_fuente)
+        datos = self.memoria.obtener(clave)
+        if datos is not None:
+            return datos[0], datos[1], True
+        futuro = self.en_curso.get(clave)
+        if futuro is not None:
+            datos = await asyncio.shield(futuro)
+            return datos[0], datos[1], True
+
+        loop = asyncio.get_running_loop()
+        futuro = loop.run_in_executor(self.pool, analizar_a_json, codigo_fuente, motor,
+                                      self.directorio_cache, self.tam_maximo_cache)
+        self.en_curso[clave] = futuro
+        try:
+            datos = await futuro
+        finally:
+            del self.en_curso[clave]
+        self.memoria.guardar(clave, datos)
+        return datos[0], datos[1], False
+
+    def estado(self):
+        return {"atendidas": self.atendidas, "en_memoria": len(self.memoria.entradas),
+                "bytes_en_memoria": self.memoria.tamano, "aciertos": self.memoria.aciertos,
+                "fallos": self.memoria.fallos, "motor": self.motor}
+
+    async def responder(self, linea):
+        # Texto de la respuesta (sin el salto de línea final) para una línea de petición
+        identificador = None
+        try:
+            peticion = json.loads(linea)
+            if not isinstance(peticion, dict):
+                raise ValueError("la petición debe ser un objeto JSON")
+            identificador = peticion.get("id")
+            operacion = peticion.get("operacion", OPERACION_ANALIZAR)
+            if operacion == OPERACION_ESTADO:
+                return json.dumps({"id": identificador, "ok": True, "estado": self.estado()})
+            if operacion == OPERACION_SALIR:
+                self.cerrar.set()
+                return json.dumps({"id": identificador, "ok": True})
+            if operacion != OPERACION_ANALIZAR:
+                raise ValueError(f"operación desconocida: {operacion}")
+
+            motor = peticion.get("motor", self.motor)
+            if motor not in (MOTOR_CLASICO, MOTOR_COMPILADO):
+                raise ValueError(f"Motor léxico desconocido: {motor}")
+            if "fuente" in peticion:
+                codigo = peticion["fuente"]
+                if not isinstance(codigo, str):
+                    raise ValueError("'fuente' debe ser un texto")
+            elif "ruta" in peticion:
+                codigo = await asyncio.get_running_loop().run_in_executor(None, leer_fuente, str(peticion["ruta"]))
+            else:
+                raise ValueError("la petición necesita 'fuente' o 'ruta'")
+            tokens, errores, desde_cache = await self.analizar(codigo, motor)
+        except (ValueError, OSError, UnicodeDecodeError) as e:
+            return json.dumps({"id": identificador, "ok": False, "error": str(e)})
+        except Exception as e:
+            # Falla del pool u otra inesperada (ej. BrokenProcessPool): la petición
+            # igual recibe su respuesta, para que el cliente no espere ese id para siempre
+            return json.dumps({"id": identificador, "ok": False, "error": f"{type(e).__name__}: {e}"})
+        finally:
+            self.atendidas += 1
+        # Los tokens ya vienen codificados: se arma la respuesta sin volver a serializarlos
+        return (f'{{"id":{json.dumps(identificador)},"ok":true,'
+                f'"cache":{"true" if desde_cache else "false"},"tokens":{tokens},"errores":{errores}}}')
+
+    async def atender(self, leer_linea, escribir):
+        # Lee peticiones hasta el fin de la entrada (o hasta "salir") y responde cada
+        # una apenas termina. leer_linea devuelve b"" al final; escribir recibe bytes.
+        cupo = asyncio.Semaphore(MAX_PETICIONES_EN_CURSO)
+        pendientes = set()
+
+        async def procesar(linea):
+            try:
+                respuesta = await self.responder(linea)
+                await escribir(respuesta.encode('utf-8') + b"\n")
+            finally:
+                cupo.release()
+
+        while True:
+            await cupo.acquire()
+            # Se espera la próxima línea o el pedido de cierre, lo que llegue primero
+            lectura = asyncio.ensure_future(leer_linea())
+            cierre = asyncio.ensure_future(self.cerrar.wait())
+            await asyncio.wait((lectura, cierre), return_when=asyncio.FIRST_COMPLETED)
+            cierre.cancel()
+            if self.cerrar.is_set():
+                lectura.cancel()
+                cupo.release()
+                break
+            linea = lectura.result()
+            if not linea:
+                cupo.release()
+                break
+            if not linea.strip():
+                cupo.release()
+                continue
+            tarea = asyncio.create_task(procesar(linea))
+            pendientes.add(tarea)
+            tarea.add_done_callback(pendientes.discard)
+        if pendientes:
+            await asyncio.gather(*pendientes, return_exceptions=True)
+
+    async def atender_stdio(self):
+        loop = asyncio.get_running_loop()
+        salida = sys.stdout.buffer
+        try:
+            # Tubería o terminal: se lee sin bloquear, así "salir" no queda esperando una línea
+            reader = asyncio.StreamReader(limit=TAM_MAXIMO_PETICION)
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+            leer_linea = lambda: leer_linea_de(reader)
+        except ValueError:
+            # Archivo redirigido: leer nunca se queda esperando, basta un hilo
+            entrada = sys.stdin.buffer
+
+            async def leer_linea():
+                return await loop.run_in_executor(None, entrada.readline)
+
+        async def escribir(datos):
+            salida.write(datos)
+            salida.flush()
+
+        await self.atender(leer_linea, escribir)
+
+    async def atender_socket(self, ruta):
+        async def conexion(reader, writer):
+            async def escribir(datos):
+                writer.write(datos)
+                await writer.drain()
+
+            try:
+                await self.atender(lambda: leer_linea_de(reader), escribir)
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        quitar_socket_viejo(ruta)
+        servidor = await asyncio.start_unix_server(conexion, path=ruta, limit=TAM_MAXIMO_PETICION)
+        creado = os.stat(ruta)
+        try:
+            async with servidor:
+                await self.cerrar.wait()
+        finally:
+            # Solo se borra el socket propio: si otro proceso lo reemplazó, se deja
+            try:
+                actual = os.stat(ruta)
+                if (actual.st_dev, actual.st_ino) == (creado.st_dev, creado.st_ino):
+                    os.remove(ruta)
+            except OSError:
+                pass
+
+    def apagar(self):
+        self.pool.shutdown(cancel_futures=True)
+
+def quitar_socket_viejo(ruta):
+    # Borra el socket que quedó de una ejecución anterior: uno en el que nadie
+    # acepta conexiones. Si responde, hay un servidor activo y es un error, igual
+    # que cualquier otra cosa en esa ruta (ej. un archivo por un --socket mal escrito).
+    try:
+        modo = os.stat(ruta).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(modo):
+        raise ValueError(f"{ruta} ya existe y no es un socket")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as prueba:
+        try:
+            prueba.connect(ruta)
+        except ConnectionRefusedError:
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            return
+    raise ValueError(f"{ruta} ya está en uso por otro servidor")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Servidor del analizador léxico MiniLang: peticiones JSON por línea en stdin o en un socket Unix.")
+    parser.add_argument("--socket", metavar="RUTA", help="Escuchar en un socket Unix en vez de stdin/stdout")
+    parser.add_argument("-j", "--trabajadores", type=int, default=os.cpu_count() or 1,
+                        help="Procesos para analizar (por defecto: número de CPUs)")
+    parser.add_argument("--motor", choices=(MOTOR_CLASICO, MOTOR_COMPILADO), default=MOTOR_COMPILADO,
+                        help="Motor por defecto si la petición no indica uno")
+    parser.add_argument("--cache", metavar="DIR", help="Cache de tokens en disco, compartida con cli.py")
+    parser.add_argument("--cache-max", default="256MB", help="Tamaño máximo de la cache en disco")
+    parser.add_argument("--memoria-max", default="128MB", help="Tamaño máximo de las respuestas guardadas en memoria")
+    args = parser.parse_args(argv)
+    if args.trabajadores < 1:
+        print("ERROR: --trabajadores debe ser mayor que cero", file=sys.stderr)
+        return 2
+    try:
+        tam_maximo_cache = parsear_tamano(args.cache_max)
+        tam_maximo_memoria = parsear_tamano(args.memoria_max)
+    except ValueError as e:
+        print(f"ERROR: tamaño inválido: {e}", file=sys.stderr)
+        return 2
+    if args.socket:
+        try:
+            quitar_socket_viejo(args.socket)
+        except (ValueError, OSError) as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 2
+
+    async def ejecutar():
+        servidor = ServidorLexico(args.motor, args.trabajadores, args.cache, tam_maximo_cache, tam_maximo_memoria)
+        try:
+            if args.socket:
+                print(f"Escuchando en {args.socket}", file=sys.stderr)
+                await servidor.atender_socket(args.socket)
+            else:
+                await servidor.atender_stdio()
+        finally:
+            servidor.apagar()
+
+    try:
+        asyncio.run(ejecutar())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,485 @@
+import argparse
+import sys
+import time
+
+from lexico import TipoToken, Token, ErrorLexico, MOTOR_COMPILADO, iter_tokens
+
+# ==========================================
+# 7. ANALIZADOR SINTÁCTICO (DESCENSO RECURSIVO)
+# ==========================================
+
+# Sigue la gramática de README_Fase1.md con tres agregados que ya usa
+# SetDePruebas.txt: declaración sin valor inicial ("int edad"), "return" y
+# llamadas a función dentro de expresiones. Los tokens se piden uno por uno al
+# iterable de entrada (con un solo token de anticipación), así que nunca se
+# arma la lista completa; con sentencias() tampoco se arma el árbol completo.
+
+PROFUNDIDAD_MAXIMA = 100  # Bloques y paréntesis anidados antes de abortar esa sentencia
+
+TIPOS_DATO = (TipoToken.INT, TipoToken.FLOAT, TipoToken.STRING, TipoToken.BOOL)
+OPERADORES_RELACIONALES = (TipoToken.MAYOR_QUE, TipoToken.MENOR_QUE, TipoToken.IGUAL_QUE,
+                           TipoToken.DIFERENTE_QUE, TipoToken.MAYOR_IGUAL, TipoToken.MENOR_IGUAL)
+OPERADORES_SUMA = (TipoToken.SUMA, TipoToken.RESTA)
+OPERADORES_PRODUCTO = (TipoToken.MULTIPLICACION, TipoToken.DIVISION, TipoToken.MODULO)
+LITERALES = (TipoToken.NUMERO_ENTERO, TipoToken.NUMERO_FLOTANTE, TipoToken.CADENA_LITERAL,
+             TipoToken.BOOLEANO_LITERAL)
+
+# ==========================================
+# NODOS DEL ÁRBOL SINTÁCTICO
+# ==========================================
+
+class Nodo:
+    __slots__ = ('linea',)
+
+    def __repr__(self):
+        campos = ", ".join(f"{nombre}={getattr(self, nombre)!r}" for nombre in self.__slots__)
+        return f"{type(self).__name__}({campos}, linea={self.linea})"
+
+class Programa(Nodo):
+    __slots__ = ('sentencias',)
+
+    def __init__(self, sentencias):
+        self.sentencias = sentencias
+        self.linea = 1
+
+class DeclaracionVariable(Nodo):
+    __slots__ = ('tipo', 'nombre', 'valor')  # valor es None en "int edad"
+
+    def __init__(self, tipo, nombre, valor, linea):
+        self.tipo = tipo
+        self.nombre = nombre
+        self.valor = valor
+        self.linea = linea
+
+class Asignacion(Nodo):
+    __slots__ = ('nombre', 'valor')
+
+    def __init__(self, nombre, valor, linea):
+        self.nombre = nombre
+        self.valor = valor
+        self.linea = linea
+
+class SentenciaIf(Nodo):
+    __slots__ = ('condicion', 'cuerpo', 'sino')  # sino es None si no hay else
+
+    def __init__(self, condicion, cuerpo, sino, linea):
+        self.condicion = condicion
+        self.cuerpo = cuerpo
+        self.sino = sino
+        self.linea = linea
+
+class SentenciaWhile(Nodo):
+    __slots__ = ('condicion', 'cuerpo')
+
+    def __init__(self, condicion, cuerpo, linea):
+        self.condicion = condicion
+        self.cuerpo = cuerpo
+        self.linea = linea
+
+class DeclaracionFuncion(Nodo):
+    __slots__ = ('nombre', 'parametros', 'cuerpo')  # parametros: lista de (tipo, nombre)
+
+    def __init__(self, nombre, parametros, cuerpo, linea):
+        self.nombre = nombre
+        self.parametros = parametros
+        self.cuerpo = cuerpo
+        self.linea = linea
+
+class LlamadaFuncion(Nodo):
+    __slots__ = ('nombre', 'argumentos')
+
+    def __init__(self, nombre, argumentos, linea):
+        self.nombre = nombre
+        self.argumentos = argumentos
+        self.linea = linea
+
+class Lectura(Nodo):
+    __slots__ = ('nombre',)
+
+    def __init__(self, nombre, linea):
+        self.nombre = nombre
+        self.linea = linea
+
+class Escritura(Nodo):
+    __slots__ = ('valor',)
+
+    def __init__(self, valor, linea):
+        self.valor = valor
+        self.linea = linea
+
+class Retorno(Nodo):
+    __slots__ = ('valor',)
+
+    def __init__(self, valor, linea):
+        self.valor = valor
+        self.linea = linea
+
+class OperacionBinaria(Nodo):
+    # Operaciones aritméticas y también la condición (<Expression> <RelOp> <Expression>)
+    __slots__ = ('operador', 'izquierda', 'derecha')
+
+    def __init__(self, operador, izquierda, derecha, linea):
+        self.operador = operador
+        self.izquierda = izquierda
+        self.derecha = derecha
+        self.linea = linea
+
+class Literal(Nodo):
+    __slots__ = ('tipo', 'valor')
+
+    def __init__(self, tipo, valor, linea):
+        self.tipo = tipo
+        self.valor = valor
+        self.linea = linea
+
+class Identificador(Nodo):
+    __slots__ = ('nombre',)
+
+    def __init__(self, nombre, linea):
+        self.nombre = nombre
+        self.linea = linea
+
+# ==========================================
+# ERRORES Y RECUPERACIÓN
+# ==========================================
+
+class ErrorSintactico:
+    __slots__ = ('linea', 'columna', 'mensaje')
+
+    def __init__(self, linea, columna, mensaje):
+        self.linea = linea
+        self.columna = columna
+        self.mensaje = mensaje
+
+    def __str__(self):
+        # Mismo formato que ErrorLexico
+        return f"line {self.linea}, col {self.columna}: ERROR {self.mensaje}"
+
+class SentenciaInvalida(Exception):
+    # Interrumpe la sentencia actual; el analizador se resincroniza en NEWLINE/DEDENT
+    pass
+
+def describir(token):
+    if token.tipo in (TipoToken.NUEVA_LINEA, TipoToken.INDENTAR, TipoToken.DESINDENTAR, TipoToken.FIN_ARCHIVO):
+        return token.tipo
+    return f"'{token.valor}'"
+
+# ==========================================
+# ANALIZADOR
+# ==========================================
+
+class AnalizadorSintactico:
+    # tokens: cualquier iterable de Token (por ejemplo iter_tokens(archivo), que
+    # también entrega los ErrorLexico intercalados: esos se cuentan y se saltan)
+    def __init__(self, tokens):
+        self.tokens = iter(tokens)
+        self.errores = []
+        self.errores_lexicos = 0
+        self.tokens_leidos = 0
+        self.profundidad = 0
+        self.actual = None
+        self.avanzar()
+
+    # --- Manejo de tokens ---
+
+    def avanzar(self):
+        # Devuelve el token actual y carga el siguiente como anticipación
+        anterior = self.actual
+        for token in self.tokens:
+            if isinstance(token, ErrorLexico):
+                self.errores_lexicos += 1
+                continue
+            self.actual = token
+            self.tokens_leidos += 1
+            return anterior
+        # Fin de la entrada: se queda en EOF (se sintetiza si la fuente no lo trae)
+        if self.actual is None or self.actual.tipo != TipoToken.FIN_ARCHIVO:
+            linea = self.actual.linea + 1 if self.actual is not None else 1
+            self.actual = Token(TipoToken.FIN_ARCHIVO, "", linea, 1, 1)
+        return anterior
+
+    def error(self, mensaje, token=None):
+        token = token or self.actual
+        self.errores.append(ErrorSintactico(token.linea, token.col_inicio, mensaje))
+        raise SentenciaInvalida()
+
+    def esperar(self, tipo, descripcion=None):
+        if self.actual.tipo != tipo:
+            self.error(f"Se esperaba {descripcion or repr(tipo)} y se encontró {describir(self.actual)}")
+        return self.avanzar()
+
+    def sincronizar(self):
+        # Modo pánico: descartar hasta el fin de la línea (que se consume) o
+        # hasta el DEDENT/EOF que cierra el bloque (que se deja para el bloque)
+        while self.actual.tipo not in (TipoToken.NUEVA_LINEA, TipoToken.DESINDENTAR, TipoToken.FIN_ARCHIVO):
+            self.avanzar()
+        if self.actual.tipo == TipoToken.NUEVA_LINEA:
+            self.avanzar()
+
+    def entrar(self):
+        self.profundidad += 1
+        if self.profundidad > PROFUNDIDAD_MAXIMA:
+            self.error("Anidamiento demasiado profundo")
+
+    # --- <Program> y <StatementList> ---
+
+    def sentencias(self):
+        # Generador de las sentencias de primer nivel: la memoria usada depende
+        # solo de la sentencia en curso (su anidamiento), no del tamaño del archivo
+        while self.actual.tipo != TipoToken.FIN_ARCHIVO:
+            if self.actual.tipo == TipoToken.DESINDENTAR:
+                # Solo puede quedar huérfano tras un error; se descarta
+                self.avanzar()
+                continue
+            sentencia = self.sentencia_recuperable()
+            if sentencia is not None:
+                yield sentencia
+
+    def analizar(self):
+        programa = Programa(list(self.sentencias()))
+        return programa, self.errores
+
+    def lista_sentencias(self):
+        # Sentencias de un bloque, hasta su DEDENT
+        sentencias = []
+        while self.actual.tipo not in (TipoToken.DESINDENTAR, TipoToken.FIN_ARCHIVO):
+            sentencia = self.sentencia_recuperable()
+            if sentencia is not None:
+                sentencias.append(sentencia)
+        return sentencias
+
+    def sentencia_recuperable(self):
+        profundidad = self.profundidad
+        try:
+            return self.sentencia()
+        except SentenciaInvalida:
+            self.profundidad = profundidad
+            self.sincronizar()
+            return None
+
+    # --- <Statement> ---
+
+    def sentencia(self):
+        tipo = self.actual.tipo
+        if tipo in TIPOS_DATO:
+            return self.declaracion_variable()
+        if tipo == TipoToken.ID:
+            return self.asignacion_o_llamada()
+        if tipo == TipoToken.IF:
+            return self.sentencia_if()
+        if tipo == TipoToken.WHILE:
+            return self.sentencia_while()
+        if tipo == TipoToken.DEF:
+            return self.declaracion_funcion()
+        if tipo == TipoToken.READ:
+            return self.lectura()
+        if tipo == TipoToken.WRITE:
+            return self.escritura()
+        if tipo == TipoToken.RETURN:
+            return self.retorno()
+        if tipo == TipoToken.NUEVA_LINEA:
+            # Línea que solo tenía caracteres inválidos (ya reportados por el léxico)
+            self.avanzar()
+            return None
+        if tipo == TipoToken.INDENTAR:
+            # Bloque sin encabezado válido: se analiza igual para no perder el
+            # balance de INDENT/DEDENT ni los errores de su interior
+            token = self.avanzar()
+            self.errores.append(ErrorSintactico(token.linea, token.col_inicio, "Indentación inesperada"))
+            self.entrar()
+            self.lista_sentencias()
+            self.profundidad -= 1
+            if self.actual.tipo == TipoToken.DESINDENTAR:
+                self.avanzar()
+            return None
+        self.error(f"Sentencia inválida: {describir(self.actual)}")
+
+    def fin_sentencia(self):
+        self.esperar(TipoToken.NUEVA_LINEA, "fin de línea")
+
+    def declaracion_variable(self):
+        # <VarDecl> ::= <Type> "ID" ["=" <Expression>] "NEWLINE"
+        tipo = self.avanzar()
+        nombre = self.esperar(TipoToken.ID, "un identificador")
+        valor = None
+        if self.actual.tipo == TipoToken.ASIGNACION:
+            self.avanzar()
+            valor = self.expresion()
+        self.fin_sentencia()
+        return DeclaracionVariable(tipo.valor, nombre.valor, valor, tipo.linea)
+
+    def asignacion_o_llamada(self):
+        # <Assignment> y <FuncCall> empiezan ambos con "ID": decide el token siguiente
+        nombre = self.avanzar()
+        if self.actual.tipo == TipoToken.ASIGNACION:
+            self.avanzar()
+            valor = self.expresion()
+            self.fin_sentencia()
+            return Asignacion(nombre.valor, valor, nombre.linea)
+        if self.actual.tipo == TipoToken.PARENTESIS_IZQ:
+            llamada = self.llamada(nombre)
+            self.fin_sentencia()
+            return llamada
+        self.error(f"Se esperaba '=' o '(' y se encontró {describir(self.actual)}")
+
+    def bloque(self):
+        # ":" "NEWLINE" "INDENT" <StatementList> "DEDENT"
+        self.esperar(TipoToken.DOS_PUNTOS, "':'")
+        self.esperar(TipoToken.NUEVA_LINEA, "fin de línea")
+        self.esperar(TipoToken.INDENTAR, "un bloque indentado")
+        self.entrar()
+        sentencias = self.lista_sentencias()
+        self.profundidad -= 1
+        self.esperar(TipoToken.DESINDENTAR, "fin del bloque")
+        return sentencias
+
+    def sentencia_if(self):
+        inicio = self.avanzar()
+        condicion = self.condicion()
+        cuerpo = self.bloque()
+        sino = None
+        if self.actual.tipo == TipoToken.ELSE:
+            self.avanzar()
+            sino = self.bloque()
+        return SentenciaIf(condicion, cuerpo, sino, inicio.linea)
+
+    def sentencia_while(self):
+        inicio = self.avanzar()
+        condicion = self.condicion()
+        return SentenciaWhile(condicion, self.bloque(), inicio.linea)
+
+    def declaracion_funcion(self):
+        # <FuncDecl> ::= "def" "ID" "(" <ParamList> ")" <bloque>
+        inicio = self.avanzar()
+        nombre = self.esperar(TipoToken.ID, "el nombre de la función")
+        self.esperar(TipoToken.PARENTESIS_IZQ, "'('")
+        parametros = []
+        if self.actual.tipo != TipoToken.PARENTESIS_DER:
+            parametros.append(self.parametro())
+            while self.actual.tipo == TipoToken.COMA:
+                self.avanzar()
+                parametros.append(self.parametro())
+        self.esperar(TipoToken.PARENTESIS_DER, "')'")
+        return DeclaracionFuncion(nombre.valor, parametros, self.bloque(), inicio.linea)
+
+    def parametro(self):
+        if self.actual.tipo not in TIPOS_DATO:
+            self.error(f"Se esperaba el tipo del parámetro y se encontró {describir(self.actual)}")
+        tipo = self.avanzar()
+        nombre = self.esperar(TipoToken.ID, "el nombre del parámetro")
+        return (tipo.valor, nombre.valor)
+
+    def lectura(self):
+        inicio = self.avanzar()
+        self.esperar(TipoToken.PARENTESIS_IZQ, "'('")
+        nombre = self.esperar(TipoToken.ID, "un identificador")
+        self.esperar(TipoToken.PARENTESIS_DER, "')'")
+        self.fin_sentencia()
+        return Lectura(nombre.valor, inicio.linea)
+
+    def escritura(self):
+        inicio = self.avanzar()
+        self.esperar(TipoToken.PARENTESIS_IZQ, "'('")
+        valor = self.expresion()
+        self.esperar(TipoToken.PARENTESIS_DER, "')'")
+        self.fin_sentencia()
+        return Escritura(valor, inicio.linea)
+
+    def retorno(self):
+        inicio = self.avanzar()
+        valor = self.expresion()
+        self.fin_sentencia()
+        return Retorno(valor, inicio.linea)
+
+    # --- <Condition> y <Expression> ---
+
+    def condicion(self):
+        izquierda = self.expresion()
+        if self.actual.tipo not in OPERADORES_RELACIONALES:
+            self.error(f"Se esperaba un operador relacional y se encontró {describir(self.actual)}")
+        operador = self.avanzar()
+        return OperacionBinaria(operador.tipo, izquierda, self.expresion(), operador.linea)
+
+    def expresion(self):
+        # <Expression> ::= <Term> <ExprPrime>; ExprPrime se resuelve como ciclo (asociativo a la izquierda)
+        resultado = self.termino()
+        while self.actual.tipo in OPERADORES_SUMA:
+            operador = self.avanzar()
+            resultado = OperacionBinaria(operador.tipo, resultado, self.termino(), operador.linea)
+        return resultado
+
+    def termino(self):
+        resultado = self.factor()
+        while self.actual.tipo in OPERADORES_PRODUCTO:
+            operador = self.avanzar()
+            resultado = OperacionBinaria(operador.tipo, resultado, self.factor(), operador.linea)
+        return resultado
+
+    def factor(self):
+        tipo = self.actual.tipo
+        if tipo == TipoToken.ID:
+            nombre = self.avanzar()
+            if self.actual.tipo == TipoToken.PARENTESIS_IZQ:
+                return self.llamada(nombre)
+            return Identificador(nombre.valor, nombre.linea)
+        if tipo in LITERALES:
+            token = self.avanzar()
+            return Literal(token.tipo, token.valor, token.linea)
+        if tipo == TipoToken.PARENTESIS_IZQ:
+            self.avanzar()
+            self.entrar()
+            resultado = self.expresion()
+            self.profundidad -= 1
+            self.esperar(TipoToken.PARENTESIS_DER, "')'")
+            return resultado
+        self.error(f"Se esperaba una expresión y se encontró {describir(self.actual)}")
+
+    def llamada(self, nombre):
+        # "(" <ArgList> ")" después del nombre ya consumido. Los argumentos pueden
+        # tener otras llamadas: cuentan como un nivel más de anidamiento
+        self.avanzar()
+        self.entrar()
+        argumentos = []
+        if self.actual.tipo != TipoToken.PARENTESIS_DER:
+            argumentos.append(self.expresion())
+            while self.actual.tipo == TipoToken.COMA:
+                self.avanzar()
+                argumentos.append(self.expresion())
+        self.esperar(TipoToken.PARENTESIS_DER, "')'")
+        self.profundidad -= 1
+        return LlamadaFuncion(nombre.valor, argumentos, nombre.linea)
+
+# ==========================================
+# USO DESDE CONSOLA
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analiza sintácticamente un programa MiniLang leyéndolo por bloques.")
+    parser.add_argument("archivo")
+    parser.add_argument("--motor", default=MOTOR_COMPILADO, help="Motor del analizador léxico")
+    parser.add_argument("--arbol", action="store_true", help="Imprimir cada sentencia de primer nivel")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    sentencias = 0
+    try:
+        with open(args.archivo, 'r', encoding='utf-8') as f:
+            analizador = AnalizadorSintactico(iter_tokens(f, args.motor))
+            for sentencia in analizador.sentencias():
+                sentencias += 1
+                if args.arbol:
+                    print(repr(sentencia))
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    duracion = max(time.perf_counter() - inicio, 1e-9)
+
+    for error in analizador.errores:
+        print(error, file=sys.stderr)
+    print(f"Sentencias: {sentencias}, tokens: {analizador.tokens_leidos}, errores sintácticos: "
+          f"{len(analizador.errores)}, errores léxicos: {analizador.errores_lexicos}")
+    print(f"Tiempo: {duracion:.3f} s | {analizador.tokens_leidos / duracion:.0f} tokens/s")
+    return 1 if analizador.errores or analizador.errores_lexicos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,16 @@
+# ==========================================
+# 4.2 TAMAÑOS EN LA LÍNEA DE COMANDOS
+# ==========================================
+
+# Compartido por cli.py, servidor_lexico.py y las herramientas de benchmark
+# (--cache-max, --memoria-max, --tamanos, --tam)
+
+UNIDADES = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+def parsear_tamano(texto):
+    # "1KB", "10MB", "500MB" o un número de bytes
+    texto = texto.strip().upper()
+    for unidad in ("GB", "MB", "KB", "B"):
+        if texto.endswith(unidad):
+            return int(float(texto[:-len(unidad)]) * UNIDADES[unidad])
+    return int(texto)
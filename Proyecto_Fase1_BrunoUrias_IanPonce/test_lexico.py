@@ -0,0 +1,161 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+import lexico_paralelo
+from generador_corpus import FORMAS, generar_texto
+from lexico import (AnalizadorLexico, AnalizadorIncremental, ErrorLexico, IndiceIdentificadores,
+                    MOTOR_CLASICO, MOTOR_COMPILADO, escribir_salida, intercalar_resultados, iter_tokens)
+from lexico_paralelo import analizar_paralelo, escribir_salida_paralela
+from salida_binaria import LectorBinario, binario_a_texto, escribir_binario
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+TAM_CORPUS = 20_000  # Bytes de cada corpus generado
+
+def fuentes_de_prueba():
+    # (nombre, texto): SetDePruebas.txt y un corpus chico de cada forma del generador
+    with open(os.path.join(DIRECTORIO, "SetDePruebas.txt"), encoding='utf-8') as f:
+        fuentes = [("SetDePruebas.txt", f.read())]
+    fuentes.extend((forma, generar_texto(forma, TAM_CORPUS, semilla=7)) for forma in FORMAS)
+    return fuentes
+
+FUENTES = fuentes_de_prueba()
+
+def volcar(tokens, errores=()):
+    # Texto del .out de cada token y de cada error: compara todos sus campos
+    return [str(t) for t in tokens], [str(e) for e in errores]
+
+def referencia(fuente, motor=MOTOR_CLASICO):
+    return volcar(*AnalizadorLexico(fuente, motor).analizar())
+
+class PruebasMotores(unittest.TestCase):
+    # El motor compilado debe producir exactamente lo mismo que el clásico
+
+    def test_compilado_igual_a_clasico(self):
+        for nombre, fuente in FUENTES:
+            with self.subTest(fuente=nombre):
+                self.assertEqual(referencia(fuente, MOTOR_COMPILADO), referencia(fuente, MOTOR_CLASICO))
+
+    def test_rachas_de_caracteres_desconocidos(self):
+        # Una racha es un solo error aunque siga con '!' suelto o un numérico no ASCII
+        for fuente in ("x = @@$$ 1\n", "a @!! b\n", "@½½@ x\n", "@!= y\n", "€€€\n", "." * 40 + "\n"):
+            with self.subTest(fuente=fuente):
+                self.assertEqual(referencia(fuente, MOTOR_COMPILADO), referencia(fuente, MOTOR_CLASICO))
+
+    def test_caracteres_no_ascii(self):
+        # Letras no ASCII dentro de la expresión maestra; '½', '²' y dígitos no ASCII por el respaldo clásico
+        for fuente in ("año = 1\n", "ñandú_2 x\n", "½x = 2\n", "x½ y²\n", "3é 7.3٣ 12٣\n", "²5 一二\n"):
+            with self.subTest(fuente=fuente):
+                self.assertEqual(referencia(fuente, MOTOR_COMPILADO), referencia(fuente, MOTOR_CLASICO))
+
+class PruebasLecturaPorBloques(unittest.TestCase):
+    # iter_tokens lee la fuente por bloques: el tamaño del bloque no debe notarse
+
+    def test_cualquier_tamano_de_bloque(self):
+        for nombre, fuente in FUENTES:
+            esperado = referencia(fuente)
+            for motor in (MOTOR_CLASICO, MOTOR_COMPILADO):
+                for tam_bloque in (1, 7, 100, 1 << 16):
+                    with self.subTest(fuente=nombre, motor=motor, tam_bloque=tam_bloque):
+                        elementos = list(iter_tokens(io.StringIO(fuente, newline=''), motor, tam_bloque=tam_bloque))
+                        tokens = [e for e in elementos if not isinstance(e, ErrorLexico)]
+                        errores = [e for e in elementos if isinstance(e, ErrorLexico)]
+                        self.assertEqual(volcar(tokens, errores), esperado)
+
+class PruebasIncremental(unittest.TestCase):
+    # Tras cada edición, el análisis incremental y su índice deben coincidir con
+    # analizar el texto completo desde cero
+
+    def test_ediciones_al_azar(self):
+        rnd = random.Random(3)
+        for nombre, fuente in FUENTES:
+            lineas = fuente.split('\n')
+            analizador = AnalizadorIncremental()
+            for paso in range(12):
+                texto = '\n'.join(lineas)
+                with self.subTest(fuente=nombre, paso=paso):
+                    tokens, errores = analizador.analizar(texto)
+                    self.assertEqual(volcar(tokens, errores), referencia(texto))
+                    esperado = IndiceIdentificadores.desde_tokens(tokens)
+                    self.assertEqual({n: list(u) for n, u in analizador.indice.referencias.items()},
+                                     {n: list(u) for n, u in esperado.referencias.items()})
+                # Insertar, borrar o reemplazar unas líneas tomadas de otra parte del texto
+                i = rnd.randrange(len(lineas) + 1)
+                j = rnd.randrange(len(lineas) + 1)
+                otras = lineas[j:j + rnd.randint(1, 4)]
+                operacion = rnd.random()
+                if operacion < 0.4:
+                    lineas[i:i] = otras
+                elif operacion < 0.7:
+                    del lineas[i:i + rnd.randint(1, 4)]
+                else:
+                    lineas[i:i + 1] = otras
+
+class PruebasParalelo(unittest.TestCase):
+    # Cortar la fuente en fragmentos y unirlos debe dar lo mismo que el análisis secuencial
+
+    def test_fragmentos_en_el_mismo_proceso(self):
+        with mock.patch.object(lexico_paralelo, "TAM_MINIMO_FRAGMENTO", 512):
+            for nombre, fuente in FUENTES:
+                with self.subTest(fuente=nombre):
+                    self.assertEqual(volcar(*analizar_paralelo(fuente, trabajadores=1)), referencia(fuente))
+
+    def test_pool_de_procesos(self):
+        fuente = generar_texto("indentacion", 3 * lexico_paralelo.TAM_MINIMO_FRAGMENTO, semilla=1)
+        esperado = referencia(fuente, MOTOR_COMPILADO)
+        with ProcessPoolExecutor(max_workers=2) as pool, tempfile.TemporaryDirectory() as directorio:
+            self.assertEqual(volcar(*analizar_paralelo(fuente, trabajadores=2, pool=pool)), esperado)
+            secuencial = os.path.join(directorio, "secuencial.out")
+            paralela = os.path.join(directorio, "paralela.out")
+            escribir_salida(AnalizadorLexico(fuente, MOTOR_COMPILADO).analizar()[0], secuencial)
+            escribir_salida_paralela(fuente, paralela, trabajadores=2, pool=pool)
+            with open(secuencial, "rb") as a, open(paralela, "rb") as b:
+                self.assertEqual(a.read(), b.read())
+
+class PruebasSalidaBinaria(unittest.TestCase):
+    # Un .outb debe devolver los mismos tokens, errores y .out que el análisis
+
+    def test_ida_y_vuelta(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "salida.outb")
+            for nombre, fuente in FUENTES:
+                tokens, errores = AnalizadorLexico(fuente).analizar()
+                escribir_binario(intercalar_resultados(tokens, errores), ruta)
+                with self.subTest(fuente=nombre), LectorBinario(ruta) as lector:
+                    self.assertEqual(volcar(lector, lector.errores()), volcar(tokens, errores))
+                    self.assertEqual(len(lector), len(tokens))
+                    for i in range(0, len(tokens), 97):
+                        self.assertEqual(str(lector[i]), str(tokens[i]))
+                    for linea in range(1, tokens[-1].linea + 1 if tokens else 1, 13):
+                        self.assertEqual(volcar(lector.tokens_en_linea(linea)),
+                                         volcar(t for t in tokens if t.linea == linea))
+                    indice = IndiceIdentificadores.desde_tokens(tokens)
+                    for nombre_id in list(indice.referencias)[:25]:
+                        self.assertEqual(list(lector.buscar(nombre_id).usos), list(indice.buscar(nombre_id).usos))
+
+                    texto, esperado = os.path.join(directorio, "a.out"), os.path.join(directorio, "b.out")
+                    binario_a_texto(ruta, texto)
+                    escribir_salida(tokens, esperado)
+                    with open(texto, "rb") as a, open(esperado, "rb") as b:
+                        self.assertEqual(a.read(), b.read())
+
+class PruebasTokenBuffer(unittest.TestCase):
+    # analizar_compacto guarda solo desplazamientos; al leerlo debe reconstruir los mismos tokens
+
+    def test_igual_a_analizar(self):
+        for nombre, fuente in FUENTES:
+            for motor in (MOTOR_CLASICO, MOTOR_COMPILADO):
+                with self.subTest(fuente=nombre, motor=motor):
+                    esperado = referencia(fuente)
+                    buffer, errores = AnalizadorLexico(fuente, motor).analizar_compacto()
+                    self.assertEqual(volcar(buffer, errores), esperado)
+                    # Acceso por posición, salteado y hacia atrás
+                    for i in range(len(buffer) - 1, -1, -37):
+                        self.assertEqual(str(buffer[i]), esperado[0][i])
+
+if __name__ == "__main__":
+    unittest.main()
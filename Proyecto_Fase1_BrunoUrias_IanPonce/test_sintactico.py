@@ -0,0 +1,37 @@
+import unittest
+
+from lexico import AnalizadorLexico
+from sintactico import AnalizadorSintactico, PROFUNDIDAD_MAXIMA
+
+def analizar(codigo_fuente):
+    tokens, _ = AnalizadorLexico(codigo_fuente).analizar()
+    return AnalizadorSintactico(tokens).analizar()
+
+class PruebasProfundidad(unittest.TestCase):
+    # El anidamiento excesivo debe terminar en un error de sintaxis de esa
+    # sentencia, nunca en un RecursionError
+
+    def test_llamadas_anidadas_en_expresion(self):
+        anidadas = 4 * PROFUNDIDAD_MAXIMA
+        programa, errores = analizar("x = " + "f(" * anidadas + "1" + ")" * anidadas + "\ny = 2\n")
+        self.assertEqual([e.mensaje for e in errores], ["Anidamiento demasiado profundo"])
+        self.assertEqual(len(programa.sentencias), 1)  # Se recupera en la línea siguiente
+
+    def test_llamadas_anidadas_como_sentencia(self):
+        anidadas = 4 * PROFUNDIDAD_MAXIMA
+        _, errores = analizar("f(" * anidadas + ")" * anidadas + "\n")
+        self.assertEqual([e.mensaje for e in errores], ["Anidamiento demasiado profundo"])
+
+    def test_parentesis_anidados(self):
+        anidados = 4 * PROFUNDIDAD_MAXIMA
+        _, errores = analizar("x = " + "(" * anidados + "1" + ")" * anidados + "\n")
+        self.assertEqual([e.mensaje for e in errores], ["Anidamiento demasiado profundo"])
+
+    def test_llamadas_dentro_del_limite(self):
+        anidadas = PROFUNDIDAD_MAXIMA - 1
+        programa, errores = analizar("x = " + "f(" * anidadas + "1" + ")" * anidadas + "\n")
+        self.assertEqual(errores, [])
+        self.assertEqual(len(programa.sentencias), 1)
+
+if __name__ == "__main__":
+    unittest.main()